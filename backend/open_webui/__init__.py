@@ -99,5 +99,41 @@ def dev(
     )
 
 
+@app.command()
+def embedding_server(
+    model: str = "sentence-transformers/all-MiniLM-L6-v2",
+    host: str = "127.0.0.1",
+    port: int = 8090,
+):
+    """
+    Serve a local embedding model on an OpenAI compatible /v1/embeddings API,
+    to be used with RAG_EMBEDDING_ENGINE=openai (and
+    RAG_EMBEDDING_PREFIX_FIELD_NAME=prompt for prefixed models).
+    """
+    from open_webui.retrieval.embedding_service import create_embedding_server_app
+
+    uvicorn.run(create_embedding_server_app(model), host=host, port=port)
+
+
+@app.command()
+def pgvector_reindex(
+    partial_index_min_rows: Optional[int] = None,
+):
+    """
+    Rebuild the pgvector index with PGVECTOR_INDEX_METHOD and its parameters,
+    and the partial indexes of large collections, without blocking writes.
+    """
+    from open_webui.config import PGVECTOR_PARTIAL_INDEX_MIN_ROWS
+    from open_webui.retrieval.vector.dbs.pgvector import PgvectorClient
+
+    PgvectorClient().reindex(
+        partial_index_min_rows=(
+            partial_index_min_rows
+            if partial_index_min_rows is not None
+            else PGVECTOR_PARTIAL_INDEX_MIN_ROWS
+        )
+    )
+
+
 if __name__ == "__main__":
     app()
@@ -4,7 +4,9 @@ import os
 import shutil
 import base64
 import redis
+import threading
 
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Generic, Optional, TypeVar
@@ -195,7 +197,7 @@ class PersistentConfig(Generic[T]):
             self.value = new_value
             log.info(f"Updated {self.env_name} to new value {self.value}")
 
-    def save(self):
+    def save(self, commit: bool = True):
         log.info(f"Saving '{self.env_name}' to the database")
         path_parts = self.config_path.split(".")
         sub_config = CONFIG_DATA
@@ -204,58 +206,207 @@ class PersistentConfig(Generic[T]):
                 sub_config[key] = {}
             sub_config = sub_config[key]
         sub_config[path_parts[-1]] = self.value
-        save_to_db(CONFIG_DATA)
+        if commit:
+            save_to_db(CONFIG_DATA)
         self.config_value = self.value
 
 
+CONFIG_REDIS_KEY_PREFIX = "open-webui:config"
+CONFIG_REDIS_VERSION_KEY = f"{CONFIG_REDIS_KEY_PREFIX}:__version__"
+CONFIG_REDIS_CHANNEL = f"{CONFIG_REDIS_KEY_PREFIX}:__updates__"
+
+
 class AppConfig:
+    """
+    In-process snapshot of the PersistentConfig values used by the app.
+
+    Reads are plain attribute lookups on the local snapshot. When Redis is
+    configured, writes are stored under `open-webui:config:<key>`, stamped with
+    a monotonically increasing version and announced on a pub/sub channel.
+    Every worker, the writer included, applies the announced values in version
+    order, so concurrent writes settle on the last one everywhere. A gap in
+    the received versions (e.g. after a reconnect) triggers a full resync from
+    Redis.
+
+    Keys registered with a PersistentConfig are read from Redis together, on
+    the first access after registration, rather than one round trip each.
+    """
+
     _state: dict[str, PersistentConfig]
     _redis: Optional[redis.Redis] = None
+    _version: int = 0
+    _pending: Optional[dict] = None
+    _unloaded: list[str]
 
     def __init__(
         self, redis_url: Optional[str] = None, redis_sentinels: Optional[list] = []
     ):
         super().__setattr__("_state", {})
+        super().__setattr__("_version", 0)
+        super().__setattr__("_pending", None)
+        super().__setattr__("_unloaded", [])
+        super().__setattr__("_lock", threading.RLock())
         if redis_url:
             super().__setattr__(
                 "_redis",
                 get_redis_connection(redis_url, redis_sentinels, decode_responses=True),
             )
+            self._subscribe()
 
     def __setattr__(self, key, value):
         if isinstance(value, PersistentConfig):
             self._state[key] = value
-        else:
-            self._state[key].value = value
-            self._state[key].save()
-
             if self._redis:
-                redis_key = f"open-webui:config:{key}"
-                self._redis.set(redis_key, json.dumps(self._state[key].value))
+                self._unloaded.append(key)
+            return
 
-    def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
-        if self._redis:
-            redis_key = f"open-webui:config:{key}"
-            redis_value = self._redis.get(redis_key)
+        if self._unloaded:
+            self._load_unloaded()
 
-            if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
+        self._state[key].value = value
 
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
+        if self._pending is not None:
+            # Inside a batch(): persist and publish once on exit
+            self._state[key].save(commit=False)
+            self._pending[key] = self._state[key].value
+            return
 
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+        self._state[key].save()
+        self._publish({key: self._state[key].value})
 
+    def __getattr__(self, key):
+        if key not in self._state:
+            raise AttributeError(f"Config key '{key}' not found")
+        if self._unloaded:
+            self._load_unloaded()
         return self._state[key].value
 
+    @contextmanager
+    def batch(self):
+        """
+        Group several config assignments into a single database write and a
+        single Redis publish, e.g. for the `/config/update` endpoints.
+        """
+        if self._pending is not None:
+            # Nested batches are folded into the outermost one
+            yield self
+            return
+
+        super().__setattr__("_pending", {})
+        try:
+            yield self
+        finally:
+            pending = self._pending
+            super().__setattr__("_pending", None)
+            if pending:
+                save_to_db(CONFIG_DATA)
+                self._publish(pending)
+
+    def _publish(self, values: dict):
+        if not self._redis or not values:
+            return
+
+        try:
+            with self._redis.pipeline() as pipe:
+                for key, value in values.items():
+                    pipe.set(f"{CONFIG_REDIS_KEY_PREFIX}:{key}", json.dumps(value))
+                pipe.incr(CONFIG_REDIS_VERSION_KEY)
+                version = pipe.execute()[-1]
+
+            self._redis.publish(
+                CONFIG_REDIS_CHANNEL,
+                json.dumps({"version": version, "values": values}),
+            )
+        except Exception as e:
+            log.error(f"Error publishing config update to Redis: {e}")
+
+    def _apply(self, values: dict):
+        with self._lock:
+            for key, value in values.items():
+                if key in self._state and self._state[key].value != value:
+                    self._state[key].value = value
+                    log.info(f"Updated {key} from Redis: {value}")
+
+    def _load_unloaded(self):
+        with self._lock:
+            keys = list(self._unloaded)
+            self._unloaded.clear()
+            if keys:
+                self._load_from_redis(keys)
+
+    def _load_from_redis(self, keys: Optional[list[str]] = None):
+        keys = list(self._state.keys()) if keys is None else keys
+        if not keys:
+            return
+
+        try:
+            with self._redis.pipeline() as pipe:
+                pipe.get(CONFIG_REDIS_VERSION_KEY)
+                pipe.mget([f"{CONFIG_REDIS_KEY_PREFIX}:{key}" for key in keys])
+                version, redis_values = pipe.execute()
+        except Exception as e:
+            log.error(f"Error loading config from Redis: {e}")
+            return
+
+        values = {}
+        for key, redis_value in zip(keys, redis_values):
+            if redis_value is None:
+                continue
+            try:
+                values[key] = json.loads(redis_value)
+            except json.JSONDecodeError:
+                log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+
+        with self._lock:
+            self._apply(values)
+            if version is not None and int(version) > self._version:
+                super().__setattr__("_version", int(version))
+
+    def _on_message(self, message):
+        try:
+            data = json.loads(message["data"])
+            version = int(data["version"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            log.error(f"Invalid config update message: {message.get('data')}")
+            return
+
+        with self._lock:
+            if version <= self._version:
+                return
+
+            if version > self._version + 1:
+                # Missed at least one update, reload the whole snapshot
+                self._load_from_redis()
+            else:
+                # Including this worker's own writes, which may have been
+                # overtaken locally by an older write from another worker
+                self._apply(data.get("values", {}))
+
+            if version > self._version:
+                super().__setattr__("_version", version)
+
+    def _on_listener_error(self, e, pubsub, thread):
+        log.error(f"Config update listener error: {e}")
+        # Updates may have been missed while disconnected; force a resync on
+        # the next message.
+        super().__setattr__("_version", -1)
+
+    def _subscribe(self):
+        try:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{CONFIG_REDIS_CHANNEL: self._on_message})
+            thread = pubsub.run_in_thread(
+                sleep_time=1.0,
+                daemon=True,
+                exception_handler=self._on_listener_error,
+            )
+            super().__setattr__("_listener", thread)
+        except Exception as e:
+            log.error(f"Error subscribing to config updates: {e}")
+
 
 ####################################
 # WEBUI_AUTH (Required for security)
@@ -1756,6 +1907,15 @@ MILVUS_METRIC_TYPE = os.environ.get("MILVUS_METRIC_TYPE", "COSINE")
 MILVUS_HNSW_M = int(os.environ.get("MILVUS_HNSW_M", "16"))
 MILVUS_HNSW_EFCONSTRUCTION = int(os.environ.get("MILVUS_HNSW_EFCONSTRUCTION", "100"))
 MILVUS_IVF_FLAT_NLIST = int(os.environ.get("MILVUS_IVF_FLAT_NLIST", "128"))
+# Quantised index types IVF_SQ8 (int8, 1/4 the size) and IVF_PQ (product
+# quantisation, MILVUS_IVF_PQ_M sub-vectors of MILVUS_IVF_PQ_NBITS bits; 0
+# picks the largest divisor of the dimension up to one sub-vector per 8
+# dimensions) use MILVUS_IVF_FLAT_NLIST as well.
+# Their results are re-ranked with the stored full precision vectors, out of
+# MILVUS_RESCORE_OVERSAMPLING times the requested results
+MILVUS_IVF_PQ_M = int(os.environ.get("MILVUS_IVF_PQ_M", "0"))
+MILVUS_IVF_PQ_NBITS = int(os.environ.get("MILVUS_IVF_PQ_NBITS", "8"))
+MILVUS_RESCORE_OVERSAMPLING = float(os.environ.get("MILVUS_RESCORE_OVERSAMPLING", "4"))
 
 # Qdrant
 QDRANT_URI = os.environ.get("QDRANT_URI", None)
@@ -1763,6 +1923,20 @@ QDRANT_API_KEY = os.environ.get("QDRANT_API_KEY", None)
 QDRANT_ON_DISK = os.environ.get("QDRANT_ON_DISK", "false").lower() == "true"
 QDRANT_PREFER_GRPC = os.environ.get("QDRANT_PREFER_GRPC", "False").lower() == "true"
 QDRANT_GRPC_PORT = int(os.environ.get("QDRANT_GRPC_PORT", "6334"))
+# Quantisation of new collections: "" (none), "scalar" (int8), "product" or
+# "binary". Quantised vectors are kept in RAM, the originals follow
+# QDRANT_ON_DISK and re-rank QDRANT_QUANTIZATION_OVERSAMPLING times the
+# requested results
+QDRANT_QUANTIZATION = os.environ.get("QDRANT_QUANTIZATION", "").lower()
+if QDRANT_QUANTIZATION not in ["", "scalar", "product", "binary"]:
+    QDRANT_QUANTIZATION = ""
+QDRANT_QUANTIZATION_OVERSAMPLING = float(
+    os.environ.get("QDRANT_QUANTIZATION_OVERSAMPLING", "2")
+)
+# Multitenancy mode upserts QDRANT_UPSERT_BATCH_SIZE points per request,
+# QDRANT_UPSERT_PARALLELISM requests at a time, without waiting for indexing
+QDRANT_UPSERT_BATCH_SIZE = int(os.environ.get("QDRANT_UPSERT_BATCH_SIZE", "256"))
+QDRANT_UPSERT_PARALLELISM = int(os.environ.get("QDRANT_UPSERT_PARALLELISM", "4"))
 ENABLE_QDRANT_MULTITENANCY_MODE = (
     os.environ.get("ENABLE_QDRANT_MULTITENANCY_MODE", "false").lower() == "true"
 )
@@ -1796,6 +1970,45 @@ if VECTOR_DB == "pgvector" and not PGVECTOR_DB_URL.startswith("postgres"):
 PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH = int(
     os.environ.get("PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH", "1536")
 )
+# Vector index: "hnsw" or "ivfflat". Changing it on an existing database
+# takes effect with `open-webui pgvector-reindex`
+PGVECTOR_INDEX_METHOD = os.environ.get("PGVECTOR_INDEX_METHOD", "hnsw").lower()
+if PGVECTOR_INDEX_METHOD not in ["hnsw", "ivfflat"]:
+    PGVECTOR_INDEX_METHOD = "hnsw"
+PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+)
+PGVECTOR_HNSW_EF_SEARCH = int(os.environ.get("PGVECTOR_HNSW_EF_SEARCH", "40"))
+# Searches filter the global HNSW index by collection, which only returns
+# ef_search rows before filtering. Iterative index scans (pgvector >= 0.8)
+# keep scanning until enough rows match: "auto" (relaxed_order when
+# available), "strict_order", "relaxed_order" or "off". Without them,
+# searches of collections that have no partial index (see
+# PGVECTOR_PARTIAL_INDEX_MIN_ROWS) raise ef_search to its maximum instead,
+# ignoring PGVECTOR_HNSW_EF_SEARCH
+PGVECTOR_HNSW_ITERATIVE_SCAN = os.environ.get(
+    "PGVECTOR_HNSW_ITERATIVE_SCAN", "auto"
+).lower()
+if PGVECTOR_HNSW_ITERATIVE_SCAN not in ["auto", "strict_order", "relaxed_order", "off"]:
+    PGVECTOR_HNSW_ITERATIVE_SCAN = "auto"
+PGVECTOR_IVFFLAT_LISTS = int(os.environ.get("PGVECTOR_IVFFLAT_LISTS", "100"))
+# Collections with at least this many chunks get their own partial vector
+# index on reindex, 0 disables partial indexes
+PGVECTOR_PARTIAL_INDEX_MIN_ROWS = int(
+    os.environ.get("PGVECTOR_PARTIAL_INDEX_MIN_ROWS", "100000")
+)
+# Quantised vector indexes (pgvector >= 0.7): "" (full precision), "halfvec"
+# (half the index size) or "binary" (1/32). Searches fetch
+# PGVECTOR_RESCORE_OVERSAMPLING times the requested results from the index
+# and re-rank them with the stored full precision vectors. Takes effect on
+# an existing database with `open-webui pgvector-reindex`
+PGVECTOR_QUANTIZATION = os.environ.get("PGVECTOR_QUANTIZATION", "").lower()
+if PGVECTOR_QUANTIZATION not in ["", "halfvec", "binary"]:
+    PGVECTOR_QUANTIZATION = ""
+PGVECTOR_RESCORE_OVERSAMPLING = float(
+    os.environ.get("PGVECTOR_RESCORE_OVERSAMPLING", "4")
+)
 
 # Pinecone
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", None)
@@ -406,6 +406,47 @@ WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Seconds after which a socket session that stopped sending heartbeats (e.g.
+# because its worker crashed) is dropped from the Redis session pool.
+WEBSOCKET_SESSION_TTL = os.environ.get("WEBSOCKET_SESSION_TTL", "120")
+
+try:
+    WEBSOCKET_SESSION_TTL = int(WEBSOCKET_SESSION_TTL)
+except Exception:
+    WEBSOCKET_SESSION_TTL = 120
+
+# Upper bound on streamed content frames sent per chat message per second,
+# intermediate deltas are coalesced. 0 disables coalescing: every frame is
+# sent, with the full content.
+WEBSOCKET_EVENT_MAX_FRAMES_PER_SECOND = os.environ.get(
+    "WEBSOCKET_EVENT_MAX_FRAMES_PER_SECOND", "20"
+)
+
+try:
+    WEBSOCKET_EVENT_MAX_FRAMES_PER_SECOND = float(WEBSOCKET_EVENT_MAX_FRAMES_PER_SECOND)
+except Exception:
+    WEBSOCKET_EVENT_MAX_FRAMES_PER_SECOND = 20
+
+# Every n-th coalesced frame carries the full content instead of a delta so
+# that clients which missed a frame resynchronise.
+WEBSOCKET_EVENT_KEYFRAME_INTERVAL = os.environ.get(
+    "WEBSOCKET_EVENT_KEYFRAME_INTERVAL", "50"
+)
+
+try:
+    WEBSOCKET_EVENT_KEYFRAME_INTERVAL = int(WEBSOCKET_EVENT_KEYFRAME_INTERVAL)
+except Exception:
+    WEBSOCKET_EVENT_KEYFRAME_INTERVAL = 50
+
+WEBSOCKET_COMPRESSION_THRESHOLD = os.environ.get(
+    "WEBSOCKET_COMPRESSION_THRESHOLD", "1024"
+)
+
+try:
+    WEBSOCKET_COMPRESSION_THRESHOLD = int(WEBSOCKET_COMPRESSION_THRESHOLD)
+except Exception:
+    WEBSOCKET_COMPRESSION_THRESHOLD = 1024
+
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
 if AIOHTTP_CLIENT_TIMEOUT == "":
@@ -454,6 +495,203 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL", "True").lower() == "true"
 )
 
+# Seconds between background revalidations of tool server OpenAPI specs,
+# 0 disables the refresh
+TOOL_SERVER_SPEC_REFRESH_INTERVAL = os.environ.get(
+    "TOOL_SERVER_SPEC_REFRESH_INTERVAL", "300"
+)
+
+try:
+    TOOL_SERVER_SPEC_REFRESH_INTERVAL = max(int(TOOL_SERVER_SPEC_REFRESH_INTERVAL), 0)
+except Exception:
+    TOOL_SERVER_SPEC_REFRESH_INTERVAL = 300
+
+####################################
+# TOOL CALLS
+####################################
+
+# Independent tool calls of one turn run concurrently, bounded per user and
+# per tool
+TOOL_CALL_MAX_CONCURRENCY_PER_USER = os.environ.get(
+    "TOOL_CALL_MAX_CONCURRENCY_PER_USER", "8"
+)
+
+try:
+    TOOL_CALL_MAX_CONCURRENCY_PER_USER = max(int(TOOL_CALL_MAX_CONCURRENCY_PER_USER), 1)
+except Exception:
+    TOOL_CALL_MAX_CONCURRENCY_PER_USER = 8
+
+TOOL_CALL_MAX_CONCURRENCY_PER_TOOL = os.environ.get(
+    "TOOL_CALL_MAX_CONCURRENCY_PER_TOOL", "16"
+)
+
+try:
+    TOOL_CALL_MAX_CONCURRENCY_PER_TOOL = max(int(TOOL_CALL_MAX_CONCURRENCY_PER_TOOL), 1)
+except Exception:
+    TOOL_CALL_MAX_CONCURRENCY_PER_TOOL = 16
+
+# Seconds before a single tool call is abandoned, so that a hung tool cannot
+# hold the chat and its concurrency slots; "" or 0 disables the timeout
+TOOL_CALL_TIMEOUT = os.environ.get("TOOL_CALL_TIMEOUT", "300")
+
+if TOOL_CALL_TIMEOUT == "":
+    TOOL_CALL_TIMEOUT = None
+else:
+    try:
+        TOOL_CALL_TIMEOUT = int(TOOL_CALL_TIMEOUT)
+        if TOOL_CALL_TIMEOUT <= 0:
+            TOOL_CALL_TIMEOUT = None
+    except Exception:
+        TOOL_CALL_TIMEOUT = 300
+
+####################################
+# PIPELINES
+####################################
+
+# Run consecutive pipeline filters of one server with a single request, on
+# servers that provide the batch endpoint
+ENABLE_PIPELINES_FILTER_BATCHING = (
+    os.environ.get("ENABLE_PIPELINES_FILTER_BATCHING", "True").lower() == "true"
+)
+
+####################################
+# RETRIEVAL
+####################################
+
+# Retrieval for the raw user message starts while the task model is still
+# generating queries; results of both are merged once the queries arrive
+ENABLE_SPECULATIVE_RETRIEVAL = (
+    os.environ.get("ENABLE_SPECULATIVE_RETRIEVAL", "True").lower() == "true"
+)
+
+# Seconds to wait for generated queries before falling back to the
+# speculative results alone
+SPECULATIVE_RETRIEVAL_QUERY_DEADLINE = os.environ.get(
+    "SPECULATIVE_RETRIEVAL_QUERY_DEADLINE", "3"
+)
+
+try:
+    SPECULATIVE_RETRIEVAL_QUERY_DEADLINE = float(SPECULATIVE_RETRIEVAL_QUERY_DEADLINE)
+except Exception:
+    SPECULATIVE_RETRIEVAL_QUERY_DEADLINE = 3.0
+
+# Shared thread pools for blocking retrieval work. Chat requests beyond
+# RETRIEVAL_EXECUTOR_MAX_QUEUE waiting jobs are answered without retrieval
+RETRIEVAL_EXECUTOR_MAX_WORKERS = os.environ.get("RETRIEVAL_EXECUTOR_MAX_WORKERS", "8")
+
+try:
+    RETRIEVAL_EXECUTOR_MAX_WORKERS = max(int(RETRIEVAL_EXECUTOR_MAX_WORKERS), 1)
+except Exception:
+    RETRIEVAL_EXECUTOR_MAX_WORKERS = 8
+
+RETRIEVAL_EXECUTOR_MAX_QUEUE = os.environ.get("RETRIEVAL_EXECUTOR_MAX_QUEUE", "64")
+
+try:
+    RETRIEVAL_EXECUTOR_MAX_QUEUE = max(int(RETRIEVAL_EXECUTOR_MAX_QUEUE), 0)
+except Exception:
+    RETRIEVAL_EXECUTOR_MAX_QUEUE = 64
+
+RETRIEVAL_QUERY_EXECUTOR_MAX_WORKERS = os.environ.get(
+    "RETRIEVAL_QUERY_EXECUTOR_MAX_WORKERS", "16"
+)
+
+try:
+    RETRIEVAL_QUERY_EXECUTOR_MAX_WORKERS = max(
+        int(RETRIEVAL_QUERY_EXECUTOR_MAX_WORKERS), 1
+    )
+except Exception:
+    RETRIEVAL_QUERY_EXECUTOR_MAX_WORKERS = 16
+
+# Hybrid search scores the candidates of all queries of a turn in a single
+# cross-encoder call, RAG_RERANKING_BATCH_SIZE pairs per forward pass
+RAG_RERANKING_BATCH_SIZE = os.environ.get("RAG_RERANKING_BATCH_SIZE", "32")
+
+try:
+    RAG_RERANKING_BATCH_SIZE = max(int(RAG_RERANKING_BATCH_SIZE), 1)
+except Exception:
+    RAG_RERANKING_BATCH_SIZE = 32
+
+# Local SentenceTransformer embeddings run on one worker thread per process;
+# concurrent calls are coalesced into micro-batches of up to
+# LOCAL_EMBEDDING_MAX_BATCH_SIZE texts, waiting at most
+# LOCAL_EMBEDDING_MAX_WAIT_MS for more calls to join a batch
+ENABLE_LOCAL_EMBEDDING_BATCHING = (
+    os.environ.get("ENABLE_LOCAL_EMBEDDING_BATCHING", "True").lower() == "true"
+)
+
+LOCAL_EMBEDDING_MAX_BATCH_SIZE = os.environ.get("LOCAL_EMBEDDING_MAX_BATCH_SIZE", "64")
+
+try:
+    LOCAL_EMBEDDING_MAX_BATCH_SIZE = max(int(LOCAL_EMBEDDING_MAX_BATCH_SIZE), 1)
+except Exception:
+    LOCAL_EMBEDDING_MAX_BATCH_SIZE = 64
+
+LOCAL_EMBEDDING_MAX_WAIT_MS = os.environ.get("LOCAL_EMBEDDING_MAX_WAIT_MS", "5")
+
+try:
+    LOCAL_EMBEDDING_MAX_WAIT_MS = max(float(LOCAL_EMBEDDING_MAX_WAIT_MS), 0.0)
+except Exception:
+    LOCAL_EMBEDDING_MAX_WAIT_MS = 5.0
+
+# ColBERT document token embeddings are cached on disk (under CACHE_DIR),
+# computed at ingestion or on first use instead of on every rerank. Once the
+# cache exceeds COLBERT_TOKEN_CACHE_MAX_SIZE_MB, the least recently used
+# entries are deleted (0 keeps everything)
+ENABLE_COLBERT_TOKEN_CACHE = (
+    os.environ.get("ENABLE_COLBERT_TOKEN_CACHE", "True").lower() == "true"
+)
+
+COLBERT_TOKEN_CACHE_MAX_SIZE_MB = os.environ.get(
+    "COLBERT_TOKEN_CACHE_MAX_SIZE_MB", "2048"
+)
+
+try:
+    COLBERT_TOKEN_CACHE_MAX_SIZE_MB = max(float(COLBERT_TOKEN_CACHE_MAX_SIZE_MB), 0.0)
+except Exception:
+    COLBERT_TOKEN_CACHE_MAX_SIZE_MB = 2048.0
+
+# External reranker requests time out after EXTERNAL_RERANKER_TIMEOUT seconds
+# and are retried with backoff; scores are cached for
+# EXTERNAL_RERANKER_CACHE_TTL seconds (0 disables the cache)
+EXTERNAL_RERANKER_TIMEOUT = os.environ.get("EXTERNAL_RERANKER_TIMEOUT", "10")
+
+try:
+    EXTERNAL_RERANKER_TIMEOUT = float(EXTERNAL_RERANKER_TIMEOUT)
+except Exception:
+    EXTERNAL_RERANKER_TIMEOUT = 10.0
+
+EXTERNAL_RERANKER_MAX_RETRIES = os.environ.get("EXTERNAL_RERANKER_MAX_RETRIES", "2")
+
+try:
+    EXTERNAL_RERANKER_MAX_RETRIES = max(int(EXTERNAL_RERANKER_MAX_RETRIES), 0)
+except Exception:
+    EXTERNAL_RERANKER_MAX_RETRIES = 2
+
+EXTERNAL_RERANKER_CACHE_TTL = os.environ.get("EXTERNAL_RERANKER_CACHE_TTL", "300")
+
+try:
+    EXTERNAL_RERANKER_CACHE_TTL = float(EXTERNAL_RERANKER_CACHE_TTL)
+except Exception:
+    EXTERNAL_RERANKER_CACHE_TTL = 300.0
+
+
+# In-process memory indexes are kept for up to MEMORY_INDEX_MAX_USERS users
+# (least recently used are evicted, 0 disables); users with more than
+# MEMORY_INDEX_MAX_SIZE memories are searched in the vector database
+MEMORY_INDEX_MAX_USERS = os.environ.get("MEMORY_INDEX_MAX_USERS", "1000")
+
+try:
+    MEMORY_INDEX_MAX_USERS = max(int(MEMORY_INDEX_MAX_USERS), 0)
+except Exception:
+    MEMORY_INDEX_MAX_USERS = 1000
+
+MEMORY_INDEX_MAX_SIZE = os.environ.get("MEMORY_INDEX_MAX_SIZE", "512")
+
+try:
+    MEMORY_INDEX_MAX_SIZE = max(int(MEMORY_INDEX_MAX_SIZE), 0)
+except Exception:
+    MEMORY_INDEX_MAX_SIZE = 512
+
 
 ####################################
 # SENTENCE TRANSFORMERS
@@ -560,3 +798,13 @@ PIP_PACKAGE_INDEX_OPTIONS = os.getenv("PIP_PACKAGE_INDEX_OPTIONS", "").split()
 ####################################
 
 EXTERNAL_PWA_MANIFEST_URL = os.environ.get("EXTERNAL_PWA_MANIFEST_URL")
+
+# Full-collection reads (hybrid search, full context, re-adding files to
+# knowledge) stream from the vector database VECTOR_DB_GET_BATCH_SIZE rows
+# at a time instead of loading whole collections in one response
+VECTOR_DB_GET_BATCH_SIZE = os.environ.get("VECTOR_DB_GET_BATCH_SIZE", "1000")
+
+try:
+    VECTOR_DB_GET_BATCH_SIZE = max(int(VECTOR_DB_GET_BATCH_SIZE), 1)
+except Exception:
+    VECTOR_DB_GET_BATCH_SIZE = 1000
@@ -412,6 +412,7 @@ from open_webui.env import (
     ENABLE_OTEL,
     EXTERNAL_PWA_MANIFEST_URL,
     AIOHTTP_CLIENT_SESSION_SSL,
+    TOOL_SERVER_SPEC_REFRESH_INTERVAL,
 )
 
 
@@ -436,6 +437,11 @@ from open_webui.utils.auth import (
     get_verified_user,
 )
 from open_webui.utils.plugin import install_tool_and_function_dependencies
+from open_webui.utils.tools import (
+    periodic_tool_server_refresh,
+    close_tool_server_session,
+)
+from open_webui.routers.pipelines import PIPELINES_CLIENT
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
 
@@ -512,8 +518,14 @@ async def lifespan(app: FastAPI):
 
     asyncio.create_task(periodic_usage_pool_cleanup())
 
+    if TOOL_SERVER_SPEC_REFRESH_INTERVAL > 0:
+        asyncio.create_task(periodic_tool_server_refresh(app))
+
     yield
 
+    await close_tool_server_session()
+    await PIPELINES_CLIENT.close()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -672,6 +684,7 @@ app.state.TOOL_CONTENTS = {}
 
 app.state.FUNCTIONS = {}
 app.state.FUNCTION_CONTENTS = {}
+app.state.FUNCTION_VERSIONS = {}
 
 ########################################
 #
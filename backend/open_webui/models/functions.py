@@ -4,9 +4,15 @@ from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
 from open_webui.models.users import Users
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
+from open_webui.utils.redis import CacheVersion, get_sentinels_from_env
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text
+from sqlalchemy import BigInteger, Boolean, Column, String, Text, func
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -81,6 +87,63 @@ class FunctionValves(BaseModel):
 
 
 class FunctionsTable:
+    def __init__(self):
+        # Bumped on every function change, on all workers, so that function
+        # metadata, valves and loaded modules can be served from memory.
+        self.cache_version = CacheVersion(
+            "functions",
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+            get_fingerprint=self._get_fingerprint,
+        )
+        self._snapshot = None
+
+    def _get_fingerprint(self) -> tuple:
+        # Every write sets updated_at (in seconds) and deletes change the
+        # count. Two writes within the same second may leave both unchanged,
+        # so while the latest write is that recent the fingerprint is made
+        # unique and the cache reloaded on every poll.
+        with get_db() as db:
+            count, updated_at = db.query(
+                func.count(Function.id), func.max(Function.updated_at)
+            ).one()
+
+        now = time.time()
+        if updated_at is not None and updated_at >= int(now) - 1:
+            return (count, updated_at, now)
+        return (count, updated_at)
+
+    def _get_snapshot(self) -> tuple[int, dict, dict]:
+        snapshot = self._snapshot
+        version = self.cache_version.version
+        if snapshot is None or snapshot[0] != version:
+            with get_db() as db:
+                functions = db.query(Function).all()
+                snapshot = (
+                    version,
+                    {
+                        function.id: FunctionModel.model_validate(function)
+                        for function in functions
+                    },
+                    {function.id: function.valves or {} for function in functions},
+                )
+            self._snapshot = snapshot
+        return snapshot
+
+    def get_cached_functions(self) -> list[FunctionModel]:
+        _, functions, _ = self._get_snapshot()
+        return list(functions.values())
+
+    def get_cached_function_by_id(self, id: str) -> Optional[FunctionModel]:
+        _, functions, _ = self._get_snapshot()
+        return functions.get(id)
+
+    def get_cached_function_valves_by_id(self, id: str) -> Optional[dict]:
+        _, _, valves = self._get_snapshot()
+        return valves.get(id)
+
     def insert_new_function(
         self, user_id: str, type: str, form_data: FunctionForm
     ) -> Optional[FunctionModel]:
@@ -100,6 +163,7 @@ class FunctionsTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                self.cache_version.bump()
                 if result:
                     return FunctionModel.model_validate(result)
                 else:
@@ -147,6 +211,7 @@ class FunctionsTable:
                         db.delete(func)
 
                 db.commit()
+                self.cache_version.bump()
 
                 return [
                     FunctionModel.model_validate(func)
@@ -231,6 +296,7 @@ class FunctionsTable:
                 function.updated_at = int(time.time())
                 db.commit()
                 db.refresh(function)
+                self.cache_version.bump()
                 return self.get_function_by_id(id)
             except Exception:
                 return None
@@ -290,6 +356,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                self.cache_version.bump()
                 return self.get_function_by_id(id)
             except Exception:
                 return None
@@ -304,6 +371,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                self.cache_version.bump()
                 return True
             except Exception:
                 return None
@@ -313,6 +381,7 @@ class FunctionsTable:
             try:
                 db.query(Function).filter_by(id=id).delete()
                 db.commit()
+                self.cache_version.bump()
 
                 return True
             except Exception:
@@ -129,13 +129,15 @@ class MessageTable:
                 return None
 
             reactions = self.get_reactions_by_message_id(id)
-            replies = self.get_replies_by_message_id(id)
+            reply_count, latest_reply_at = self.get_reply_stats_by_message_ids(
+                [id]
+            ).get(id, (0, None))
 
             return MessageResponse(
                 **{
                     **MessageModel.model_validate(message).model_dump(),
-                    "latest_reply_at": replies[0].created_at if replies else None,
-                    "reply_count": len(replies),
+                    "latest_reply_at": latest_reply_at,
+                    "reply_count": reply_count,
                     "reactions": reactions,
                 }
             )
@@ -157,18 +159,90 @@ class MessageTable:
                 for message in db.query(Message).filter_by(parent_id=id).all()
             ]
 
-    def get_messages_by_channel_id(
-        self, channel_id: str, skip: int = 0, limit: int = 50
-    ) -> list[MessageModel]:
+    @staticmethod
+    def _created_before(message: Message):
+        # Messages sharing a timestamp are ordered by id
+        return or_(
+            Message.created_at < message.created_at,
+            and_(Message.created_at == message.created_at, Message.id < message.id),
+        )
+
+    @staticmethod
+    def _created_after(message: Message):
+        return or_(
+            Message.created_at > message.created_at,
+            and_(Message.created_at == message.created_at, Message.id > message.id),
+        )
+
+    def get_reply_stats_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, tuple[int, Optional[int]]]:
+        """Reply count and latest reply time of each message, in one query."""
+        if not ids:
+            return {}
+
         with get_db() as db:
-            all_messages = (
-                db.query(Message)
-                .filter_by(channel_id=channel_id, parent_id=None)
-                .order_by(Message.created_at.desc())
-                .offset(skip)
-                .limit(limit)
+            rows = (
+                db.query(
+                    Message.parent_id,
+                    func.count(Message.id),
+                    func.max(Message.created_at),
+                )
+                .filter(Message.parent_id.in_(ids))
+                .group_by(Message.parent_id)
                 .all()
             )
+            return {
+                parent_id: (count, latest_reply_at)
+                for parent_id, count, latest_reply_at in rows
+            }
+
+    def get_messages_by_channel_id(
+        self,
+        channel_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> list[MessageModel]:
+        """
+        Top level messages of a channel, newest first. `before` / `after`
+        are message ids to page from instead of an offset: the `limit`
+        messages older than `before`, or the `limit` messages right after
+        `after`.
+        """
+        with get_db() as db:
+            query = db.query(Message).filter_by(channel_id=channel_id, parent_id=None)
+
+            for cursor_id, older in ((before, True), (after, False)):
+                if cursor_id is None:
+                    continue
+
+                cursor = db.get(Message, cursor_id)
+                if not cursor or cursor.channel_id != channel_id:
+                    return []
+
+                query = query.filter(
+                    self._created_before(cursor)
+                    if older
+                    else self._created_after(cursor)
+                )
+
+            # Without `before`, `after` pages forward: take the oldest
+            # messages past the cursor and return them newest first
+            forward = after is not None and before is None
+            if forward:
+                query = query.order_by(Message.created_at.asc(), Message.id.asc())
+            else:
+                query = query.order_by(Message.created_at.desc(), Message.id.desc())
+
+            if before is None and after is None:
+                query = query.offset(skip)
+
+            all_messages = query.limit(limit).all()
+            if forward:
+                all_messages.reverse()
+
             return [MessageModel.model_validate(message) for message in all_messages]
 
     def get_messages_by_parent_id(
@@ -227,21 +301,39 @@ class MessageTable:
             return MessageReactionModel.model_validate(result) if result else None
 
     def get_reactions_by_message_id(self, id: str) -> list[Reactions]:
+        return self.get_reactions_by_message_ids([id]).get(id, [])
+
+    def get_reactions_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, list[Reactions]]:
+        """Reactions of each message grouped by name, in one query."""
+        if not ids:
+            return {}
+
         with get_db() as db:
-            all_reactions = db.query(MessageReaction).filter_by(message_id=id).all()
+            all_reactions = (
+                db.query(MessageReaction)
+                .filter(MessageReaction.message_id.in_(ids))
+                .order_by(MessageReaction.created_at.asc())
+                .all()
+            )
 
             reactions = {}
             for reaction in all_reactions:
-                if reaction.name not in reactions:
-                    reactions[reaction.name] = {
+                message_reactions = reactions.setdefault(reaction.message_id, {})
+                if reaction.name not in message_reactions:
+                    message_reactions[reaction.name] = {
                         "name": reaction.name,
                         "user_ids": [],
                         "count": 0,
                     }
-                reactions[reaction.name]["user_ids"].append(reaction.user_id)
-                reactions[reaction.name]["count"] += 1
+                message_reactions[reaction.name]["user_ids"].append(reaction.user_id)
+                message_reactions[reaction.name]["count"] += 1
 
-            return [Reactions(**reaction) for reaction in reactions.values()]
+            return {
+                message_id: [Reactions(**reaction) for reaction in by_name.values()]
+                for message_id, by_name in reactions.items()
+            }
 
     def remove_reaction_by_id_and_user_id_and_name(
         self, id: str, user_id: str, name: str
@@ -0,0 +1,277 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, Union
+
+import numpy as np
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    LOCAL_EMBEDDING_MAX_BATCH_SIZE,
+    LOCAL_EMBEDDING_MAX_WAIT_MS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class EmbeddingRequest:
+    def __init__(self, model, texts: list[str], prompt: Optional[str]):
+        self.model = model
+        self.texts = texts
+        self.prompt = prompt
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class LocalEmbeddingService:
+    """
+    Runs every local SentenceTransformer encode of the process on a single
+    worker thread, so one model copy serves all request threads.
+
+    Calls made while the worker is busy queue up; the worker takes the first
+    one, waits up to `max_wait_ms` for more to arrive (or until
+    `max_batch_size` texts are collected) and encodes them in one forward
+    pass per model and prompt, which is much cheaper than encoding each call
+    on its own.
+
+    Calls with more than `max_batch_size` texts (document ingestion) are
+    split into slices of `max_batch_size` texts on a separate bulk lane.
+    When both lanes have work the worker alternates between them, so a
+    query arriving during a large ingestion waits for one slice at most
+    rather than for the whole request.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue: deque[EmbeddingRequest] = deque()
+        self.bulk_queue: deque[EmbeddingRequest] = deque()
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.max_batch_texts = 0
+        self.encode_seconds = 0.0
+        self.latencies = deque(maxlen=1000)
+
+    def _ensure_started(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name="local-embedding", daemon=True
+                )
+                self.thread.start()
+
+    def encode(
+        self,
+        model,
+        texts: Union[str, list[str]],
+        prompt: Optional[str] = None,
+        as_array: bool = False,
+    ) -> Union[list[float], list[list[float]], np.ndarray]:
+        """
+        Embed one text or a list of texts. With `as_array`, the float32
+        array rows of the batch are returned without conversion to lists.
+        """
+        single = isinstance(texts, str)
+        request = EmbeddingRequest(model, [texts] if single else list(texts), prompt)
+
+        if not request.texts:
+            return np.empty((0, 0), dtype=np.float32) if as_array else []
+
+        if threading.current_thread() is self.thread:
+            # Never wait on our own queue
+            self._process([request])
+            embeddings = request.future.result()
+        elif len(request.texts) > self.max_batch_size:
+            slices = [
+                EmbeddingRequest(
+                    model, request.texts[i : i + self.max_batch_size], prompt
+                )
+                for i in range(0, len(request.texts), self.max_batch_size)
+            ]
+            self._put(self.bulk_queue, slices)
+            embeddings = np.concatenate([part.future.result() for part in slices])
+        else:
+            self._put(self.queue, [request])
+            embeddings = request.future.result()
+
+        if not as_array:
+            embeddings = embeddings.tolist()
+        return embeddings[0] if single else embeddings
+
+    def _put(self, lane: deque, requests: list[EmbeddingRequest]):
+        self._ensure_started()
+        with self.condition:
+            lane.extend(requests)
+            self.condition.notify()
+
+    def _next_batch(self, bulk_turn: bool) -> tuple[list[EmbeddingRequest], bool]:
+        with self.condition:
+            while not self.queue and not self.bulk_queue:
+                self.condition.wait()
+
+            if self.bulk_queue and (bulk_turn or not self.queue):
+                return [self.bulk_queue.popleft()], True
+
+            batch = [self.queue.popleft()]
+            size = len(batch[0].texts)
+            deadline = time.perf_counter() + self.max_wait
+
+            while size < self.max_batch_size:
+                if self.queue:
+                    request = self.queue.popleft()
+                    batch.append(request)
+                    size += len(request.texts)
+                    continue
+
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                self.condition.wait(timeout)
+
+            return batch, False
+
+    def _run(self):
+        bulk = False
+        while True:
+            # Alternate lanes while both have work, so neither one starves
+            batch, bulk = self._next_batch(bulk_turn=not bulk)
+
+            try:
+                self._process(batch)
+            except Exception as e:
+                log.exception(f"Error in local embedding worker: {e}")
+
+    def _process(self, batch: list[EmbeddingRequest]):
+        groups: dict[tuple, list[EmbeddingRequest]] = {}
+        for request in batch:
+            groups.setdefault((id(request.model), request.prompt), []).append(request)
+
+        for (_, prompt), requests in groups.items():
+            texts = [text for request in requests for text in request.texts]
+            start = time.perf_counter()
+            try:
+                embeddings = requests[0].model.encode(
+                    texts, **({"prompt": prompt} if prompt else {})
+                )
+                embeddings = np.asarray(embeddings, dtype=np.float32)
+            except Exception as e:
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            offset = 0
+            for request in requests:
+                request.future.set_result(
+                    embeddings[offset : offset + len(request.texts)]
+                )
+                offset += len(request.texts)
+
+            with self.lock:
+                self.requests += len(requests)
+                self.texts += len(texts)
+                self.batches += 1
+                self.max_batch_texts = max(self.max_batch_texts, len(texts))
+                self.encode_seconds += finished - start
+                self.latencies.extend(
+                    finished - request.enqueued_at for request in requests
+                )
+
+    def metrics(self) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+
+            def percentile(p):
+                if not latencies:
+                    return None
+                return round(latencies[int(p * (len(latencies) - 1))] * 1000, 2)
+
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queued": len(self.queue),
+                "queued_bulk": len(self.bulk_queue),
+                "requests": self.requests,
+                "texts": self.texts,
+                "batches": self.batches,
+                "avg_batch_texts": (
+                    round(self.texts / self.batches, 2) if self.batches else None
+                ),
+                "max_batch_texts": self.max_batch_texts,
+                "texts_per_second": (
+                    round(self.texts / self.encode_seconds, 2)
+                    if self.encode_seconds
+                    else None
+                ),
+                "latency_p50_ms": percentile(0.5),
+                "latency_p95_ms": percentile(0.95),
+                "latency_max_ms": percentile(1.0),
+            }
+
+
+LOCAL_EMBEDDING_SERVICE = LocalEmbeddingService(
+    LOCAL_EMBEDDING_MAX_BATCH_SIZE, LOCAL_EMBEDDING_MAX_WAIT_MS
+)
+
+
+def create_embedding_server_app(model_name: str):
+    """
+    Standalone, OpenAI compatible embedding server around one local model,
+    so that several Open WebUI workers or replicas can share a single model
+    copy by using the "openai" embedding engine pointed at it.
+    """
+    from fastapi import FastAPI
+    from pydantic import BaseModel
+    from sentence_transformers import SentenceTransformer
+    from starlette.concurrency import run_in_threadpool
+
+    from open_webui.env import (
+        DEVICE_TYPE,
+        SENTENCE_TRANSFORMERS_BACKEND,
+        SENTENCE_TRANSFORMERS_MODEL_KWARGS,
+    )
+
+    model = SentenceTransformer(
+        model_name,
+        device=DEVICE_TYPE,
+        backend=SENTENCE_TRANSFORMERS_BACKEND,
+        model_kwargs=SENTENCE_TRANSFORMERS_MODEL_KWARGS,
+    )
+
+    class EmbeddingsForm(BaseModel):
+        input: Union[str, list[str]]
+        model: Optional[str] = None
+        prompt: Optional[str] = None
+
+    app = FastAPI()
+
+    @app.post("/v1/embeddings")
+    async def embeddings(form_data: EmbeddingsForm):
+        texts = (
+            [form_data.input] if isinstance(form_data.input, str) else form_data.input
+        )
+        embeddings = await run_in_threadpool(
+            LOCAL_EMBEDDING_SERVICE.encode, model, texts, form_data.prompt
+        )
+        return {
+            "object": "list",
+            "model": model_name,
+            "data": [
+                {"object": "embedding", "index": idx, "embedding": embedding}
+                for idx, embedding in enumerate(embeddings)
+            ],
+        }
+
+    @app.get("/metrics")
+    async def metrics():
+        return LOCAL_EMBEDDING_SERVICE.metrics()
+
+    return app
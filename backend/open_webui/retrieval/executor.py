@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    RETRIEVAL_EXECUTOR_MAX_WORKERS,
+    RETRIEVAL_EXECUTOR_MAX_QUEUE,
+    RETRIEVAL_QUERY_EXECUTOR_MAX_WORKERS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class RetrievalQueueFullError(Exception):
+    pass
+
+
+class RetrievalExecutor:
+    """
+    Process-wide, fixed size thread pool for blocking retrieval work.
+
+    `max_queue` bounds the number of jobs waiting for a worker. Once it is
+    reached, `run()` rejects new jobs with RetrievalQueueFullError, while
+    `submit()` runs them in the calling thread instead, which throttles the
+    submitter without failing it (caller-runs policy).
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int = 0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"retrieval-{name}"
+        )
+
+        self.lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.inline = 0
+        self.max_queued = 0
+
+    def _admit(self) -> bool:
+        with self.lock:
+            if self.max_queue and self.queued >= self.max_queue:
+                return False
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            return True
+
+    def _wrap(self, fn: Callable, *args, **kwargs):
+        def job():
+            with self.lock:
+                self.queued -= 1
+                self.active += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        return job
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        if self._admit():
+            return self.executor.submit(self._wrap(fn, *args, **kwargs))
+
+        with self.lock:
+            self.inline += 1
+
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        if not self._admit():
+            with self.lock:
+                self.rejected += 1
+            log.warning(
+                f"Retrieval executor {self.name} is saturated "
+                f"({self.queued} queued), rejecting job"
+            )
+            raise RetrievalQueueFullError(
+                "Retrieval is overloaded, please try again later"
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self._wrap(fn, *args, **kwargs)
+        )
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "inline": self.inline,
+            }
+
+
+# Request level retrieval (get_sources_from_files) and the per collection /
+# per query fan-out inside it use separate pools, so that requests holding
+# every worker can never wait on fan-out jobs queued behind them
+RETRIEVAL_EXECUTOR = RetrievalExecutor(
+    "request", RETRIEVAL_EXECUTOR_MAX_WORKERS, RETRIEVAL_EXECUTOR_MAX_QUEUE
+)
+RETRIEVAL_QUERY_EXECUTOR = RetrievalExecutor(
+    "query",
+    RETRIEVAL_QUERY_EXECUTOR_MAX_WORKERS,
+    RETRIEVAL_QUERY_EXECUTOR_MAX_WORKERS * 4,
+)
+
+
+def get_retrieval_executor_metrics() -> dict:
+    return {
+        executor.name: executor.metrics()
+        for executor in (RETRIEVAL_EXECUTOR, RETRIEVAL_QUERY_EXECUTOR)
+    }
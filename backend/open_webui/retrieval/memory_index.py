@@ -0,0 +1,265 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+from open_webui.models.memories import MemoryModel
+from open_webui.retrieval.vector.main import GetResult, SearchResult
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    MEMORY_INDEX_MAX_USERS,
+    MEMORY_INDEX_MAX_SIZE,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class UserMemoryIndex:
+    """
+    Normalised float32 embedding matrix of one user's memories, row i
+    belonging to ids[i]. Reads and writes hold `lock`, as indexes are
+    reconciled in worker threads.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.ids: list[str] = []
+        self.contents: list[str] = []
+        self.metadatas: list[dict] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.lock = threading.RLock()
+
+    def upsert(self, memory: MemoryModel, vector: list[float]):
+        self.upsert_many([memory], [vector])
+
+    def upsert_many(self, memories: list[MemoryModel], vectors: list[list[float]]):
+        if not memories:
+            return
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(memories):
+            raise ValueError("Expected one embedding per memory")
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        with self.lock:
+            if self.matrix.size and self.matrix.shape[1] != matrix.shape[1]:
+                raise ValueError("Embedding dimension changed")
+
+            positions = {id: idx for idx, id in enumerate(self.ids)}
+            new_rows = []
+            for row, memory in enumerate(memories):
+                metadata = {
+                    "created_at": memory.created_at,
+                    "updated_at": memory.updated_at,
+                }
+
+                if memory.id in positions:
+                    idx = positions[memory.id]
+                    self.contents[idx] = memory.content
+                    self.metadatas[idx] = metadata
+                    self.matrix[idx] = matrix[row]
+                    continue
+
+                positions[memory.id] = len(self.ids)
+                self.ids.append(memory.id)
+                self.contents.append(memory.content)
+                self.metadatas.append(metadata)
+                new_rows.append(row)
+
+            # New rows are appended with a single copy of the matrix
+            if new_rows:
+                self.matrix = (
+                    np.vstack([self.matrix, matrix[new_rows]])
+                    if self.matrix.size
+                    else matrix[new_rows]
+                )
+
+    def delete(self, ids: list[str]):
+        ids = set(ids)
+        with self.lock:
+            keep = [idx for idx, id in enumerate(self.ids) if id not in ids]
+            self.ids = [self.ids[idx] for idx in keep]
+            self.contents = [self.contents[idx] for idx in keep]
+            self.metadatas = [self.metadatas[idx] for idx in keep]
+            self.matrix = self.matrix[keep] if keep else np.zeros((0, 0), np.float32)
+
+    def search(self, vector: list[float], k: int) -> SearchResult:
+        with self.lock:
+            return self._search(vector, k)
+
+    def _search(self, vector: list[float], k: int) -> SearchResult:
+        if not self.ids or k < 1:
+            return SearchResult(
+                ids=[[]], documents=[[]], metadatas=[[]], distances=[[]]
+            )
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = self.matrix @ query
+
+        k = min(k, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return SearchResult(
+            ids=[[self.ids[idx] for idx in top]],
+            documents=[[self.contents[idx] for idx in top]],
+            metadatas=[[self.metadatas[idx] for idx in top]],
+            # Cosine similarity mapped to [0, 1], higher is closer
+            distances=[[float((scores[idx] + 1) / 2) for idx in top]],
+        )
+
+
+class MemoryIndex:
+    """
+    In-process cache of per-user memory indexes, evicting the least
+    recently used users beyond MEMORY_INDEX_MAX_USERS.
+
+    The database stays the source of truth: before every search the cached
+    index is reconciled with the user's memories, so memories written by
+    other workers are embedded on demand (only the new or changed ones) and
+    deleted ones are dropped. A new index is seeded with the vectors stored
+    in the vector database, so a cold start only embeds the memories that
+    are missing there or whose text changed. Users with more than
+    MEMORY_INDEX_MAX_SIZE memories are not cached and keep using the vector
+    database.
+    """
+
+    def __init__(self, max_users: int, max_size: int):
+        self.max_users = max_users
+        self.max_size = max_size
+        self.indexes: OrderedDict[str, UserMemoryIndex] = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_users > 0
+
+    def _get(self, user_id: str, model: str) -> Optional[UserMemoryIndex]:
+        with self.lock:
+            index = self.indexes.get(user_id)
+            if index is None:
+                return None
+            if index.model != model:
+                del self.indexes[user_id]
+                return None
+            self.indexes.move_to_end(user_id)
+            return index
+
+    def _put(self, user_id: str, index: UserMemoryIndex):
+        with self.lock:
+            self.indexes[user_id] = index
+            self.indexes.move_to_end(user_id)
+            while len(self.indexes) > self.max_users:
+                self.indexes.popitem(last=False)
+
+    def upsert(self, user_id: str, model: str, memory: MemoryModel, vector):
+        """
+        Keep an already cached index in sync with a write on this worker.
+        """
+        if index := self._get(user_id, model):
+            try:
+                index.upsert(memory, vector)
+            except Exception as e:
+                log.debug(f"Dropping memory index of {user_id}: {e}")
+                self.invalidate(user_id)
+
+    def delete(self, user_id: str, ids: list[str]):
+        with self.lock:
+            index = self.indexes.get(user_id)
+        if index:
+            index.delete(ids)
+
+    def invalidate(self, user_id: str):
+        with self.lock:
+            self.indexes.pop(user_id, None)
+
+    def get(
+        self,
+        user_id: str,
+        model: str,
+        memories: list[MemoryModel],
+        embedding_function: Callable,
+        get_stored: Optional[Callable[[], Optional[GetResult]]] = None,
+    ) -> Optional[UserMemoryIndex]:
+        """
+        Return the user's index reconciled with `memories`, or None when the
+        user is not served from the in-process index. `get_stored` returns
+        the user's memory collection with its vectors and is only called
+        to seed a new index. Blocking, run it in a worker thread.
+        """
+        if not self.enabled or len(memories) > self.max_size:
+            self.invalidate(user_id)
+            return None
+
+        index = self._get(user_id, model)
+
+        try:
+            if index is None:
+                index = UserMemoryIndex(model)
+                if get_stored is not None:
+                    self._seed(index, memories, get_stored)
+
+            with index.lock:
+                current = {memory.id for memory in memories}
+                stale = [id for id in index.ids if id not in current]
+                if stale:
+                    index.delete(stale)
+
+                cached = dict(zip(index.ids, index.contents))
+                changed = [
+                    memory
+                    for memory in memories
+                    if cached.get(memory.id) != memory.content
+                ]
+                if changed:
+                    index.upsert_many(
+                        changed,
+                        embedding_function([memory.content for memory in changed]),
+                    )
+        except Exception as e:
+            log.exception(f"Error building memory index of {user_id}: {e}")
+            self.invalidate(user_id)
+            return None
+
+        self._put(user_id, index)
+        return index
+
+    @staticmethod
+    def _seed(
+        index: UserMemoryIndex,
+        memories: list[MemoryModel],
+        get_stored: Callable[[], Optional[GetResult]],
+    ):
+        try:
+            result = get_stored()
+        except Exception as e:
+            log.debug(f"Could not load stored memory vectors: {e}")
+            return
+
+        if not result or not result.ids or not result.vectors:
+            return
+
+        by_id = {memory.id: memory for memory in memories}
+        seeded, vectors = [], []
+        for id, document, vector in zip(
+            result.ids[0], result.documents[0], result.vectors[0]
+        ):
+            memory = by_id.get(id)
+            # Memories edited since they were stored are embedded again
+            if memory is not None and vector is not None and document == memory.content:
+                seeded.append(memory)
+                vectors.append(vector)
+
+        index.upsert_many(seeded, vectors)
+
+
+MEMORY_INDEX = MemoryIndex(MEMORY_INDEX_MAX_USERS, MEMORY_INDEX_MAX_SIZE)
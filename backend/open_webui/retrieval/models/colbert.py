@@ -1,7 +1,11 @@
 import os
+import hashlib
 import logging
+import threading
 import torch
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
 from colbert.infra import ColBERTConfig
 from colbert.modeling.checkpoint import Checkpoint
 
@@ -15,7 +19,7 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 class ColBERT(BaseReranker):
     def __init__(self, name, **kwargs) -> None:
-        log.info("ColBERT: Loading model", name)
+        log.info(f"ColBERT: Loading model {name}")
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
 
         DOCKER = kwargs.get("env") == "docker"
@@ -35,7 +39,26 @@ class ColBERT(BaseReranker):
             name,
             colbert_config=ColBERTConfig(model_name=name),
         ).to(self.device)
-        pass
+
+        # Document token embeddings only depend on the document text, so they
+        # are stored as float16 .npy files keyed by the chunk hash and only
+        # computed once per model. Reads refresh the mtime of an entry, and
+        # once the model's cache exceeds `cache_max_size` bytes the entries
+        # with the oldest mtime are deleted
+        self.cache_dir = None
+        cache_dir = kwargs.get("cache_dir")
+        if cache_dir:
+            model_hash = hashlib.sha256(name.encode()).hexdigest()[:16]
+            self.cache_dir = os.path.join(cache_dir, model_hash)
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self.cache_max_size = kwargs.get("cache_max_size") or 0
+        self._cache_size = None
+        self._cache_lock = threading.Lock()
+
+        # Ingestion pre-computes document embeddings here, one job at a time
+        self._cache_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="colbert-cache"
+        )
 
     def calculate_similarity_scores(self, query_embeddings, document_embeddings):
 
@@ -70,13 +93,151 @@ class ColBERT(BaseReranker):
 
         return normalized_scores.detach().cpu().numpy().astype(np.float32)
 
+    def _cache_path(self, doc_hash: str) -> str:
+        return os.path.join(self.cache_dir, doc_hash[:2], f"{doc_hash}.npy")
+
+    def _load_document_embedding(self, doc_hash: str):
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(doc_hash)
+        try:
+            embedding = torch.from_numpy(np.load(path))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.debug(f"ColBERT: ignoring unreadable cache entry {doc_hash}: {e}")
+            return None
+
+        if self.cache_max_size:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return embedding
+
+    def _store_document_embedding(self, doc_hash: str, embedding):
+        if not self.cache_dir:
+            return
+        path = self._cache_path(doc_hash)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.save(f, embedding.numpy())
+            os.replace(tmp_path, path)
+            if self.cache_max_size:
+                self._add_cache_size(os.path.getsize(path))
+        except Exception as e:
+            log.debug(f"ColBERT: failed to cache {doc_hash}: {e}")
+
+    def _scan_cache(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for file_name in files:
+                if not file_name.endswith(".npy"):
+                    continue
+                path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _add_cache_size(self, size: int):
+        # The running total is only an estimate when several processes share
+        # the cache directory; pruning rescans it
+        with self._cache_lock:
+            if self._cache_size is None:
+                self._cache_size = sum(entry[1] for entry in self._scan_cache())
+            else:
+                self._cache_size += size
+
+            if self._cache_size > self.cache_max_size:
+                self._prune_cache()
+
+    def _prune_cache(self):
+        """
+        Delete the least recently used entries until the cache is back under
+        90% of `cache_max_size`, so that pruning does not run on every store.
+        """
+        entries = sorted(self._scan_cache())
+        size = sum(entry[1] for entry in entries)
+        target = self.cache_max_size * 0.9
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            removed += 1
+
+        self._cache_size = size
+        log.debug(f"ColBERT: pruned {removed} cache entries, {size} bytes left")
+
+    def get_document_embeddings(self, docs: list[str]) -> list:
+        """
+        Token embeddings (tokens x dim, float16, without padding) of each
+        document, read from the cache where possible; the others are encoded
+        in one docFromText call and added to the cache.
+        """
+        hashes = [hashlib.sha256(doc.encode()).hexdigest() for doc in docs]
+        embeddings = [self._load_document_embedding(h) for h in hashes]
+
+        missing = list(
+            dict.fromkeys(h for h, e in zip(hashes, embeddings) if e is None)
+        )
+        if missing:
+            texts = {h: doc for h, doc in zip(hashes, docs)}
+            encoded = self.ckpt.docFromText([texts[h] for h in missing], bsize=32)[0]
+            encoded = encoded.detach().cpu().to(torch.float16)
+
+            computed = {}
+            for doc_hash, embedding in zip(missing, encoded):
+                # Strip the zero padding docFromText adds up to the longest document
+                embedding = embedding[embedding.abs().sum(dim=1) > 0].contiguous()
+                computed[doc_hash] = embedding
+                self._store_document_embedding(doc_hash, embedding)
+
+            embeddings = [
+                e if e is not None else computed[h] for h, e in zip(hashes, embeddings)
+            ]
+
+        return embeddings
+
+    def _cache_documents(self, docs: list[str], batch_size: int):
+        try:
+            for i in range(0, len(docs), batch_size):
+                self.get_document_embeddings(docs[i : i + batch_size])
+        except Exception as e:
+            log.warning(f"ColBERT: failed to cache document embeddings: {e}")
+
+    def cache_documents(
+        self, docs: list[str], batch_size: int = 256
+    ) -> Optional[Future]:
+        """
+        Pre-compute the token embeddings of documents, e.g. at ingestion, on
+        a background thread so that the caller does not wait for the forward
+        passes. Returns the Future of the job, or None without a cache.
+        """
+        if not self.cache_dir or not docs:
+            return None
+        return self._cache_executor.submit(
+            self._cache_documents, list(docs), batch_size
+        )
+
     def predict(self, sentences):
 
         query = sentences[0][0]
         docs = [i[1] for i in sentences]
 
-        # Embedding the documents
-        embedded_docs = self.ckpt.docFromText(docs, bsize=32)[0]
+        # Embedding the documents, padded back to the longest one
+        embedded_docs = torch.nn.utils.rnn.pad_sequence(
+            self.get_document_embeddings(docs), batch_first=True
+        ).to(torch.float32)
         # Embedding the queries
         embedded_queries = self.ckpt.queryFromText([query], bsize=32)
         embedded_query = embedded_queries[0]
@@ -1,14 +1,67 @@
+import hashlib
 import logging
-import requests
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional, List, Tuple
 
-from open_webui.env import SRC_LOG_LEVELS
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    EXTERNAL_RERANKER_TIMEOUT,
+    EXTERNAL_RERANKER_MAX_RETRIES,
+    EXTERNAL_RERANKER_CACHE_TTL,
+    RETRIEVAL_QUERY_EXECUTOR_MAX_WORKERS,
+)
+from open_webui.retrieval.executor import RETRIEVAL_QUERY_EXECUTOR
 from open_webui.retrieval.models.base_reranker import BaseReranker
 
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
+SCORE_CACHE_SIZE = 10000
+
+
+class RerankScoreCache:
+    """Short lived LRU of relevance scores keyed by (model, query, doc hash)."""
+
+    def __init__(self, ttl: float, max_size: int = SCORE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.scores: OrderedDict[tuple, tuple[float, float]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, query: str, doc: str) -> tuple:
+        return (model, query, hashlib.sha256(doc.encode()).hexdigest())
+
+    def get(self, key: tuple) -> Optional[float]:
+        if self.ttl <= 0:
+            return None
+        with self.lock:
+            entry = self.scores.get(key)
+            if entry is None:
+                return None
+            score, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.scores[key]
+                return None
+            self.scores.move_to_end(key)
+            return score
+
+    def set(self, key: tuple, score: float):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.scores[key] = (score, time.monotonic() + self.ttl)
+            self.scores.move_to_end(key)
+            while len(self.scores) > self.max_size:
+                self.scores.popitem(last=False)
+
 
 class ExternalReranker(BaseReranker):
     def __init__(
@@ -21,10 +74,31 @@ class ExternalReranker(BaseReranker):
         self.url = url
         self.model = model
 
-    def predict(self, sentences: List[Tuple[str, str]]) -> Optional[List[float]]:
-        query = sentences[0][0]
-        docs = [i[1] for i in sentences]
+        # One pooled session per reranker, retrying connection errors and
+        # transient statuses with exponential backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_maxsize=RETRIEVAL_QUERY_EXECUTOR_MAX_WORKERS,
+            max_retries=Retry(
+                total=EXTERNAL_RERANKER_MAX_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["POST"],
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            }
+        )
+
+        self.cache = RerankScoreCache(EXTERNAL_RERANKER_CACHE_TTL)
 
+    def _rerank(self, query: str, docs: List[str]) -> List[float]:
         payload = {
             "model": self.model,
             "query": query,
@@ -32,29 +106,60 @@ class ExternalReranker(BaseReranker):
             "top_n": len(docs),
         }
 
+        log.info(f"ExternalReranker:predict:model {self.model}")
+        log.info(f"ExternalReranker:predict:query {query}")
+
+        r = self.session.post(
+            f"{self.url}", json=payload, timeout=EXTERNAL_RERANKER_TIMEOUT
+        )
+        r.raise_for_status()
+        data = r.json()
+
+        if "results" not in data:
+            raise Exception("No results found in external reranking response")
+
+        sorted_results = sorted(data["results"], key=lambda x: x["index"])
+        return [result["relevance_score"] for result in sorted_results]
+
+    def predict_pairs(self, sentences: List[Tuple[str, str]]) -> Optional[List[float]]:
+        """
+        Score (query, document) pairs of any number of queries: cached
+        scores are reused, documents are deduplicated per query and each
+        query is sent in one request, all queries concurrently.
+        """
+        keys = [self.cache.key(self.model, query, doc) for query, doc in sentences]
+        scores = {key: self.cache.get(key) for key in keys}
+
+        pending: dict[str, dict[tuple, str]] = {}
+        for key, (query, doc) in zip(keys, sentences):
+            if scores[key] is None:
+                pending.setdefault(query, {})[key] = doc
+
         try:
-            log.info(f"ExternalReranker:predict:model {self.model}")
-            log.info(f"ExternalReranker:predict:query {query}")
-
-            r = requests.post(
-                f"{self.url}",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}",
-                },
-                json=payload,
-            )
-
-            r.raise_for_status()
-            data = r.json()
-
-            if "results" in data:
-                sorted_results = sorted(data["results"], key=lambda x: x["index"])
-                return [result["relevance_score"] for result in sorted_results]
+            if len(pending) == 1:
+                [(query, docs)] = pending.items()
+                results = [(docs, self._rerank(query, list(docs.values())))]
             else:
-                log.error("No results found in external reranking response")
-                return None
+                futures = [
+                    (
+                        docs,
+                        RETRIEVAL_QUERY_EXECUTOR.submit(
+                            self._rerank, query, list(docs.values())
+                        ),
+                    )
+                    for query, docs in pending.items()
+                ]
+                results = [(docs, future.result()) for docs, future in futures]
 
+            for docs, doc_scores in results:
+                for key, score in zip(docs.keys(), doc_scores):
+                    scores[key] = score
+                    self.cache.set(key, score)
         except Exception as e:
             log.exception(f"Error in external reranking: {e}")
             return None
+
+        return [scores[key] for key in keys]
+
+    def predict(self, sentences: List[Tuple[str, str]]) -> Optional[List[float]]:
+        return self.predict_pairs(sentences)
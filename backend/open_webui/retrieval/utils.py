@@ -1,30 +1,39 @@
 import logging
+import operator
 import os
+import json
 from typing import Optional, Union
 
+import numpy as np
+
 import requests
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
 import time
 
 from huggingface_hub import snapshot_download
-from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
+from langchain.retrievers import EnsembleRetriever
 from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.executor import RETRIEVAL_QUERY_EXECUTOR
+from open_webui.retrieval.embedding_service import LOCAL_EMBEDDING_SERVICE
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
 
 from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.models.base_reranker import BaseReranker
+from open_webui.retrieval.models.external import ExternalReranker
 
 
 from open_webui.env import (
     SRC_LOG_LEVELS,
     OFFLINE_MODE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    RAG_RERANKING_BATCH_SIZE,
+    ENABLE_LOCAL_EMBEDDING_BATCHING,
 )
 from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
@@ -46,6 +55,7 @@ class VectorSearchRetriever(BaseRetriever):
     collection_name: Any
     embedding_function: Any
     top_k: int
+    query_embedding: Optional[list[float]] = None
 
     def _get_relevant_documents(
         self,
@@ -53,9 +63,13 @@ class VectorSearchRetriever(BaseRetriever):
         *,
         run_manager: CallbackManagerForRetrieverRun,
     ) -> list[Document]:
+        query_embedding = self.query_embedding
+        if query_embedding is None:
+            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
+
         result = VECTOR_DB_CLIENT.search(
             collection_name=self.collection_name,
-            vectors=[self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)],
+            vectors=[query_embedding],
             limit=self.top_k,
         )
 
@@ -67,6 +81,7 @@ class VectorSearchRetriever(BaseRetriever):
         for idx in range(len(ids)):
             results.append(
                 Document(
+                    id=ids[idx],
                     metadata=metadatas[idx],
                     page_content=documents[idx],
                 )
@@ -94,13 +109,29 @@ def query_doc(
         raise e
 
 
+def get_collection_result(collection_name: str) -> Optional[GetResult]:
+    """
+    Read a whole collection, batch by batch, with VECTOR_DB_CLIENT.get_batches.
+    """
+    ids, documents, metadatas = [], [], []
+    for batch in VECTOR_DB_CLIENT.get_batches(collection_name=collection_name):
+        ids.extend(batch.ids[0])
+        documents.extend(batch.documents[0])
+        metadatas.extend(batch.metadatas[0])
+
+    if not ids:
+        return None
+
+    return GetResult(ids=[ids], documents=[documents], metadatas=[metadatas])
+
+
 def get_doc(collection_name: str, user: UserModel = None):
     try:
         log.debug(f"get_doc:doc {collection_name}")
-        result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+        result = get_collection_result(collection_name=collection_name)
 
         if result:
-            log.info(f"query_doc:result {result.ids} {result.metadatas}")
+            log.info(f"get_doc:result {collection_name} {len(result.ids[0])} items")
 
         return result
     except Exception as e:
@@ -108,6 +139,184 @@ def get_doc(collection_name: str, user: UserModel = None):
         raise e
 
 
+def get_hybrid_search_candidates(
+    collection_name: str,
+    collection_result: GetResult,
+    query: str,
+    embedding_function,
+    k: int,
+    hybrid_bm25_weight: float,
+    query_embedding: Optional[list[float]] = None,
+) -> list[Document]:
+    bm25_retriever = BM25Retriever.from_texts(
+        texts=collection_result.documents[0],
+        metadatas=collection_result.metadatas[0],
+        ids=collection_result.ids[0],
+    )
+    bm25_retriever.k = k
+
+    vector_search_retriever = VectorSearchRetriever(
+        collection_name=collection_name,
+        embedding_function=embedding_function,
+        top_k=k,
+        query_embedding=query_embedding,
+    )
+
+    if hybrid_bm25_weight <= 0:
+        ensemble_retriever = EnsembleRetriever(
+            retrievers=[vector_search_retriever], weights=[1.0]
+        )
+    elif hybrid_bm25_weight >= 1:
+        ensemble_retriever = EnsembleRetriever(
+            retrievers=[bm25_retriever], weights=[1.0]
+        )
+    else:
+        ensemble_retriever = EnsembleRetriever(
+            retrievers=[bm25_retriever, vector_search_retriever],
+            weights=[hybrid_bm25_weight, 1.0 - hybrid_bm25_weight],
+        )
+
+    return ensemble_retriever.invoke(query)
+
+
+def rerank_pairs(
+    reranking_function,
+    pairs: list[tuple[str, str]],
+    groups: list[list[int]],
+    batch_size: int = RAG_RERANKING_BATCH_SIZE,
+) -> list[float]:
+    """
+    Score (query, document) pairs with the reranking model.
+
+    Cross-encoders score every pair in one call, `batch_size` pairs per
+    forward pass, and the external reranker sends one request per query.
+    Other rerankers implementing BaseReranker (ColBERT) take a single query
+    per call and normalise over the documents they are given, so they are
+    called once per group of pair indexes instead.
+    """
+    if not pairs:
+        return []
+
+    if isinstance(reranking_function, ExternalReranker):
+        scores = reranking_function.predict_pairs(pairs)
+        if scores is None:
+            raise Exception("Reranking failed")
+        return [float(score) for score in scores]
+
+    if isinstance(reranking_function, BaseReranker):
+        scores = [0.0] * len(pairs)
+        for group in groups:
+            if not group:
+                continue
+            group_scores = reranking_function.predict([pairs[idx] for idx in group])
+            if group_scores is None:
+                raise Exception("Reranking failed")
+            for idx, score in zip(group, group_scores):
+                scores[idx] = float(score)
+        return scores
+
+    # Identical pairs (e.g. the same chunk found for the same query in two
+    # collections) are only scored once
+    unique_pairs = list(dict.fromkeys(pairs))
+    unique_scores = reranking_function.predict(unique_pairs, batch_size=batch_size)
+    scores = dict(zip(unique_pairs, (float(score) for score in unique_scores)))
+    return [scores[pair] for pair in pairs]
+
+
+def get_vector_similarity_scores(
+    candidates: list[tuple[str, str, list[Document]]],
+    query_embeddings: dict[str, list[float]],
+    embedding_function,
+) -> list[list[float]]:
+    """
+    Cosine similarity of every candidate to its query, computed with one
+    matrix multiply. The stored vectors of the candidates are read by id, one
+    call per collection; candidates the vector database has no vector for
+    (BM25 hits on backends without lookups by id) are embedded in one batch.
+    """
+    candidate_ids = {}
+    for collection_name, _, documents in candidates:
+        ids = candidate_ids.setdefault(collection_name, {})
+        ids.update((doc.id, None) for doc in documents if doc.id)
+
+    stored_vectors = {}
+    for collection_name, ids in candidate_ids.items():
+        try:
+            stored_vectors[collection_name] = VECTOR_DB_CLIENT.get_vectors(
+                collection_name=collection_name, ids=list(ids)
+            )
+        except Exception as e:
+            log.exception(f"Failed to read vectors of {collection_name}: {e}")
+
+    rows = {}
+    vectors = []
+    missing = []
+    candidate_rows = []
+    for collection_name, _, documents in candidates:
+        collection_vectors = stored_vectors.get(collection_name, {})
+        task_rows = []
+        for doc in documents:
+            key = (collection_name, doc.id or doc.page_content)
+            if key not in rows:
+                rows[key] = len(vectors)
+                vector = collection_vectors.get(doc.id)
+                if vector is None:
+                    missing.append((rows[key], doc.page_content))
+                vectors.append(vector)
+            task_rows.append(rows[key])
+        candidate_rows.append(task_rows)
+
+    if not vectors:
+        return [[] for _ in candidates]
+
+    if missing:
+        log.debug(f"Embedding {len(missing)} hybrid search candidates")
+        embeddings = embedding_function(
+            [content for _, content in missing], RAG_EMBEDDING_CONTENT_PREFIX
+        )
+        for (row, _), embedding in zip(missing, embeddings):
+            vectors[row] = embedding
+
+    queries = list(query_embeddings.keys())
+    query_matrix = np.asarray([query_embeddings[q] for q in queries], np.float32)
+    document_matrix = np.asarray(vectors, dtype=np.float32)
+
+    query_matrix /= np.linalg.norm(query_matrix, axis=1, keepdims=True) + 1e-12
+    document_matrix /= np.linalg.norm(document_matrix, axis=1, keepdims=True) + 1e-12
+    similarities = query_matrix @ document_matrix.T
+
+    query_rows = {query: idx for idx, query in enumerate(queries)}
+    return [
+        similarities[query_rows[query], task_rows].tolist()
+        for (_, query, _), task_rows in zip(candidates, candidate_rows)
+    ]
+
+
+def select_hybrid_search_results(
+    documents: list[Document],
+    scores: list[float],
+    k: int,
+    k_reranker: int,
+    r: float,
+) -> dict:
+    docs_with_scores = list(zip(documents, scores))
+    if r:
+        docs_with_scores = [(d, s) for d, s in docs_with_scores if s >= r]
+
+    # keep the k_reranker best, and only min(k, k_reranker) of them
+    docs_with_scores = sorted(
+        docs_with_scores, key=operator.itemgetter(1), reverse=True
+    )[: min(k, k_reranker)]
+
+    return {
+        "distances": [[score for _, score in docs_with_scores]],
+        "documents": [[doc.page_content for doc, _ in docs_with_scores]],
+        "metadatas": [
+            [{**doc.metadata, "score": score} for doc, score in docs_with_scores]
+        ],
+    }
+
+
 def query_doc_with_hybrid_search(
     collection_name: str,
     collection_result: GetResult,
@@ -121,62 +330,34 @@ def query_doc_with_hybrid_search(
 ) -> dict:
     try:
         log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=collection_result.documents[0],
-            metadatas=collection_result.metadatas[0],
-        )
-        bm25_retriever.k = k
+        query_embedding = None
+        if hybrid_bm25_weight < 1 or reranking_function is None:
+            query_embedding = embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
 
-        vector_search_retriever = VectorSearchRetriever(
+        documents = get_hybrid_search_candidates(
             collection_name=collection_name,
+            collection_result=collection_result,
+            query=query,
             embedding_function=embedding_function,
-            top_k=k,
+            k=k,
+            hybrid_bm25_weight=hybrid_bm25_weight,
+            query_embedding=query_embedding,
         )
 
-        if hybrid_bm25_weight <= 0:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[vector_search_retriever], weights=[1.0]
-            )
-        elif hybrid_bm25_weight >= 1:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever], weights=[1.0]
+        if reranking_function is not None:
+            scores = rerank_pairs(
+                reranking_function,
+                [(query, doc.page_content) for doc in documents],
+                [list(range(len(documents)))],
             )
         else:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever, vector_search_retriever],
-                weights=[hybrid_bm25_weight, 1.0 - hybrid_bm25_weight],
-            )
-
-        compressor = RerankCompressor(
-            embedding_function=embedding_function,
-            top_n=k_reranker,
-            reranking_function=reranking_function,
-            r_score=r,
-        )
-
-        compression_retriever = ContextualCompressionRetriever(
-            base_compressor=compressor, base_retriever=ensemble_retriever
-        )
-
-        result = compression_retriever.invoke(query)
-
-        distances = [d.metadata.get("score") for d in result]
-        documents = [d.page_content for d in result]
-        metadatas = [d.metadata for d in result]
-
-        # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
-        if k < k_reranker:
-            sorted_items = sorted(
-                zip(distances, metadatas, documents), key=lambda x: x[0], reverse=True
+            [scores] = get_vector_similarity_scores(
+                [(collection_name, query, documents)],
+                {query: query_embedding},
+                embedding_function,
             )
-            sorted_items = sorted_items[:k]
-            distances, documents, metadatas = map(list, zip(*sorted_items))
 
-        result = {
-            "distances": [distances],
-            "documents": [documents],
-            "metadatas": [metadatas],
-        }
+        result = select_hybrid_search_results(documents, scores, k, k_reranker, r)
 
         log.info(
             "query_doc_with_hybrid_search:result "
@@ -257,7 +438,13 @@ def get_all_items_from_collections(collection_names: list[str]) -> dict:
             try:
                 result = get_doc(collection_name=collection_name)
                 if result is not None:
-                    results.append(result.model_dump())
+                    results.append(
+                        {
+                            "documents": result.documents,
+                            "metadatas": result.metadatas,
+                            "ids": result.ids,
+                        }
+                    )
             except Exception as e:
                 log.exception(f"Error when querying the collection: {e}")
         else:
@@ -273,46 +460,40 @@ def query_collection(
     k: int,
 ) -> dict:
     results = []
-    error = False
-
-    def process_query_collection(collection_name, query_embedding):
-        try:
-            if collection_name:
-                result = query_doc(
-                    collection_name=collection_name,
-                    k=k,
-                    query_embedding=query_embedding,
-                )
-                if result is not None:
-                    return result.model_dump(), None
-            return None, None
-        except Exception as e:
-            log.exception(f"Error when querying the collection: {e}")
-            return None, e
 
     # Generate all query embeddings (in one call)
     query_embeddings = embedding_function(queries, prefix=RAG_EMBEDDING_QUERY_PREFIX)
+    collection_names = [name for name in collection_names if name]
     log.debug(
         f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
-    with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
-                )
-                future_results.append(result)
-        task_results = [future.result() for future in future_results]
+    # Search every collection with every query in one batched call
+    try:
+        search_results = VECTOR_DB_CLIENT.search_collections(
+            collection_names=collection_names,
+            vectors=query_embeddings,
+            limit=k,
+        )
+    except Exception as e:
+        log.exception(f"Error when querying the collections: {e}")
+        search_results = {}
 
-    for result, err in task_results:
-        if err is not None:
-            error = True
-        elif result is not None:
-            results.append(result)
+    for collection_name, result in search_results.items():
+        if result is None:
+            continue
 
-    if error and not results:
+        log.info(f"query_collection:result {collection_name} {result.ids}")
+        for idx in range(len(result.ids)):
+            results.append(
+                {
+                    "distances": [result.distances[idx]],
+                    "documents": [result.documents[idx]],
+                    "metadatas": [result.metadatas[idx]],
+                }
+            )
+
+    if collection_names and not any(search_results.values()):
         log.warning("All collection queries failed. No results returned.")
 
     return merge_and_sort_query_results(results, k=k)
@@ -336,9 +517,9 @@ def query_collection_with_hybrid_search(
     for collection_name in collection_names:
         try:
             log.debug(
-                f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
+                f"query_collection_with_hybrid_search:get_collection_result:collection {collection_name}"
             )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
+            collection_results[collection_name] = get_collection_result(
                 collection_name=collection_name
             )
         except Exception as e:
@@ -349,20 +530,27 @@ def query_collection_with_hybrid_search(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
     )
 
+    # Embed every query once, for both the vector search of each collection
+    # and the similarity scoring without a reranker
+    queries = list(dict.fromkeys(queries))
+    query_embeddings = {}
+    if hybrid_bm25_weight < 1 or reranking_function is None:
+        query_embeddings = dict(
+            zip(queries, embedding_function(queries, RAG_EMBEDDING_QUERY_PREFIX))
+        )
+
     def process_query(collection_name, query):
         try:
-            result = query_doc_with_hybrid_search(
+            documents = get_hybrid_search_candidates(
                 collection_name=collection_name,
                 collection_result=collection_results[collection_name],
                 query=query,
                 embedding_function=embedding_function,
                 k=k,
-                reranking_function=reranking_function,
-                k_reranker=k_reranker,
-                r=r,
                 hybrid_bm25_weight=hybrid_bm25_weight,
+                query_embedding=query_embeddings.get(query),
             )
-            return result, None
+            return documents, None
         except Exception as e:
             log.exception(f"Error when querying the collection with hybrid_search: {e}")
             return None, e
@@ -376,21 +564,46 @@ def query_collection_with_hybrid_search(
         for q in queries
     ]
 
-    with ThreadPoolExecutor() as executor:
-        future_results = [executor.submit(process_query, cn, q) for cn, q in tasks]
-        task_results = [future.result() for future in future_results]
+    future_results = [
+        RETRIEVAL_QUERY_EXECUTOR.submit(process_query, cn, q) for cn, q in tasks
+    ]
+    task_results = [future.result() for future in future_results]
 
-    for result, err in task_results:
+    candidates = []
+    for (cn, q), (documents, err) in zip(tasks, task_results):
         if err is not None:
             error = True
-        elif result is not None:
-            results.append(result)
+        elif documents is not None:
+            candidates.append((cn, q, documents))
 
-    if error and not results:
+    if error and not candidates:
         raise Exception(
             "Hybrid search failed for all collections. Using Non-hybrid search as fallback."
         )
 
+    # Score the candidates of all collections and queries at once
+    if reranking_function is not None:
+        pairs = []
+        groups = []
+        for _, query, documents in candidates:
+            groups.append(list(range(len(pairs), len(pairs) + len(documents))))
+            pairs.extend((query, doc.page_content) for doc in documents)
+
+        scores = rerank_pairs(reranking_function, pairs, groups)
+        candidate_scores = [[scores[idx] for idx in group] for group in groups]
+    else:
+        candidate_scores = get_vector_similarity_scores(
+            candidates, query_embeddings, embedding_function
+        )
+
+    for (collection_name, _, documents), scores in zip(candidates, candidate_scores):
+        result = select_hybrid_search_results(documents, scores, k, k_reranker, r)
+        log.info(
+            f"query_collection_with_hybrid_search:result {collection_name} "
+            + f'{result["metadatas"]} {result["distances"]}'
+        )
+        results.append(result)
+
     return merge_and_sort_query_results(results, k=k)
 
 
@@ -403,10 +616,27 @@ def get_embedding_function(
     embedding_batch_size,
     azure_api_version=None,
 ):
+    """
+    Embedding functions take `(query, prefix=None, user=None, as_array=False)`
+    and return a list of floats per text, or with `as_array` a float32
+    ndarray with one row per text, for callers handing vectors on to
+    VECTOR_DB_CLIENT.insert_columns.
+    """
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
-            query, **({"prompt": prefix} if prefix else {})
-        ).tolist()
+        if ENABLE_LOCAL_EMBEDDING_BATCHING:
+            return lambda query, prefix=None, user=None, as_array=False: LOCAL_EMBEDDING_SERVICE.encode(
+                embedding_function, query, prefix, as_array=as_array
+            )
+
+        def encode(query, prefix=None, user=None, as_array=False):
+            embeddings = embedding_function.encode(
+                query, **({"prompt": prefix} if prefix else {})
+            )
+            if as_array:
+                return np.asarray(embeddings, dtype=np.float32)
+            return embeddings.tolist()
+
+        return encode
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
         func = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
@@ -434,9 +664,13 @@ def get_embedding_function(
             else:
                 return func(query, prefix, user)
 
-        return lambda query, prefix=None, user=None: generate_multiple(
-            query, prefix, user, func
-        )
+        def generate(query, prefix=None, user=None, as_array=False):
+            embeddings = generate_multiple(query, prefix, user, func)
+            if as_array and embeddings is not None:
+                return np.asarray(embeddings, dtype=np.float32)
+            return embeddings
+
+        return generate
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
@@ -614,6 +848,47 @@ def get_sources_from_files(
     return sources
 
 
+def merge_sources(*source_lists: list[dict]) -> list[dict]:
+    """
+    Merge the results of several get_sources_from_files runs over the same
+    files. Sources are matched by file and documents already present in an
+    earlier list are dropped, so the first list takes precedence.
+    """
+    merged = {}
+    for sources in source_lists:
+        for source in sources:
+            key = json.dumps(source.get("source", {}), sort_keys=True, default=str)
+            if key not in merged:
+                merged[key] = {
+                    **source,
+                    "document": list(source["document"]),
+                    "metadata": list(source["metadata"]),
+                    **(
+                        {"distances": list(source["distances"])}
+                        if "distances" in source
+                        else {}
+                    ),
+                }
+                continue
+
+            target = merged[key]
+            seen = set(target["document"])
+            for idx, document in enumerate(source["document"]):
+                if document in seen:
+                    continue
+                seen.add(document)
+
+                target["document"].append(document)
+                target["metadata"].append(source["metadata"][idx])
+                if "distances" in target:
+                    distances = source.get("distances") or []
+                    target["distances"].append(
+                        distances[idx] if idx < len(distances) else 0.0
+                    )
+
+    return list(merged.values())
+
+
 def get_model_path(model: str, update_model: bool = False):
     # Construct huggingface_hub kwargs with local_files_only to return the snapshot path
     cache_dir = os.getenv("SENTENCE_TRANSFORMERS_HOME")
@@ -846,62 +1121,3 @@ def generate_embeddings(
             user,
         )
         return embeddings[0] if isinstance(text, str) else embeddings
-
-
-import operator
-from typing import Optional, Sequence
-
-from langchain_core.callbacks import Callbacks
-from langchain_core.documents import BaseDocumentCompressor, Document
-
-
-class RerankCompressor(BaseDocumentCompressor):
-    embedding_function: Any
-    top_n: int
-    reranking_function: Any
-    r_score: float
-
-    class Config:
-        extra = "forbid"
-        arbitrary_types_allowed = True
-
-    def compress_documents(
-        self,
-        documents: Sequence[Document],
-        query: str,
-        callbacks: Optional[Callbacks] = None,
-    ) -> Sequence[Document]:
-        reranking = self.reranking_function is not None
-
-        if reranking:
-            scores = self.reranking_function.predict(
-                [(query, doc.page_content) for doc in documents]
-            )
-        else:
-            from sentence_transformers import util
-
-            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
-            )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
-
-        docs_with_scores = list(
-            zip(documents, scores.tolist() if not isinstance(scores, list) else scores)
-        )
-        if self.r_score:
-            docs_with_scores = [
-                (d, s) for d, s in docs_with_scores if s >= self.r_score
-            ]
-
-        result = sorted(docs_with_scores, key=operator.itemgetter(1), reverse=True)
-        final_results = []
-        for doc, doc_score in result[: self.top_n]:
-            metadata = doc.metadata
-            metadata["score"] = doc_score
-            doc = Document(
-                page_content=doc.page_content,
-                metadata=metadata,
-            )
-            final_results.append(doc)
-        return final_results
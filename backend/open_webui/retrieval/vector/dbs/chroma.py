@@ -3,7 +3,9 @@ import logging
 from chromadb import Settings
 from chromadb.utils.batch_utils import create_batches
 
-from typing import Optional
+from typing import Any, Iterator, Optional
+
+import numpy as np
 
 from open_webui.retrieval.vector.main import (
     VectorDBBase,
@@ -22,7 +24,7 @@ from open_webui.config import (
     CHROMA_CLIENT_AUTH_PROVIDER,
     CHROMA_CLIENT_AUTH_CREDENTIALS,
 )
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, VECTOR_DB_GET_BATCH_SIZE
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -82,9 +84,9 @@ class ChromaClient(VectorDBBase):
 
                 # chromadb has cosine distance, 2 (worst) -> 0 (best). Re-odering to 0 -> 1
                 # https://docs.trychroma.com/docs/collections/configure cosine equation
-                distances: list = result["distances"][0]
-                distances = [2 - dist for dist in distances]
-                distances = [[dist / 2 for dist in distances]]
+                distances = [
+                    [(2 - dist) / 2 for dist in row] for row in result["distances"]
+                ]
 
                 return SearchResult(
                     **{
@@ -98,6 +100,18 @@ class ChromaClient(VectorDBBase):
         except Exception as e:
             return None
 
+    def search_collections(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: int,
+    ) -> dict[str, Optional[SearchResult]]:
+        # Chroma collections are queried separately, each with all the vectors at once.
+        return {
+            collection_name: self.search(collection_name, vectors, limit)
+            for collection_name in dict.fromkeys(collection_names)
+        }
+
     def query(
         self, collection_name: str, filter: dict, limit: Optional[int] = None
     ) -> Optional[GetResult]:
@@ -121,20 +135,87 @@ class ChromaClient(VectorDBBase):
         except:
             return None
 
-    def get(self, collection_name: str) -> Optional[GetResult]:
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
         # Get all the items in the collection.
         collection = self.client.get_collection(name=collection_name)
         if collection:
-            result = collection.get()
+            result = collection.get(
+                include=(
+                    ["documents", "metadatas", "embeddings"]
+                    if include_vectors
+                    else ["documents", "metadatas"]
+                )
+            )
             return GetResult(
                 **{
                     "ids": [result["ids"]],
                     "documents": [result["documents"]],
                     "metadatas": [result["metadatas"]],
+                    "vectors": (
+                        [[list(map(float, v)) for v in result["embeddings"]]]
+                        if include_vectors and result.get("embeddings") is not None
+                        else None
+                    ),
                 }
             )
         return None
 
+    def get_vectors(
+        self, collection_name: str, ids: list[str]
+    ) -> dict[str, np.ndarray]:
+        if not ids or not self.has_collection(collection_name):
+            return {}
+
+        collection = self.client.get_collection(name=collection_name)
+        result = collection.get(ids=ids, include=["embeddings"])
+        if result.get("embeddings") is None:
+            return {}
+        return {
+            id: np.asarray(vector, dtype=np.float32)
+            for id, vector in zip(result["ids"], result["embeddings"])
+        }
+
+    def get_batches(
+        self,
+        collection_name: str,
+        batch_size: int = VECTOR_DB_GET_BATCH_SIZE,
+        include_vectors: bool = False,
+    ) -> Iterator[GetResult]:
+        if not self.has_collection(collection_name):
+            return
+
+        collection = self.client.get_collection(name=collection_name)
+        offset = 0
+        while True:
+            result = collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=(
+                    ["documents", "metadatas", "embeddings"]
+                    if include_vectors
+                    else ["documents", "metadatas"]
+                ),
+            )
+            if not result["ids"]:
+                return
+
+            yield GetResult(
+                ids=[result["ids"]],
+                documents=[result["documents"]],
+                metadatas=[result["metadatas"]],
+                vectors=(
+                    [[list(map(float, v)) for v in result["embeddings"]]]
+                    if include_vectors and result.get("embeddings") is not None
+                    else None
+                ),
+            )
+
+            if len(result["ids"]) < batch_size:
+                return
+            offset += len(result["ids"])
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection = self.client.get_or_create_collection(
@@ -155,6 +236,28 @@ class ChromaClient(VectorDBBase):
         ):
             collection.add(*batch)
 
+    def insert_columns(
+        self,
+        collection_name: str,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[Any],
+        vectors: np.ndarray,
+    ):
+        # Chroma takes the array as is, batches are slices of it
+        collection = self.client.get_or_create_collection(
+            name=collection_name, metadata={"hnsw:space": "cosine"}
+        )
+
+        for batch in create_batches(
+            api=self.client,
+            documents=texts,
+            embeddings=vectors,
+            ids=ids,
+            metadatas=metadatas,
+        ):
+            collection.add(*batch)
+
     def upsert(self, collection_name: str, items: list[VectorItem]):
         # Update the items in the collection, if the items are not present, insert them. If the collection does not exist, it will be created.
         collection = self.client.get_or_create_collection(
@@ -1,6 +1,7 @@
 from elasticsearch import Elasticsearch, BadRequestError
-from typing import Optional
+from typing import Iterator, Optional
 import ssl
+import numpy as np
 from elasticsearch.helpers import bulk, scan
 from open_webui.retrieval.vector.main import (
     VectorDBBase,
@@ -18,6 +19,7 @@ from open_webui.config import (
     ELASTICSEARCH_INDEX_PREFIX,
     SSL_ASSERT_FINGERPRINT,
 )
+from open_webui.env import VECTOR_DB_GET_BATCH_SIZE
 
 
 class ElasticsearchClient(VectorDBBase):
@@ -54,13 +56,20 @@ class ElasticsearchClient(VectorDBBase):
         ids = []
         documents = []
         metadatas = []
+        vectors = []
 
         for hit in result:
             ids.append(hit["_id"])
             documents.append(hit["_source"].get("text"))
             metadatas.append(hit["_source"].get("metadata"))
+            vectors.append(hit["_source"].get("vector"))
 
-        return GetResult(ids=[ids], documents=[documents], metadatas=[metadatas])
+        return GetResult(
+            ids=[ids],
+            documents=[documents],
+            metadatas=[metadatas],
+            vectors=[vectors] if all(v is not None for v in vectors) else None,
+        )
 
     # Status: works
     def _result_to_get_result(self, result) -> GetResult:
@@ -177,6 +186,57 @@ class ElasticsearchClient(VectorDBBase):
 
         return self._result_to_search_result(result)
 
+    def search_collections(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float]],
+        limit: int,
+    ) -> dict[str, Optional[SearchResult]]:
+        # Every (collection, vector) pair is sent in a single multi search request.
+        collection_names = list(dict.fromkeys(collection_names))
+        if not vectors or not collection_names:
+            return {name: None for name in collection_names}
+
+        index = self._get_index_name(len(vectors[0]))
+        searches = []
+        for collection_name in collection_names:
+            for vector in vectors:
+                searches.append({"index": index})
+                searches.append(
+                    {
+                        "size": limit,
+                        "_source": ["text", "metadata"],
+                        "query": {
+                            "script_score": {
+                                "query": {
+                                    "bool": {
+                                        "filter": [
+                                            {"term": {"collection": collection_name}}
+                                        ]
+                                    }
+                                },
+                                "script": {
+                                    "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
+                                    "params": {"vector": vector},
+                                },
+                            }
+                        },
+                    }
+                )
+
+        responses = self.client.msearch(searches=searches)["responses"]
+
+        results = {}
+        for idx, collection_name in enumerate(collection_names):
+            rows = responses[idx * len(vectors) : (idx + 1) * len(vectors)]
+            if any("error" in row for row in rows):
+                results[collection_name] = None
+                continue
+            results[collection_name] = SearchResult.stack(
+                [self._result_to_search_result(row) for row in rows]
+            )
+        return results
+
     # Status: only tested halfwat
     def query(
         self, collection_name: str, filter: dict, limit: Optional[int] = None
@@ -219,16 +279,74 @@ class ElasticsearchClient(VectorDBBase):
             self._create_index(dimension=dimension)
 
     # Status: works
-    def get(self, collection_name: str) -> Optional[GetResult]:
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
         # Get all the items in the collection.
         query = {
             "query": {"bool": {"filter": [{"term": {"collection": collection_name}}]}},
-            "_source": ["text", "metadata"],
+            "_source": (
+                ["text", "metadata", "vector"]
+                if include_vectors
+                else ["text", "metadata"]
+            ),
         }
         results = list(scan(self.client, index=f"{self.index_prefix}*", query=query))
 
         return self._scan_result_to_get_result(results)
 
+    def get_vectors(
+        self, collection_name: str, ids: list[str]
+    ) -> dict[str, np.ndarray]:
+        if not ids or not self.has_collection(collection_name):
+            return {}
+
+        query_body = {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"term": {"collection": collection_name}},
+                        {"ids": {"values": ids}},
+                    ]
+                }
+            },
+            "_source": ["vector"],
+        }
+        result = self.client.search(
+            index=f"{self.index_prefix}*", body=query_body, size=len(ids)
+        )
+        return {
+            hit["_id"]: np.asarray(hit["_source"]["vector"], dtype=np.float32)
+            for hit in result["hits"]["hits"]
+        }
+
+    def get_batches(
+        self,
+        collection_name: str,
+        batch_size: int = VECTOR_DB_GET_BATCH_SIZE,
+        include_vectors: bool = False,
+    ) -> Iterator[GetResult]:
+        query = {
+            "query": {"bool": {"filter": [{"term": {"collection": collection_name}}]}},
+            "_source": (
+                ["text", "metadata", "vector"]
+                if include_vectors
+                else ["text", "metadata"]
+            ),
+        }
+
+        # scan keeps a scroll context open and fetches `size` hits per page
+        batch = []
+        for hit in scan(
+            self.client, index=f"{self.index_prefix}*", query=query, size=batch_size
+        ):
+            batch.append(hit)
+            if len(batch) >= batch_size:
+                yield self._scan_result_to_get_result(batch)
+                batch = []
+        if batch:
+            yield self._scan_result_to_get_result(batch)
+
     # Status: works
     def insert(self, collection_name: str, items: list[VectorItem]):
         if not self._has_index(dimension=len(items[0]["vector"])):
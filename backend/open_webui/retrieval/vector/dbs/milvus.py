@@ -2,7 +2,10 @@ from pymilvus import MilvusClient as Client
 from pymilvus import FieldSchema, DataType
 import json
 import logging
-from typing import Optional
+import math
+from typing import Iterator, Optional
+
+import numpy as np
 from open_webui.retrieval.vector.main import (
     VectorDBBase,
     VectorItem,
@@ -18,12 +21,35 @@ from open_webui.config import (
     MILVUS_HNSW_M,
     MILVUS_HNSW_EFCONSTRUCTION,
     MILVUS_IVF_FLAT_NLIST,
+    MILVUS_IVF_PQ_M,
+    MILVUS_IVF_PQ_NBITS,
+    MILVUS_RESCORE_OVERSAMPLING,
 )
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, VECTOR_DB_GET_BATCH_SIZE
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
+# Index types storing lossy vectors, whose results are re-ranked
+QUANTIZED_INDEX_TYPES = ["IVF_SQ8", "IVF_PQ"]
+
+
+def get_ivf_pq_m(dimension: int, m: int = 0) -> int:
+    """
+    Number of IVF_PQ sub-vectors, which Milvus requires to divide the
+    dimension: `m` when it does, otherwise the largest divisor of the
+    dimension up to one sub-vector per 8 dimensions.
+    """
+    if m > 0 and dimension % m == 0:
+        return m
+    if m > 0:
+        log.warning(f"MILVUS_IVF_PQ_M={m} does not divide dimension {dimension}")
+
+    target = max(dimension // 8, 1)
+    return next(
+        candidate for candidate in range(target, 0, -1) if dimension % candidate == 0
+    )
+
 
 class MilvusClient(VectorDBBase):
     def __init__(self):
@@ -124,15 +150,22 @@ class MilvusClient(VectorDBBase):
                 "efConstruction": MILVUS_HNSW_EFCONSTRUCTION,
             }
             log.info(f"HNSW params: {index_creation_params}")
-        elif index_type == "IVF_FLAT":
+        elif index_type in ["IVF_FLAT", "IVF_SQ8"]:
             index_creation_params = {"nlist": MILVUS_IVF_FLAT_NLIST}
-            log.info(f"IVF_FLAT params: {index_creation_params}")
+            log.info(f"{index_type} params: {index_creation_params}")
+        elif index_type == "IVF_PQ":
+            index_creation_params = {
+                "nlist": MILVUS_IVF_FLAT_NLIST,
+                "m": get_ivf_pq_m(dimension, MILVUS_IVF_PQ_M),
+                "nbits": MILVUS_IVF_PQ_NBITS,
+            }
+            log.info(f"IVF_PQ params: {index_creation_params}")
         elif index_type in ["FLAT", "AUTOINDEX"]:
             log.info(f"Using {index_type} index with no specific build-time params.")
         else:
             log.warning(
                 f"Unsupported MILVUS_INDEX_TYPE: '{index_type}'. "
-                f"Supported types: HNSW, IVF_FLAT, FLAT, AUTOINDEX. "
+                f"Supported types: HNSW, IVF_FLAT, IVF_SQ8, IVF_PQ, FLAT, AUTOINDEX. "
                 f"Milvus will use its default for the collection if this type is not directly supported for index creation."
             )
             # For unsupported types, pass the type directly to Milvus; it might handle it or use a default.
@@ -176,15 +209,77 @@ class MilvusClient(VectorDBBase):
         # For some index types like IVF_FLAT, search params like nprobe can be set.
         # Example: search_params = {"nprobe": 10} if using IVF_FLAT
         # For simplicity, not adding configurable search_params here, but could be extended.
+        rescore = MILVUS_INDEX_TYPE.upper() in QUANTIZED_INDEX_TYPES and limit
         result = self.client.search(
             collection_name=f"{self.collection_prefix}_{collection_name}",
             data=vectors,
-            limit=limit,
-            output_fields=["data", "metadata"],
+            limit=(
+                max(math.ceil(limit * MILVUS_RESCORE_OVERSAMPLING), limit)
+                if rescore
+                else limit
+            ),
+            output_fields=(
+                ["data", "metadata", "vector"] if rescore else ["data", "metadata"]
+            ),
             # search_params=search_params # Potentially add later if needed
         )
+        if rescore:
+            result = self._rescore(result, vectors, limit)
         return self._result_to_search_result(result)
 
+    def _rescore(self, result, vectors: list[list[float | int]], limit: int):
+        """
+        Re-rank the oversampled hits of a quantised index with the exact
+        distance to their stored full precision vectors, keeping `limit`.
+        """
+        metric_type = MILVUS_METRIC_TYPE.upper()
+        rescored = []
+        for query_vector, hits in zip(vectors, result):
+            hits = list(hits)
+            if not hits:
+                rescored.append(hits)
+                continue
+
+            query = np.asarray(query_vector, dtype=np.float32)
+            matrix = np.asarray(
+                [hit.get("entity", {}).get("vector") for hit in hits],
+                dtype=np.float32,
+            )
+            if metric_type == "L2":
+                # Squared distance, like Milvus; smaller is closer
+                distances = ((matrix - query) ** 2).sum(axis=1)
+                order = np.argsort(distances)
+            else:
+                distances = matrix @ query
+                if metric_type == "COSINE":
+                    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+                    distances = distances / np.maximum(norms, 1e-12)
+                order = np.argsort(-distances)
+
+            rescored.append(
+                [
+                    dict(hits[idx], distance=float(distances[idx]))
+                    for idx in order[:limit]
+                ]
+            )
+        return rescored
+
+    def search_collections(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: int,
+    ) -> dict[str, Optional[SearchResult]]:
+        # Milvus searches one collection per request, with all the vectors at once.
+        results = {}
+        for collection_name in dict.fromkeys(collection_names):
+            try:
+                results[collection_name] = self.search(collection_name, vectors, limit)
+            except Exception as e:
+                log.exception(f"Error searching collection {collection_name}: {e}")
+                results[collection_name] = None
+        return results
+
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         # Construct the filter string for querying
         collection_name = collection_name.replace("-", "_")
@@ -271,8 +366,11 @@ class MilvusClient(VectorDBBase):
             )
             return None
 
-    def get(self, collection_name: str) -> Optional[GetResult]:
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
         # Get all the items in the collection. This can be very resource-intensive for large collections.
+        # Vectors are not returned (include_vectors is ignored), callers re-embed instead.
         collection_name = collection_name.replace("-", "_")
         log.warning(
             f"Fetching ALL items from collection '{self.collection_prefix}_{collection_name}'. This might be slow for large collections."
@@ -281,6 +379,33 @@ class MilvusClient(VectorDBBase):
         # This will use the paginated query logic.
         return self.query(collection_name=collection_name, filter={}, limit=None)
 
+    def get_batches(
+        self,
+        collection_name: str,
+        batch_size: int = VECTOR_DB_GET_BATCH_SIZE,
+        include_vectors: bool = False,
+    ) -> Iterator[GetResult]:
+        # Vectors are not returned (include_vectors is ignored), as in get.
+        # query_iterator pages past the offset + limit cap of plain queries
+        collection_name = collection_name.replace("-", "_")
+        if not self.has_collection(collection_name):
+            return
+
+        iterator = self.client.query_iterator(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            batch_size=min(batch_size, 16383),
+            filter="",
+            output_fields=["id", "data", "metadata"],
+        )
+        try:
+            while True:
+                results = iterator.next()
+                if not results:
+                    return
+                yield self._result_to_get_result([results])
+        finally:
+            iterator.close()
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection_name = collection_name.replace("-", "_")
@@ -1,6 +1,8 @@
 from opensearchpy import OpenSearch
-from opensearchpy.helpers import bulk
-from typing import Optional
+from opensearchpy.helpers import bulk, scan
+from typing import Iterator, Optional
+
+import numpy as np
 
 from open_webui.retrieval.vector.main import (
     VectorDBBase,
@@ -15,6 +17,7 @@ from open_webui.config import (
     OPENSEARCH_USERNAME,
     OPENSEARCH_PASSWORD,
 )
+from open_webui.env import VECTOR_DB_GET_BATCH_SIZE
 
 
 class OpenSearchClient(VectorDBBase):
@@ -37,13 +40,20 @@ class OpenSearchClient(VectorDBBase):
         ids = []
         documents = []
         metadatas = []
+        vectors = []
 
         for hit in result["hits"]["hits"]:
             ids.append(hit["_id"])
             documents.append(hit["_source"].get("text"))
             metadatas.append(hit["_source"].get("metadata"))
+            vectors.append(hit["_source"].get("vector"))
 
-        return GetResult(ids=[ids], documents=[documents], metadatas=[metadatas])
+        return GetResult(
+            ids=[ids],
+            documents=[documents],
+            metadatas=[metadatas],
+            vectors=[vectors] if all(v is not None for v in vectors) else None,
+        )
 
     def _result_to_search_result(self, result) -> SearchResult:
         if not result["hits"]["hits"]:
@@ -144,6 +154,57 @@ class OpenSearchClient(VectorDBBase):
         except Exception as e:
             return None
 
+    def search_collections(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: int,
+    ) -> dict[str, Optional[SearchResult]]:
+        # Every (collection, vector) pair is sent in a single multi search request,
+        # collections without an index come back as errors and are skipped.
+        collection_names = list(dict.fromkeys(collection_names))
+        if not vectors or not collection_names:
+            return {name: None for name in collection_names}
+
+        body = []
+        for collection_name in collection_names:
+            for vector in vectors:
+                body.append({"index": self._get_index_name(collection_name)})
+                body.append(
+                    {
+                        "size": limit,
+                        "_source": ["text", "metadata"],
+                        "query": {
+                            "script_score": {
+                                "query": {"match_all": {}},
+                                "script": {
+                                    "source": "(cosineSimilarity(params.query_value, doc[params.field]) + 1.0) / 2.0",
+                                    "params": {
+                                        "field": "vector",
+                                        "query_value": vector,
+                                    },
+                                },
+                            }
+                        },
+                    }
+                )
+
+        try:
+            responses = self.client.msearch(body=body)["responses"]
+        except Exception as e:
+            return {name: None for name in collection_names}
+
+        results = {}
+        for idx, collection_name in enumerate(collection_names):
+            rows = responses[idx * len(vectors) : (idx + 1) * len(vectors)]
+            if any("error" in row for row in rows):
+                results[collection_name] = None
+                continue
+            results[collection_name] = SearchResult.stack(
+                [self._result_to_search_result(row) for row in rows]
+            )
+        return results
+
     def query(
         self, collection_name: str, filter: dict, limit: Optional[int] = None
     ) -> Optional[GetResult]:
@@ -178,14 +239,73 @@ class OpenSearchClient(VectorDBBase):
         if not self.has_collection(collection_name):
             self._create_index(collection_name, dimension)
 
-    def get(self, collection_name: str) -> Optional[GetResult]:
-        query = {"query": {"match_all": {}}, "_source": ["text", "metadata"]}
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
+        query = {
+            "query": {"match_all": {}},
+            "_source": (
+                ["text", "metadata", "vector"]
+                if include_vectors
+                else ["text", "metadata"]
+            ),
+        }
 
         result = self.client.search(
             index=self._get_index_name(collection_name), body=query
         )
         return self._result_to_get_result(result)
 
+    def get_vectors(
+        self, collection_name: str, ids: list[str]
+    ) -> dict[str, np.ndarray]:
+        if not ids or not self.has_collection(collection_name):
+            return {}
+
+        query_body = {"query": {"ids": {"values": ids}}, "_source": ["vector"]}
+        result = self.client.search(
+            index=self._get_index_name(collection_name),
+            body=query_body,
+            size=len(ids),
+        )
+        return {
+            hit["_id"]: np.asarray(hit["_source"]["vector"], dtype=np.float32)
+            for hit in result["hits"]["hits"]
+        }
+
+    def get_batches(
+        self,
+        collection_name: str,
+        batch_size: int = VECTOR_DB_GET_BATCH_SIZE,
+        include_vectors: bool = False,
+    ) -> Iterator[GetResult]:
+        if not self.has_collection(collection_name):
+            return
+
+        query = {
+            "query": {"match_all": {}},
+            "_source": (
+                ["text", "metadata", "vector"]
+                if include_vectors
+                else ["text", "metadata"]
+            ),
+        }
+
+        # scan keeps a scroll context open and fetches `size` hits per page
+        hits = []
+        for hit in scan(
+            self.client,
+            index=self._get_index_name(collection_name),
+            query=query,
+            size=batch_size,
+        ):
+            hits.append(hit)
+            if len(hits) >= batch_size:
+                yield self._result_to_get_result({"hits": {"hits": hits}})
+                hits = []
+        if hits:
+            yield self._result_to_get_result({"hits": {"hits": hits}})
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         self._create_index_if_not_exists(
             collection_name=collection_name, dimension=len(items[0]["vector"])
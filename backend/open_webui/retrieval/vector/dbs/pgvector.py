@@ -1,24 +1,37 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
+import hashlib
+import io
+import json
 import logging
+import math
+import re
+import struct
+import time
+
+import numpy as np
 from sqlalchemy import (
     cast,
     column,
     create_engine,
     Column,
+    Float,
+    func,
     Integer,
+    literal,
     MetaData,
     select,
     text,
     Text,
     Table,
+    union_all,
     values,
 )
 from sqlalchemy.sql import true
 from sqlalchemy.pool import NullPool
 
 from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB, array
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import BIT, JSONB, array
+from pgvector.sqlalchemy import HALFVEC, Vector
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
 
@@ -28,11 +41,32 @@ from open_webui.retrieval.vector.main import (
     SearchResult,
     GetResult,
 )
-from open_webui.config import PGVECTOR_DB_URL, PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH
+from open_webui.config import (
+    PGVECTOR_DB_URL,
+    PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH,
+    PGVECTOR_INDEX_METHOD,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_HNSW_ITERATIVE_SCAN,
+    PGVECTOR_IVFFLAT_LISTS,
+    PGVECTOR_PARTIAL_INDEX_MIN_ROWS,
+    PGVECTOR_QUANTIZATION,
+    PGVECTOR_RESCORE_OVERSAMPLING,
+)
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, VECTOR_DB_GET_BATCH_SIZE
 
 VECTOR_LENGTH = PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH
+VECTOR_INDEX = "idx_document_chunk_vector"
+PARTIAL_VECTOR_INDEX_PREFIX = "idx_document_chunk_vector_c_"
+STAGING_TABLE = "document_chunk_staging"
+COPY_COLUMNS = ["id", "vector", "collection_name", "text", "vmetadata"]
+# pgvector's upper bound for hnsw.ef_search
+MAX_EF_SEARCH = 1000
+# How often searches re-read which partial indexes exist, as reindex usually
+# runs in another process
+PARTIAL_INDEX_REFRESH_INTERVAL = 60
 Base = declarative_base()
 
 log = logging.getLogger(__name__)
@@ -51,6 +85,8 @@ class DocumentChunk(Base):
 
 class PgvectorClient(VectorDBBase):
     def __init__(self) -> None:
+        self._partial_indexes = set()
+        self._partial_indexes_loaded_at = float("-inf")
 
         # if no pgvector uri, use the existing database connection
         if not PGVECTOR_DB_URL:
@@ -73,6 +109,8 @@ class PgvectorClient(VectorDBBase):
             # Check vector length consistency
             self.check_vector_length()
 
+            self.hnsw_iterative_scan = self._get_hnsw_iterative_scan()
+
             # Create the tables if they do not exist
             # Base.metadata.create_all requires a bind (engine or connection)
             # Get the connection from the session
@@ -80,12 +118,15 @@ class PgvectorClient(VectorDBBase):
             Base.metadata.create_all(bind=connection)
 
             # Create an index on the vector column if it doesn't exist
-            self.session.execute(
-                text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
-                    "ON document_chunk USING ivfflat (vector vector_cosine_ops) WITH (lists = 100);"
+            self.session.execute(text(self._vector_index_sql(VECTOR_INDEX)))
+            index_definition = self._get_index_definition(self.session, VECTOR_INDEX)
+            if index_definition and not self._is_current_index(index_definition):
+                log.warning(
+                    f"{VECTOR_INDEX} does not match PGVECTOR_INDEX_METHOD "
+                    f"({PGVECTOR_INDEX_METHOD}) and PGVECTOR_QUANTIZATION "
+                    f"({PGVECTOR_QUANTIZATION or 'none'}), "
+                    "run `open-webui pgvector-reindex` to rebuild it"
                 )
-            )
             self.session.execute(
                 text(
                     "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
@@ -99,6 +140,186 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during initialization: {e}")
             raise
 
+    def _get_hnsw_iterative_scan(self) -> Optional[str]:
+        if PGVECTOR_HNSW_ITERATIVE_SCAN == "off":
+            return None
+
+        version = self.session.execute(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        ).scalar()
+        match = re.match(r"(\d+)\.(\d+)", version or "")
+        if not match or (int(match[1]), int(match[2])) < (0, 8):
+            if PGVECTOR_HNSW_ITERATIVE_SCAN != "auto":
+                log.warning(
+                    f"pgvector {version} does not support iterative index scans, "
+                    "ignoring PGVECTOR_HNSW_ITERATIVE_SCAN"
+                )
+            return None
+
+        if PGVECTOR_HNSW_ITERATIVE_SCAN == "auto":
+            return "relaxed_order"
+        return PGVECTOR_HNSW_ITERATIVE_SCAN
+
+    @staticmethod
+    def _index_expression() -> tuple[str, str]:
+        # Indexed expression and operator class; searches must order by the
+        # same expression (see _index_distance) for the index to be used
+        if PGVECTOR_QUANTIZATION == "halfvec":
+            return f"(vector::halfvec({VECTOR_LENGTH}))", "halfvec_cosine_ops"
+        if PGVECTOR_QUANTIZATION == "binary":
+            return (
+                f"(binary_quantize(vector)::bit({VECTOR_LENGTH}))",
+                "bit_hamming_ops",
+            )
+        return "vector", "vector_cosine_ops"
+
+    @staticmethod
+    def _index_distance(query_vector):
+        if PGVECTOR_QUANTIZATION == "halfvec":
+            return cast(DocumentChunk.vector, HALFVEC(VECTOR_LENGTH)).op(
+                "<=>", return_type=Float
+            )(cast(query_vector, HALFVEC(VECTOR_LENGTH)))
+        if PGVECTOR_QUANTIZATION == "binary":
+            return cast(
+                func.binary_quantize(DocumentChunk.vector), BIT(VECTOR_LENGTH)
+            ).op("<~>", return_type=Float)(func.binary_quantize(query_vector))
+        return DocumentChunk.vector.cosine_distance(query_vector)
+
+    def _vector_index_sql(
+        self,
+        index_name: str,
+        concurrently: bool = False,
+        collection_name: Optional[str] = None,
+    ) -> str:
+        expression, opclass = self._index_expression()
+        if PGVECTOR_INDEX_METHOD == "hnsw":
+            method = (
+                f"hnsw ({expression} {opclass}) WITH "
+                f"(m = {int(PGVECTOR_HNSW_M)}, ef_construction = {int(PGVECTOR_HNSW_EF_CONSTRUCTION)})"
+            )
+        else:
+            method = f"ivfflat ({expression} {opclass}) WITH (lists = {int(PGVECTOR_IVFFLAT_LISTS)})"
+
+        return (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {index_name} "
+            f"ON document_chunk USING {method}"
+            + (" WHERE collection_name = :collection_name" if collection_name else "")
+        )
+
+    @staticmethod
+    def _get_index_definition(connection, index_name: str) -> Optional[str]:
+        return connection.execute(
+            text("SELECT indexdef FROM pg_indexes WHERE indexname = :index_name"),
+            {"index_name": index_name},
+        ).scalar()
+
+    @staticmethod
+    def _get_indexes(connection) -> list:
+        # Rows of (name, definition, valid). An index whose CONCURRENTLY
+        # build was interrupted is left behind INVALID, and never used
+        return connection.execute(
+            text(
+                "SELECT c.relname AS name, "
+                "pg_get_indexdef(i.indexrelid) AS definition, "
+                "i.indisvalid AS valid "
+                "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = 'document_chunk'::regclass"
+            )
+        ).all()
+
+    def _is_current_index(self, index_definition: str) -> bool:
+        # e.g. "CREATE INDEX ... USING hnsw (vector vector_cosine_ops) WITH (...)"
+        _, opclass = self._index_expression()
+        return (
+            f" USING {PGVECTOR_INDEX_METHOD} " in index_definition
+            and f" {opclass})" in index_definition
+        )
+
+    @staticmethod
+    def _partial_index_name(collection_name: str) -> str:
+        return (
+            PARTIAL_VECTOR_INDEX_PREFIX
+            + hashlib.sha256(collection_name.encode()).hexdigest()[:16]
+        )
+
+    def reindex(
+        self, partial_index_min_rows: int = PGVECTOR_PARTIAL_INDEX_MIN_ROWS
+    ) -> None:
+        """
+        Rebuild the vector index with the configured method and parameters,
+        and maintain a partial vector index for every collection with at
+        least `partial_index_min_rows` chunks, so that searches in large
+        collections do not depend on filtering the results of the global
+        index. Indexes are built CONCURRENTLY, reads and writes continue
+        while this runs.
+        """
+        engine = self.session.get_bind()
+        with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            # Leftover of an interrupted run, possibly INVALID
+            connection.execute(
+                text(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX}_new")
+            )
+
+            log.info(f"Building {VECTOR_INDEX} using {PGVECTOR_INDEX_METHOD}")
+            connection.execute(
+                text(self._vector_index_sql(f"{VECTOR_INDEX}_new", concurrently=True))
+            )
+            connection.execute(
+                text(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX}")
+            )
+            connection.execute(
+                text(f"ALTER INDEX {VECTOR_INDEX}_new RENAME TO {VECTOR_INDEX}")
+            )
+
+            counts = connection.execute(
+                text(
+                    "SELECT collection_name, count(*) FROM document_chunk "
+                    "GROUP BY collection_name"
+                )
+            ).all()
+            wanted = {
+                self._partial_index_name(collection_name): collection_name
+                for collection_name, count in counts
+                if partial_index_min_rows and count >= partial_index_min_rows
+            }
+            existing = [
+                index
+                for index in self._get_indexes(connection)
+                if index.name.startswith(PARTIAL_VECTOR_INDEX_PREFIX)
+            ]
+
+            for index in existing:
+                if (
+                    index.name not in wanted
+                    or not index.valid
+                    or not self._is_current_index(index.definition)
+                ):
+                    log.info(f"Dropping partial vector index {index.name}")
+                    connection.execute(
+                        text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}")
+                    )
+
+            for index_name, collection_name in wanted.items():
+                log.info(
+                    f"Building partial vector index {index_name} for {collection_name}"
+                )
+                connection.execute(
+                    text(
+                        self._vector_index_sql(
+                            index_name,
+                            concurrently=True,
+                            collection_name=collection_name,
+                        )
+                    ),
+                    {"collection_name": collection_name},
+                )
+
+            connection.execute(text("ANALYZE document_chunk"))
+        self._partial_indexes_loaded_at = float("-inf")
+        log.info("Reindex complete.")
+
     def check_vector_length(self) -> None:
         """
         Check if the VECTOR_LENGTH matches the existing vector column dimension in the database.
@@ -139,78 +360,193 @@ class PgvectorClient(VectorDBBase):
         current_length = len(vector)
         if current_length < VECTOR_LENGTH:
             # Pad the vector with zeros
-            vector += [0.0] * (VECTOR_LENGTH - current_length)
+            vector = list(vector) + [0.0] * (VECTOR_LENGTH - current_length)
         elif current_length > VECTOR_LENGTH:
             # Truncate the vector to VECTOR_LENGTH
             vector = vector[:VECTOR_LENGTH]
         return vector
 
-    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+    def _items_to_columns(self, items: List[VectorItem]) -> tuple:
+        return (
+            [item["id"] for item in items],
+            [item["text"] for item in items],
+            [item["metadata"] for item in items],
+            np.asarray(
+                [self.adjust_vector_length(item["vector"]) for item in items],
+                dtype=np.float32,
+            ).reshape(len(items), VECTOR_LENGTH),
+        )
+
+    def _encode_copy_rows(
+        self,
+        collection_name: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Any],
+        vectors: np.ndarray,
+    ) -> io.BytesIO:
+        """
+        Encode columns as a PostgreSQL binary COPY stream of COPY_COLUMNS, so
+        that neither the ORM nor the text format of vectors is involved.
+        Vectors are converted to big endian float4, padded or truncated to
+        VECTOR_LENGTH, in one operation on the whole array.
+        """
+        matrix = np.zeros((len(ids), VECTOR_LENGTH), dtype=">f4")
+        width = min(vectors.shape[1], VECTOR_LENGTH)
+        matrix[:, :width] = vectors[:, :width]
+
+        buffer = io.BytesIO()
+        buffer.write(b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0))
+
+        def field(value: Optional[bytes]):
+            if value is None:
+                buffer.write(struct.pack("!i", -1))
+            else:
+                buffer.write(struct.pack("!i", len(value)))
+                buffer.write(value)
+
+        # pgvector binary format: dim, unused, big endian float4 values
+        vector_header = struct.pack("!hh", VECTOR_LENGTH, 0)
+        collection = collection_name.encode()
+        for idx, (row_id, row_text, metadata) in enumerate(zip(ids, texts, metadatas)):
+            buffer.write(struct.pack("!h", len(COPY_COLUMNS)))
+            field(str(row_id).encode())
+            field(vector_header + matrix[idx].tobytes())
+            field(collection)
+            field(row_text.encode() if row_text is not None else None)
+            field(
+                b"\x01" + json.dumps(metadata).encode()
+                if metadata is not None
+                else None
+            )
+
+        buffer.write(struct.pack("!h", -1))
+        buffer.seek(0)
+        return buffer
+
+    def _bulk_write(
+        self,
+        collection_name: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Any],
+        vectors: np.ndarray,
+        upsert: bool,
+    ) -> int:
+        """
+        COPY columns into a temporary staging table and move them into
+        document_chunk with a single INSERT (... ON CONFLICT DO UPDATE for
+        upserts), in the session's transaction.
+        """
+        if upsert:
+            # ON CONFLICT cannot update the same row twice in one statement
+            last = {id: idx for idx, id in enumerate(ids)}
+            if len(last) < len(ids):
+                keep = sorted(last.values())
+                ids = [ids[idx] for idx in keep]
+                texts = [texts[idx] for idx in keep]
+                metadatas = [metadatas[idx] for idx in keep]
+                vectors = vectors[keep]
+        if not ids:
+            return 0
+
+        cursor = self.session.connection().connection.dbapi_connection.cursor()
         try:
-            new_items = []
-            for item in items:
-                vector = self.adjust_vector_length(item["vector"])
-                new_chunk = DocumentChunk(
-                    id=item["id"],
-                    vector=vector,
-                    collection_name=collection_name,
-                    text=item["text"],
-                    vmetadata=item["metadata"],
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+                "(LIKE document_chunk INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            cursor.copy_expert(
+                f"COPY {STAGING_TABLE} ({', '.join(COPY_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT binary)",
+                self._encode_copy_rows(collection_name, ids, texts, metadatas, vectors),
+            )
+
+            columns = ", ".join(COPY_COLUMNS)
+            on_conflict = (
+                " ON CONFLICT (id) DO UPDATE SET "
+                + ", ".join(
+                    f"{column} = EXCLUDED.{column}"
+                    for column in COPY_COLUMNS
+                    if column != "id"
                 )
-                new_items.append(new_chunk)
-            self.session.bulk_save_objects(new_items)
-            self.session.commit()
-            log.info(
-                f"Inserted {len(new_items)} items into collection '{collection_name}'."
+                if upsert
+                else ""
             )
-        except Exception as e:
-            self.session.rollback()
-            log.exception(f"Error during insert: {e}")
-            raise
+            cursor.execute(
+                f"INSERT INTO document_chunk ({columns}) "
+                f"SELECT {columns} FROM {STAGING_TABLE}{on_conflict}"
+            )
+        finally:
+            cursor.close()
+        return len(ids)
 
-    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+    def _write(
+        self,
+        collection_name: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Any],
+        vectors: np.ndarray,
+        upsert: bool = False,
+    ) -> None:
         try:
-            for item in items:
-                vector = self.adjust_vector_length(item["vector"])
-                existing = (
-                    self.session.query(DocumentChunk)
-                    .filter(DocumentChunk.id == item["id"])
-                    .first()
-                )
-                if existing:
-                    existing.vector = vector
-                    existing.text = item["text"]
-                    existing.vmetadata = item["metadata"]
-                    existing.collection_name = (
-                        collection_name  # Update collection_name if necessary
-                    )
-                else:
-                    new_chunk = DocumentChunk(
-                        id=item["id"],
-                        vector=vector,
-                        collection_name=collection_name,
-                        text=item["text"],
-                        vmetadata=item["metadata"],
-                    )
-                    self.session.add(new_chunk)
+            start = time.perf_counter()
+            count = self._bulk_write(
+                collection_name, ids, texts, metadatas, vectors, upsert=upsert
+            )
             self.session.commit()
+            elapsed = time.perf_counter() - start
             log.info(
-                f"Upserted {len(items)} items into collection '{collection_name}'."
+                f"{'Upserted' if upsert else 'Inserted'} {count} items into "
+                f"collection '{collection_name}' "
+                f"({count / max(elapsed, 1e-9):.0f} rows/s)."
             )
         except Exception as e:
             self.session.rollback()
-            log.exception(f"Error during upsert: {e}")
+            log.exception(f"Error during {'upsert' if upsert else 'insert'}: {e}")
             raise
 
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        self._write(collection_name, *self._items_to_columns(items))
+
+    def insert_columns(
+        self,
+        collection_name: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Any],
+        vectors: np.ndarray,
+    ) -> None:
+        self._write(
+            collection_name, ids, texts, metadatas, np.asarray(vectors, np.float32)
+        )
+
+    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        self._write(collection_name, *self._items_to_columns(items), upsert=True)
+
     def search(
         self,
         collection_name: str,
         vectors: List[List[float]],
         limit: Optional[int] = None,
     ) -> Optional[SearchResult]:
+        if not vectors:
+            return None
+        return self.search_collections([collection_name], vectors, limit)[
+            collection_name
+        ]
+
+    def search_collections(
+        self,
+        collection_names: List[str],
+        vectors: List[List[float]],
+        limit: Optional[int] = None,
+    ) -> Dict[str, Optional[SearchResult]]:
+        collection_names = list(dict.fromkeys(collection_names))
         try:
-            if not vectors:
-                return None
+            if not vectors or not collection_names:
+                return {name: None for name in collection_names}
 
             # Adjust query vectors to VECTOR_LENGTH
             vectors = [self.adjust_vector_length(vector) for vector in vectors]
@@ -230,70 +566,144 @@ class PgvectorClient(VectorDBBase):
                 .alias("query_vectors")
             )
 
-            # Build the lateral subquery for each query vector
-            subq = (
-                select(
-                    DocumentChunk.id,
-                    DocumentChunk.text,
-                    DocumentChunk.vmetadata,
-                    (
-                        DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)
-                    ).label("distance"),
+            # With a quantised index, the index returns `candidates` rows
+            # ordered by their quantised distance and the full precision
+            # distance re-ranks them down to `limit` below
+            rescore = bool(PGVECTOR_QUANTIZATION) and limit is not None
+            candidates = (
+                max(math.ceil(limit * PGVECTOR_RESCORE_OVERSAMPLING), limit)
+                if rescore
+                else limit
+            )
+
+            # One lateral subquery per collection, all in the same statement.
+            # The collection is compared with a constant (rather than joined
+            # in) so the planner can use the collection's partial index
+            selects = []
+            for collection_name in collection_names:
+                distance = DocumentChunk.vector.cosine_distance(
+                    query_vectors.c.q_vector
                 )
-                .where(DocumentChunk.collection_name == collection_name)
-                .order_by(
-                    (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
+                subq = (
+                    select(
+                        DocumentChunk.id,
+                        DocumentChunk.text,
+                        DocumentChunk.vmetadata,
+                        distance.label("distance"),
+                    )
+                    .where(DocumentChunk.collection_name == collection_name)
+                    .order_by(
+                        self._index_distance(query_vectors.c.q_vector)
+                        if rescore
+                        else distance
+                    )
                 )
-            )
-            if limit is not None:
-                subq = subq.limit(limit)
-            subq = subq.lateral("result")
-
-            # Build the main query by joining query_vectors and the lateral subquery
-            stmt = (
-                select(
-                    query_vectors.c.qid,
-                    subq.c.id,
-                    subq.c.text,
-                    subq.c.vmetadata,
-                    subq.c.distance,
+                if candidates is not None:
+                    subq = subq.limit(candidates)
+                subq = subq.lateral("result")
+
+                selects.append(
+                    select(
+                        literal(collection_name).label("q_collection"),
+                        query_vectors.c.qid,
+                        subq.c.id,
+                        subq.c.text,
+                        subq.c.vmetadata,
+                        subq.c.distance,
+                    )
+                    .select_from(query_vectors)
+                    .join(subq, true())
                 )
-                .select_from(query_vectors)
-                .join(subq, true())
-                .order_by(query_vectors.c.qid, subq.c.distance)
-            )
-
+            stmt = union_all(*selects) if len(selects) > 1 else selects[0]
+
+            if rescore:
+                candidate_rows = stmt.subquery("candidates")
+                ranked = select(
+                    candidate_rows,
+                    func.row_number()
+                    .over(
+                        partition_by=(
+                            candidate_rows.c.q_collection,
+                            candidate_rows.c.qid,
+                        ),
+                        order_by=candidate_rows.c.distance,
+                    )
+                    .label("rank"),
+                ).subquery("ranked")
+                stmt = select(
+                    ranked.c.q_collection,
+                    ranked.c.qid,
+                    ranked.c.id,
+                    ranked.c.text,
+                    ranked.c.vmetadata,
+                    ranked.c.distance,
+                ).where(ranked.c.rank <= limit)
+
+            self._set_search_parameters(candidates, collection_names)
             result_proxy = self.session.execute(stmt)
             results = result_proxy.all()
 
-            ids = [[] for _ in range(num_queries)]
-            distances = [[] for _ in range(num_queries)]
-            documents = [[] for _ in range(num_queries)]
-            metadatas = [[] for _ in range(num_queries)]
-
-            if not results:
-                return SearchResult(
-                    ids=ids,
-                    distances=distances,
-                    documents=documents,
-                    metadatas=metadatas,
+            search_results = {
+                name: SearchResult(
+                    ids=[[] for _ in range(num_queries)],
+                    distances=[[] for _ in range(num_queries)],
+                    documents=[[] for _ in range(num_queries)],
+                    metadatas=[[] for _ in range(num_queries)],
                 )
+                for name in collection_names
+            }
 
-            for row in results:
+            for row in sorted(results, key=lambda row: row.distance):
                 qid = int(row.qid)
-                ids[qid].append(row.id)
+                result = search_results[row.q_collection]
+                result.ids[qid].append(row.id)
                 # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
                 # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
-                distances[qid].append((2.0 - row.distance) / 2.0)
-                documents[qid].append(row.text)
-                metadatas[qid].append(row.vmetadata)
+                result.distances[qid].append((2.0 - row.distance) / 2.0)
+                result.documents[qid].append(row.text)
+                result.metadatas[qid].append(row.vmetadata)
 
-            return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
-            )
+            return search_results
         except Exception as e:
+            self.session.rollback()
             log.exception(f"Error during search: {e}")
-            return None
+            return {name: None for name in collection_names}
+
+    def _has_partial_indexes(self, collection_names: List[str]) -> bool:
+        now = time.monotonic()
+        if now - self._partial_indexes_loaded_at > PARTIAL_INDEX_REFRESH_INTERVAL:
+            self._partial_indexes = {
+                index.name
+                for index in self._get_indexes(self.session)
+                if index.valid and index.name.startswith(PARTIAL_VECTOR_INDEX_PREFIX)
+            }
+            self._partial_indexes_loaded_at = now
+        return all(
+            self._partial_index_name(collection_name) in self._partial_indexes
+            for collection_name in collection_names
+        )
+
+    def _set_search_parameters(
+        self, limit: Optional[int], collection_names: List[str]
+    ) -> None:
+        # Scoped to the current transaction
+        if PGVECTOR_INDEX_METHOD == "hnsw":
+            ef_search = max(int(PGVECTOR_HNSW_EF_SEARCH), int(limit or 0))
+            if self.hnsw_iterative_scan:
+                self.session.execute(
+                    text(f"SET LOCAL hnsw.iterative_scan = {self.hnsw_iterative_scan}")
+                )
+            elif not self._has_partial_indexes(collection_names):
+                # Every search filters by collection. When the global index
+                # is used, a single scan returns ef_search rows before the
+                # filter applies, so without iterative scans the search is
+                # widened as far as pgvector allows to still find `limit`
+                # matching rows. Collections with their own partial index
+                # keep the configured ef_search, that index only holds them
+                ef_search = MAX_EF_SEARCH
+            self.session.execute(
+                text(f"SET LOCAL hnsw.ef_search = {min(ef_search, MAX_EF_SEARCH)}")
+            )
 
     def query(
         self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
@@ -328,7 +738,10 @@ class PgvectorClient(VectorDBBase):
             return None
 
     def get(
-        self, collection_name: str, limit: Optional[int] = None
+        self,
+        collection_name: str,
+        limit: Optional[int] = None,
+        include_vectors: bool = False,
     ) -> Optional[GetResult]:
         try:
             query = self.session.query(DocumentChunk).filter(
@@ -345,12 +758,82 @@ class PgvectorClient(VectorDBBase):
             ids = [[result.id for result in results]]
             documents = [[result.text for result in results]]
             metadatas = [[result.vmetadata for result in results]]
+            vectors = (
+                [[result.vector.tolist() for result in results]]
+                if include_vectors
+                else None
+            )
 
-            return GetResult(ids=ids, documents=documents, metadatas=metadatas)
+            return GetResult(
+                ids=ids, documents=documents, metadatas=metadatas, vectors=vectors
+            )
         except Exception as e:
             log.exception(f"Error during get: {e}")
             return None
 
+    def get_vectors(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, np.ndarray]:
+        if not ids:
+            return {}
+        try:
+            rows = (
+                self.session.query(DocumentChunk.id, DocumentChunk.vector)
+                .filter(
+                    DocumentChunk.collection_name == collection_name,
+                    DocumentChunk.id.in_(ids),
+                )
+                .all()
+            )
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during get_vectors: {e}")
+            return {}
+        # The pgvector type already returns numpy arrays
+        return {row.id: np.asarray(row.vector, dtype=np.float32) for row in rows}
+
+    def get_batches(
+        self,
+        collection_name: str,
+        batch_size: int = VECTOR_DB_GET_BATCH_SIZE,
+        include_vectors: bool = False,
+    ) -> Iterator[GetResult]:
+        # Keyset pagination on the primary key; plain columns rather than ORM
+        # objects so nothing accumulates in the session
+        columns = [DocumentChunk.id, DocumentChunk.text, DocumentChunk.vmetadata]
+        if include_vectors:
+            columns.append(DocumentChunk.vector)
+
+        last_id = None
+        while True:
+            query = self.session.query(*columns).filter(
+                DocumentChunk.collection_name == collection_name
+            )
+            if last_id is not None:
+                query = query.filter(DocumentChunk.id > last_id)
+            try:
+                rows = query.order_by(DocumentChunk.id).limit(batch_size).all()
+            except Exception as e:
+                self.session.rollback()
+                log.exception(f"Error during get_batches: {e}")
+                raise
+
+            if not rows:
+                return
+
+            yield GetResult(
+                ids=[[row.id for row in rows]],
+                documents=[[row.text for row in rows]],
+                metadatas=[[row.vmetadata for row in rows]],
+                vectors=(
+                    [[row.vector.tolist() for row in rows]] if include_vectors else None
+                ),
+            )
+
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1].id
+
     def delete(
         self,
         collection_name: str,
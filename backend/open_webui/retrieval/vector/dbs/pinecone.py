@@ -142,18 +142,21 @@ class PineconeClient(VectorDBBase):
         ids = []
         documents = []
         metadatas = []
+        vectors = []
 
         for match in matches:
             metadata = getattr(match, "metadata", {}) or {}
             ids.append(match.id if hasattr(match, "id") else match["id"])
             documents.append(metadata.get("text", ""))
             metadatas.append(metadata)
+            vectors.append(getattr(match, "values", None) or None)
 
         return GetResult(
             **{
                 "ids": [ids],
                 "documents": [documents],
                 "metadatas": [metadatas],
+                "vectors": ([vectors] if all(v is not None for v in vectors) else None),
             }
         )
 
@@ -377,6 +380,34 @@ class PineconeClient(VectorDBBase):
             log.error(f"Error searching in '{collection_name_with_prefix}': {e}")
             return None
 
+    def search_collections(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+    ) -> Dict[str, Optional[SearchResult]]:
+        """Search several collections with several vectors concurrently.
+
+        Pinecone queries take a single vector, so every (collection, vector)
+        pair is still its own request, issued in parallel on the executor.
+        """
+        collection_names = list(dict.fromkeys(collection_names))
+        futures = {
+            collection_name: [
+                self._executor.submit(self.search, collection_name, [vector], limit)
+                for vector in vectors
+            ]
+            for collection_name in collection_names
+        }
+
+        results = {}
+        for collection_name, collection_futures in futures.items():
+            rows = [future.result() for future in collection_futures]
+            results[collection_name] = (
+                None if all(row is None for row in rows) else SearchResult.stack(rows)
+            )
+        return results
+
     def query(
         self, collection_name: str, filter: Dict, limit: Optional[int] = None
     ) -> Optional[GetResult]:
@@ -412,7 +443,9 @@ class PineconeClient(VectorDBBase):
             log.error(f"Error querying collection '{collection_name}': {e}")
             return None
 
-    def get(self, collection_name: str) -> Optional[GetResult]:
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
         """Get all vectors in a collection."""
         collection_name_with_prefix = self._get_collection_name_with_prefix(
             collection_name
@@ -427,6 +460,7 @@ class PineconeClient(VectorDBBase):
                 vector=zero_vector,
                 top_k=NO_LIMIT,
                 include_metadata=True,
+                include_values=include_vectors,
                 filter={"collection_name": collection_name_with_prefix},
             )
 
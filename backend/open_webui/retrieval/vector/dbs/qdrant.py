@@ -1,7 +1,9 @@
-from typing import Optional
+from typing import Any, Iterator, Optional
 import logging
 from urllib.parse import urlparse
 
+import numpy as np
+
 from qdrant_client import QdrantClient as Qclient
 from qdrant_client.http.models import PointStruct
 from qdrant_client.models import models
@@ -18,8 +20,10 @@ from open_webui.config import (
     QDRANT_ON_DISK,
     QDRANT_GRPC_PORT,
     QDRANT_PREFER_GRPC,
+    QDRANT_QUANTIZATION,
+    QDRANT_QUANTIZATION_OVERSAMPLING,
 )
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, VECTOR_DB_GET_BATCH_SIZE
 
 NO_LIMIT = 999999999
 
@@ -27,6 +31,41 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
+# Quantization settings, shared with the multi-tenancy client
+def get_quantization_config(quantization: str):
+    # Quantised copies are kept in RAM for the search, the originals
+    # (possibly on disk) only re-rank the oversampled candidates
+    if quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        )
+    if quantization == "product":
+        return models.ProductQuantization(
+            product=models.ProductQuantizationConfig(
+                compression=models.CompressionRatio.X16, always_ram=True
+            )
+        )
+    if quantization == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    return None
+
+
+def get_search_params(
+    quantization: str, oversampling: float
+) -> Optional[models.SearchParams]:
+    if not quantization:
+        return None
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(
+            rescore=True, oversampling=oversampling
+        )
+    )
+
+
 class QdrantClient(VectorDBBase):
     def __init__(self):
         self.collection_prefix = "open-webui"
@@ -35,6 +74,8 @@ class QdrantClient(VectorDBBase):
         self.QDRANT_ON_DISK = QDRANT_ON_DISK
         self.PREFER_GRPC = QDRANT_PREFER_GRPC
         self.GRPC_PORT = QDRANT_GRPC_PORT
+        self.QUANTIZATION = QDRANT_QUANTIZATION
+        self.QUANTIZATION_OVERSAMPLING = QDRANT_QUANTIZATION_OVERSAMPLING
 
         if not self.QDRANT_URI:
             self.client = None
@@ -60,21 +101,34 @@ class QdrantClient(VectorDBBase):
         ids = []
         documents = []
         metadatas = []
+        vectors = []
 
         for point in points:
             payload = point.payload
             ids.append(point.id)
             documents.append(payload["text"])
             metadatas.append(payload["metadata"])
+            vectors.append(point.vector)
 
         return GetResult(
             **{
                 "ids": [ids],
                 "documents": [documents],
                 "metadatas": [metadatas],
+                "vectors": ([vectors] if all(v is not None for v in vectors) else None),
             }
         )
 
+    def _result_to_search_result(self, points) -> SearchResult:
+        get_result = self._result_to_get_result(points)
+        return SearchResult(
+            ids=get_result.ids,
+            documents=get_result.documents,
+            metadatas=get_result.metadatas,
+            # qdrant distance is [-1, 1], normalize to [0, 1]
+            distances=[[(point.score + 1.0) / 2.0 for point in points]],
+        )
+
     def _create_collection(self, collection_name: str, dimension: int):
         collection_name_with_prefix = f"{self.collection_prefix}_{collection_name}"
         self.client.create_collection(
@@ -84,6 +138,7 @@ class QdrantClient(VectorDBBase):
                 distance=models.Distance.COSINE,
                 on_disk=self.QDRANT_ON_DISK,
             ),
+            quantization_config=get_quantization_config(self.QUANTIZATION),
         )
 
         log.info(f"collection {collection_name_with_prefix} successfully created!")
@@ -125,15 +180,49 @@ class QdrantClient(VectorDBBase):
             collection_name=f"{self.collection_prefix}_{collection_name}",
             query=vectors[0],
             limit=limit,
+            search_params=get_search_params(
+                self.QUANTIZATION, self.QUANTIZATION_OVERSAMPLING
+            ),
         )
-        get_result = self._result_to_get_result(query_response.points)
-        return SearchResult(
-            ids=get_result.ids,
-            documents=get_result.documents,
-            metadatas=get_result.metadatas,
-            # qdrant distance is [-1, 1], normalize to [0, 1]
-            distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
-        )
+        return self._result_to_search_result(query_response.points)
+
+    def search_collections(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: int,
+    ) -> dict[str, Optional[SearchResult]]:
+        # Each collection is searched with one batch request for all the vectors.
+        if limit is None:
+            limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+        results = {}
+        for collection_name in dict.fromkeys(collection_names):
+            try:
+                responses = self.client.query_batch_points(
+                    collection_name=f"{self.collection_prefix}_{collection_name}",
+                    requests=[
+                        models.QueryRequest(
+                            query=vector,
+                            limit=limit,
+                            params=get_search_params(
+                                self.QUANTIZATION, self.QUANTIZATION_OVERSAMPLING
+                            ),
+                            with_payload=True,
+                        )
+                        for vector in vectors
+                    ],
+                )
+                results[collection_name] = SearchResult.stack(
+                    [
+                        self._result_to_search_result(response.points)
+                        for response in responses
+                    ]
+                )
+            except Exception as e:
+                log.exception(f"Error searching collection {collection_name}: {e}")
+                results[collection_name] = None
+        return results
 
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         # Construct the filter string for querying
@@ -161,20 +250,85 @@ class QdrantClient(VectorDBBase):
             log.exception(f"Error querying a collection '{collection_name}': {e}")
             return None
 
-    def get(self, collection_name: str) -> Optional[GetResult]:
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
         # Get all the items in the collection.
         points = self.client.query_points(
             collection_name=f"{self.collection_prefix}_{collection_name}",
             limit=NO_LIMIT,  # otherwise qdrant would set limit to 10!
+            with_vectors=include_vectors,
         )
         return self._result_to_get_result(points.points)
 
+    def get_vectors(
+        self, collection_name: str, ids: list[str]
+    ) -> dict[str, np.ndarray]:
+        if not ids or not self.has_collection(collection_name):
+            return {}
+
+        points = self.client.retrieve(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            ids=ids,
+            with_payload=False,
+            with_vectors=True,
+        )
+        return {
+            str(point.id): np.asarray(point.vector, dtype=np.float32)
+            for point in points
+        }
+
+    def get_batches(
+        self,
+        collection_name: str,
+        batch_size: int = VECTOR_DB_GET_BATCH_SIZE,
+        include_vectors: bool = False,
+    ) -> Iterator[GetResult]:
+        if not self.has_collection(collection_name):
+            return
+
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=include_vectors,
+            )
+            if points:
+                yield self._result_to_get_result(points)
+            if offset is None:
+                return
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         self._create_collection_if_not_exists(collection_name, len(items[0]["vector"]))
         points = self._create_points(items)
         self.client.upload_points(f"{self.collection_prefix}_{collection_name}", points)
 
+    def insert_columns(
+        self,
+        collection_name: str,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[Any],
+        vectors: np.ndarray,
+    ):
+        # upload_collection reads the vectors straight from the array
+        if not ids:
+            return
+        self._create_collection_if_not_exists(collection_name, vectors.shape[1])
+        self.client.upload_collection(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            vectors=vectors,
+            payload=[
+                {"text": text, "metadata": metadata}
+                for text, metadata in zip(texts, metadatas)
+            ],
+            ids=ids,
+        )
+
     def upsert(self, collection_name: str, items: list[VectorItem]):
         # Update the items in the collection, if the items are not present, insert them. If the collection does not exist, it will be created.
         self._create_collection_if_not_exists(collection_name, len(items[0]["vector"]))
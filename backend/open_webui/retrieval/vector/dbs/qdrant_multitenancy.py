@@ -1,16 +1,26 @@
 import logging
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
 from urllib.parse import urlparse
 
 import grpc
+import numpy as np
 from open_webui.config import (
     QDRANT_API_KEY,
     QDRANT_GRPC_PORT,
     QDRANT_ON_DISK,
     QDRANT_PREFER_GRPC,
+    QDRANT_QUANTIZATION,
+    QDRANT_QUANTIZATION_OVERSAMPLING,
+    QDRANT_UPSERT_BATCH_SIZE,
+    QDRANT_UPSERT_PARALLELISM,
     QDRANT_URI,
 )
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, VECTOR_DB_GET_BATCH_SIZE
+from open_webui.retrieval.vector.dbs.qdrant import (
+    get_quantization_config,
+    get_search_params,
+)
 from open_webui.retrieval.vector.main import (
     GetResult,
     SearchResult,
@@ -24,6 +34,10 @@ from qdrant_client.models import models
 
 NO_LIMIT = 999999999
 
+# Metadata fields filtered on by exact match (duplicate content checks,
+# re-adding processed files), indexed in every multi-tenant collection
+PAYLOAD_INDEX_FIELDS = ["metadata.file_id", "metadata.hash"]
+
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
@@ -36,6 +50,13 @@ class QdrantClient(VectorDBBase):
         self.QDRANT_ON_DISK = QDRANT_ON_DISK
         self.PREFER_GRPC = QDRANT_PREFER_GRPC
         self.GRPC_PORT = QDRANT_GRPC_PORT
+        self.QUANTIZATION = QDRANT_QUANTIZATION
+        self.QUANTIZATION_OVERSAMPLING = QDRANT_QUANTIZATION_OVERSAMPLING
+        self.UPSERT_BATCH_SIZE = max(QDRANT_UPSERT_BATCH_SIZE, 1)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(QDRANT_UPSERT_PARALLELISM, 1)
+        )
+        self._indexed_collections = set()
 
         if not self.QDRANT_URI:
             self.client = None
@@ -68,21 +89,34 @@ class QdrantClient(VectorDBBase):
         ids = []
         documents = []
         metadatas = []
+        vectors = []
 
         for point in points:
             payload = point.payload
             ids.append(point.id)
             documents.append(payload["text"])
             metadatas.append(payload["metadata"])
+            vectors.append(point.vector)
 
         return GetResult(
             **{
                 "ids": [ids],
                 "documents": [documents],
                 "metadatas": [metadatas],
+                "vectors": ([vectors] if all(v is not None for v in vectors) else None),
             }
         )
 
+    def _result_to_search_result(self, points) -> SearchResult:
+        get_result = self._result_to_get_result(points)
+        return SearchResult(
+            ids=get_result.ids,
+            documents=get_result.documents,
+            metadatas=get_result.metadatas,
+            # qdrant distance is [-1, 1], normalize to [0, 1]
+            distances=[[(point.score + 1.0) / 2.0 for point in points]],
+        )
+
     def _get_collection_and_tenant_id(self, collection_name: str) -> Tuple[str, str]:
         """
         Maps the traditional collection name to multi-tenant collection and tenant ID.
@@ -215,6 +249,7 @@ class QdrantClient(VectorDBBase):
                     m=0,
                     on_disk=self.QDRANT_ON_DISK,
                 ),
+                quantization_config=get_quantization_config(self.QUANTIZATION),
             )
 
             # Create tenant ID payload index
@@ -228,6 +263,7 @@ class QdrantClient(VectorDBBase):
                 ),
                 wait=True,
             )
+            self._ensure_payload_indexes(mt_collection_name)
 
             log.info(
                 f"Multi-tenant collection {mt_collection_name} created with dimension {dimension}!"
@@ -249,6 +285,73 @@ class QdrantClient(VectorDBBase):
         except Exception as e:
             raise e
 
+    def _ensure_payload_indexes(self, mt_collection_name: str):
+        """
+        Create the keyword indexes of PAYLOAD_INDEX_FIELDS missing from a
+        collection (e.g. created by an older version), once per process.
+        Indexes of existing points are built in the background.
+        """
+        if mt_collection_name in self._indexed_collections:
+            return
+
+        try:
+            payload_schema = (
+                self.client.get_collection(mt_collection_name).payload_schema or {}
+            )
+            for field_name in PAYLOAD_INDEX_FIELDS:
+                if field_name not in payload_schema:
+                    log.info(
+                        f"Creating payload index {mt_collection_name}.{field_name}"
+                    )
+                    self.client.create_payload_index(
+                        collection_name=mt_collection_name,
+                        field_name=field_name,
+                        field_schema=models.KeywordIndexParams(
+                            type=models.KeywordIndexType.KEYWORD,
+                            on_disk=self.QDRANT_ON_DISK,
+                        ),
+                        wait=False,
+                    )
+            self._indexed_collections.add(mt_collection_name)
+        except (UnexpectedResponse, grpc.RpcError) as e:
+            if not self._is_collection_not_found_error(e):
+                _, error_msg = self._extract_error_message(e)
+                log.warning(f"Could not create payload indexes: {error_msg}")
+
+    def _write_points(self, mt_collection: str, points: list[PointStruct]):
+        """
+        Upsert points in chunks of UPSERT_BATCH_SIZE. All chunks but the last
+        are sent concurrently and acknowledged once written rather than once
+        applied (wait=False). The last one is sent after them with wait=True:
+        Qdrant applies the updates of a collection in order, so the points
+        are all readable when this returns, e.g. by process_file reading the
+        chunks back right after the upload.
+        Raises the first error; upserts are idempotent, so retrying all
+        chunks afterwards is safe.
+        """
+        batches = [
+            points[i : i + self.UPSERT_BATCH_SIZE]
+            for i in range(0, len(points), self.UPSERT_BATCH_SIZE)
+        ]
+
+        futures = [
+            self._executor.submit(
+                self.client.upsert,
+                collection_name=mt_collection,
+                points=batch,
+                wait=False,
+            )
+            for batch in batches[:-1]
+        ]
+        for future in futures:
+            future.result()
+
+        return self.client.upsert(
+            collection_name=mt_collection,
+            points=batches[-1] if batches else [],
+            wait=True,
+        )
+
     def _create_points(self, items: list[VectorItem], tenant_id: str):
         """
         Create point structs from vector items with tenant ID.
@@ -407,28 +510,19 @@ class QdrantClient(VectorDBBase):
                         for vector in vectors
                     ]
 
-            # Search with tenant filter
-            prefetch_query = models.Prefetch(
-                filter=models.Filter(must=[tenant_filter]),
-                limit=NO_LIMIT,
-            )
+            # Search with tenant filter, answered by the tenant's own HNSW
+            # graph (payload_m, is_tenant) rather than a scan of its points
             query_response = self.client.query_points(
                 collection_name=mt_collection,
                 query=vectors[0],
-                prefetch=prefetch_query,
+                query_filter=models.Filter(must=[tenant_filter]),
                 limit=limit,
+                search_params=get_search_params(
+                    self.QUANTIZATION, self.QUANTIZATION_OVERSAMPLING
+                ),
             )
 
-            get_result = self._result_to_get_result(query_response.points)
-            return SearchResult(
-                ids=get_result.ids,
-                documents=get_result.documents,
-                metadatas=get_result.metadatas,
-                # qdrant distance is [-1, 1], normalize to [0, 1]
-                distances=[
-                    [(point.score + 1.0) / 2.0 for point in query_response.points]
-                ],
-            )
+            return self._result_to_search_result(query_response.points)
         except (UnexpectedResponse, grpc.RpcError) as e:
             if self._is_collection_not_found_error(e):
                 log.debug(
@@ -445,6 +539,90 @@ class QdrantClient(VectorDBBase):
             log.exception(f"Error searching collection '{collection_name}': {e}")
             return None
 
+    def search_collections(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: int,
+    ) -> dict[str, Optional[SearchResult]]:
+        """
+        Search several collections with several vectors, using one batch
+        request per multi-tenant collection for every (tenant, vector) pair.
+        """
+        collection_names = list(dict.fromkeys(collection_names))
+        results = {name: None for name in collection_names}
+        if not self.client or not vectors:
+            return results
+
+        # Group the collections by the multi-tenant collection holding them
+        tenants_by_collection = {}
+        for collection_name in collection_names:
+            mt_collection, tenant_id = self._get_collection_and_tenant_id(
+                collection_name
+            )
+            tenants_by_collection.setdefault(mt_collection, []).append(
+                (collection_name, tenant_id)
+            )
+
+        dimension = len(vectors[0])
+        for mt_collection, tenants in tenants_by_collection.items():
+            try:
+                # Ensure vector dimensions match the collection
+                collection_dim = self.client.get_collection(
+                    mt_collection
+                ).config.params.vectors.size
+
+                query_vectors = vectors
+                if collection_dim < dimension:
+                    query_vectors = [vector[:collection_dim] for vector in vectors]
+                elif collection_dim > dimension:
+                    query_vectors = [
+                        vector + [0] * (collection_dim - dimension)
+                        for vector in vectors
+                    ]
+
+                responses = self.client.query_batch_points(
+                    collection_name=mt_collection,
+                    requests=[
+                        models.QueryRequest(
+                            query=vector,
+                            filter=models.Filter(
+                                must=[
+                                    models.FieldCondition(
+                                        key="tenant_id",
+                                        match=models.MatchValue(value=tenant_id),
+                                    )
+                                ]
+                            ),
+                            limit=limit,
+                            params=get_search_params(
+                                self.QUANTIZATION, self.QUANTIZATION_OVERSAMPLING
+                            ),
+                            with_payload=True,
+                        )
+                        for _, tenant_id in tenants
+                        for vector in query_vectors
+                    ],
+                )
+
+                for idx, (collection_name, _) in enumerate(tenants):
+                    rows = responses[idx * len(vectors) : (idx + 1) * len(vectors)]
+                    results[collection_name] = SearchResult.stack(
+                        [self._result_to_search_result(row.points) for row in rows]
+                    )
+            except (UnexpectedResponse, grpc.RpcError) as e:
+                if self._is_collection_not_found_error(e):
+                    log.debug(
+                        f"Collection {mt_collection} doesn't exist, search returns None"
+                    )
+                    continue
+                _, error_msg = self._extract_error_message(e)
+                log.warning(f"Unexpected Qdrant error during search: {error_msg}")
+                raise
+            except Exception as e:
+                log.exception(f"Error searching collection '{mt_collection}': {e}")
+        return results
+
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         """
         Query points with filters and tenant isolation.
@@ -475,6 +653,7 @@ class QdrantClient(VectorDBBase):
 
         # Combine tenant filter with metadata filters
         combined_filter = models.Filter(must=[tenant_filter, *field_conditions])
+        self._ensure_payload_indexes(mt_collection)
 
         try:
             # Try the query directly - most of the time collection should exist
@@ -501,7 +680,9 @@ class QdrantClient(VectorDBBase):
             log.exception(f"Error querying collection '{collection_name}': {e}")
             return None
 
-    def get(self, collection_name: str) -> Optional[GetResult]:
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
         """
         Get all items in a collection with tenant isolation.
         """
@@ -522,6 +703,7 @@ class QdrantClient(VectorDBBase):
                 collection_name=mt_collection,
                 query_filter=models.Filter(must=[tenant_filter]),
                 limit=NO_LIMIT,
+                with_vectors=include_vectors,
             )
 
             return self._result_to_get_result(points.points)
@@ -539,6 +721,88 @@ class QdrantClient(VectorDBBase):
             log.exception(f"Error getting collection '{collection_name}': {e}")
             return None
 
+    def get_vectors(
+        self, collection_name: str, ids: list[str]
+    ) -> dict[str, np.ndarray]:
+        """
+        Get the stored vectors of the given ids with tenant isolation.
+        """
+        if not self.client or not ids:
+            return {}
+
+        mt_collection, tenant_id = self._get_collection_and_tenant_id(collection_name)
+
+        try:
+            points = self.client.retrieve(
+                collection_name=mt_collection,
+                ids=ids,
+                with_payload=["tenant_id"],
+                with_vectors=True,
+            )
+        except (UnexpectedResponse, grpc.RpcError) as e:
+            if self._is_collection_not_found_error(e):
+                log.debug(
+                    f"Collection {mt_collection} doesn't exist, get_vectors returns nothing"
+                )
+                return {}
+            _, error_msg = self._extract_error_message(e)
+            log.warning(f"Unexpected Qdrant error during get_vectors: {error_msg}")
+            raise
+
+        # Point ids are shared by every tenant of the collection
+        return {
+            str(point.id): np.asarray(point.vector, dtype=np.float32)
+            for point in points
+            if point.payload.get("tenant_id") == tenant_id
+        }
+
+    def get_batches(
+        self,
+        collection_name: str,
+        batch_size: int = VECTOR_DB_GET_BATCH_SIZE,
+        include_vectors: bool = False,
+    ) -> Iterator[GetResult]:
+        """
+        Scroll through all items of a collection with tenant isolation.
+        """
+        if not self.client:
+            return
+
+        mt_collection, tenant_id = self._get_collection_and_tenant_id(collection_name)
+        tenant_filter = models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="tenant_id", match=models.MatchValue(value=tenant_id)
+                )
+            ]
+        )
+
+        offset = None
+        while True:
+            try:
+                points, offset = self.client.scroll(
+                    collection_name=mt_collection,
+                    scroll_filter=tenant_filter,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=include_vectors,
+                )
+            except (UnexpectedResponse, grpc.RpcError) as e:
+                if self._is_collection_not_found_error(e):
+                    log.debug(
+                        f"Collection {mt_collection} doesn't exist, get_batches yields nothing"
+                    )
+                    return
+                _, error_msg = self._extract_error_message(e)
+                log.warning(f"Unexpected Qdrant error during get_batches: {error_msg}")
+                raise
+
+            if points:
+                yield self._result_to_get_result(points)
+            if offset is None:
+                return
+
     def _handle_operation_with_error_retry(
         self, operation_name, mt_collection, points, dimension
     ):
@@ -555,11 +819,8 @@ class QdrantClient(VectorDBBase):
             The operation result (for upsert) or None (for insert)
         """
         try:
-            if operation_name == "insert":
-                self.client.upload_points(mt_collection, points)
-                return None
-            else:  # upsert
-                return self.client.upsert(mt_collection, points)
+            result = self._write_points(mt_collection, points)
+            return None if operation_name == "insert" else result
         except (UnexpectedResponse, grpc.RpcError) as e:
             # Handle collection not found
             if self._is_collection_not_found_error(e):
@@ -571,11 +832,8 @@ class QdrantClient(VectorDBBase):
                     mt_collection_name=mt_collection, dimension=dimension
                 )
                 # Try operation again - no need for dimension adjustment since we just created with correct dimensions
-                if operation_name == "insert":
-                    self.client.upload_points(mt_collection, points)
-                    return None
-                else:  # upsert
-                    return self.client.upsert(mt_collection, points)
+                result = self._write_points(mt_collection, points)
+                return None if operation_name == "insert" else result
 
             # Handle dimension mismatch
             elif self._is_dimension_mismatch_error(e):
@@ -615,11 +873,8 @@ class QdrantClient(VectorDBBase):
                         for point in points
                     ]
                 # Try operation again with adjusted dimensions
-                if operation_name == "insert":
-                    self.client.upload_points(mt_collection, points)
-                    return None
-                else:  # upsert
-                    return self.client.upsert(mt_collection, points)
+                result = self._write_points(mt_collection, points)
+                return None if operation_name == "insert" else result
             else:
                 # Not a known error we can handle, log and re-raise
                 _, error_msg = self._extract_error_message(e)
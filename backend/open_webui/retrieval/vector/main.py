@@ -1,6 +1,13 @@
+import logging
+
+import numpy as np
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from open_webui.env import VECTOR_DB_GET_BATCH_SIZE
+
+log = logging.getLogger(__name__)
 
 
 class VectorItem(BaseModel):
@@ -14,11 +21,29 @@ class GetResult(BaseModel):
     ids: Optional[List[List[str]]]
     documents: Optional[List[List[str]]]
     metadatas: Optional[List[List[Any]]]
+    # Only filled by `get(..., include_vectors=True)` on backends that can
+    # return stored vectors, aligned with `ids`
+    vectors: Optional[List[List[List[float | int]]]] = None
 
 
 class SearchResult(GetResult):
     distances: Optional[List[List[float | int]]]
 
+    @classmethod
+    def stack(cls, results: List[Optional["SearchResult"]]) -> "SearchResult":
+        """Concatenate the rows of several results, None counting as one empty row."""
+        ids, documents, metadatas, distances = [], [], [], []
+        for result in results:
+            if result is None:
+                result = cls(ids=[[]], documents=[[]], metadatas=[[]], distances=[[]])
+            ids.extend(result.ids or [[]])
+            documents.extend(result.documents or [[]])
+            metadatas.extend(result.metadatas or [[]])
+            distances.extend(result.distances or [[]])
+        return cls(
+            ids=ids, documents=documents, metadatas=metadatas, distances=distances
+        )
+
 
 class VectorDBBase(ABC):
     """
@@ -51,6 +76,31 @@ class VectorDBBase(ABC):
         """Insert or update vector items in a collection."""
         pass
 
+    def insert_columns(
+        self,
+        collection_name: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Any],
+        vectors: np.ndarray,
+    ) -> None:
+        """
+        Insert items given as parallel columns, with all vectors in one 2-D
+        float32 array (one row per item).
+
+        Backends that can serialise straight from the array override this;
+        this fallback converts the rows to lists and calls `insert`.
+        """
+        self.insert(
+            collection_name,
+            [
+                {"id": id, "text": text, "vector": vector, "metadata": metadata}
+                for id, text, metadata, vector in zip(
+                    ids, texts, metadatas, vectors.tolist()
+                )
+            ],
+        )
+
     @abstractmethod
     def search(
         self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
@@ -58,6 +108,35 @@ class VectorDBBase(ABC):
         """Search for similar vectors in a collection."""
         pass
 
+    def search_collections(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+    ) -> Dict[str, Optional[SearchResult]]:
+        """
+        Search every collection with every query vector.
+
+        Returns one SearchResult per collection with one row per query vector,
+        in order, or None for collections that could not be searched.
+        Backends override this to answer in as few round trips as possible;
+        this fallback searches each collection once per vector.
+        """
+        results = {}
+        for collection_name in dict.fromkeys(collection_names):
+            try:
+                rows = [
+                    self.search(collection_name, [vector], limit) for vector in vectors
+                ]
+                if all(row is None for row in rows):
+                    results[collection_name] = None
+                else:
+                    results[collection_name] = SearchResult.stack(rows)
+            except Exception as e:
+                log.exception(f"Error searching collection {collection_name}: {e}")
+                results[collection_name] = None
+        return results
+
     @abstractmethod
     def query(
         self, collection_name: str, filter: Dict, limit: Optional[int] = None
@@ -66,10 +145,55 @@ class VectorDBBase(ABC):
         pass
 
     @abstractmethod
-    def get(self, collection_name: str) -> Optional[GetResult]:
-        """Retrieve all vectors from a collection."""
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
+        """
+        Retrieve all vectors from a collection. With `include_vectors`, the
+        stored vectors are returned as well where the backend supports it.
+        """
         pass
 
+    def get_vectors(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Read the stored vectors of the given ids of a collection, as float32
+        arrays keyed by id. Ids that are not found are left out.
+
+        Backends that can look vectors up by id override this; this fallback
+        returns nothing, and callers embed the documents themselves.
+        """
+        return {}
+
+    def get_batches(
+        self,
+        collection_name: str,
+        batch_size: int = VECTOR_DB_GET_BATCH_SIZE,
+        include_vectors: bool = False,
+    ) -> Iterator[GetResult]:
+        """
+        Iterate over all vectors of a collection, `batch_size` at a time, as
+        GetResults of one row each. Nothing is yielded for missing or empty
+        collections.
+
+        Backends override this with their native scroll or cursor so that
+        large collections are never held in memory at once; this fallback
+        still reads the whole collection with `get`.
+        """
+        result = self.get(collection_name, include_vectors=include_vectors)
+        if result is None or not result.ids or not result.ids[0]:
+            return
+
+        for start in range(0, len(result.ids[0]), batch_size):
+            end = start + batch_size
+            yield GetResult(
+                ids=[result.ids[0][start:end]],
+                documents=[result.documents[0][start:end]],
+                metadatas=[result.metadatas[0][start:end]],
+                vectors=([result.vectors[0][start:end]] if result.vectors else None),
+            )
+
     @abstractmethod
     def delete(
         self,
@@ -749,45 +749,46 @@ class AdminConfig(BaseModel):
 async def update_admin_config(
     request: Request, form_data: AdminConfig, user=Depends(get_admin_user)
 ):
-    request.app.state.config.SHOW_ADMIN_DETAILS = form_data.SHOW_ADMIN_DETAILS
-    request.app.state.config.WEBUI_URL = form_data.WEBUI_URL
-    request.app.state.config.ENABLE_SIGNUP = form_data.ENABLE_SIGNUP
-
-    request.app.state.config.ENABLE_API_KEY = form_data.ENABLE_API_KEY
-    request.app.state.config.ENABLE_API_KEY_ENDPOINT_RESTRICTIONS = (
-        form_data.ENABLE_API_KEY_ENDPOINT_RESTRICTIONS
-    )
-    request.app.state.config.API_KEY_ALLOWED_ENDPOINTS = (
-        form_data.API_KEY_ALLOWED_ENDPOINTS
-    )
+    with request.app.state.config.batch():
+        request.app.state.config.SHOW_ADMIN_DETAILS = form_data.SHOW_ADMIN_DETAILS
+        request.app.state.config.WEBUI_URL = form_data.WEBUI_URL
+        request.app.state.config.ENABLE_SIGNUP = form_data.ENABLE_SIGNUP
+
+        request.app.state.config.ENABLE_API_KEY = form_data.ENABLE_API_KEY
+        request.app.state.config.ENABLE_API_KEY_ENDPOINT_RESTRICTIONS = (
+            form_data.ENABLE_API_KEY_ENDPOINT_RESTRICTIONS
+        )
+        request.app.state.config.API_KEY_ALLOWED_ENDPOINTS = (
+            form_data.API_KEY_ALLOWED_ENDPOINTS
+        )
 
-    request.app.state.config.ENABLE_CHANNELS = form_data.ENABLE_CHANNELS
-    request.app.state.config.ENABLE_NOTES = form_data.ENABLE_NOTES
+        request.app.state.config.ENABLE_CHANNELS = form_data.ENABLE_CHANNELS
+        request.app.state.config.ENABLE_NOTES = form_data.ENABLE_NOTES
 
-    if form_data.DEFAULT_USER_ROLE in ["pending", "user", "admin"]:
-        request.app.state.config.DEFAULT_USER_ROLE = form_data.DEFAULT_USER_ROLE
+        if form_data.DEFAULT_USER_ROLE in ["pending", "user", "admin"]:
+            request.app.state.config.DEFAULT_USER_ROLE = form_data.DEFAULT_USER_ROLE
 
-    pattern = r"^(-1|0|(-?\d+(\.\d+)?)(ms|s|m|h|d|w))$"
+        pattern = r"^(-1|0|(-?\d+(\.\d+)?)(ms|s|m|h|d|w))$"
 
-    # Check if the input string matches the pattern
-    if re.match(pattern, form_data.JWT_EXPIRES_IN):
-        request.app.state.config.JWT_EXPIRES_IN = form_data.JWT_EXPIRES_IN
+        # Check if the input string matches the pattern
+        if re.match(pattern, form_data.JWT_EXPIRES_IN):
+            request.app.state.config.JWT_EXPIRES_IN = form_data.JWT_EXPIRES_IN
 
-    request.app.state.config.ENABLE_COMMUNITY_SHARING = (
-        form_data.ENABLE_COMMUNITY_SHARING
-    )
-    request.app.state.config.ENABLE_MESSAGE_RATING = form_data.ENABLE_MESSAGE_RATING
+        request.app.state.config.ENABLE_COMMUNITY_SHARING = (
+            form_data.ENABLE_COMMUNITY_SHARING
+        )
+        request.app.state.config.ENABLE_MESSAGE_RATING = form_data.ENABLE_MESSAGE_RATING
 
-    request.app.state.config.ENABLE_USER_WEBHOOKS = form_data.ENABLE_USER_WEBHOOKS
+        request.app.state.config.ENABLE_USER_WEBHOOKS = form_data.ENABLE_USER_WEBHOOKS
 
-    request.app.state.config.PENDING_USER_OVERLAY_TITLE = (
-        form_data.PENDING_USER_OVERLAY_TITLE
-    )
-    request.app.state.config.PENDING_USER_OVERLAY_CONTENT = (
-        form_data.PENDING_USER_OVERLAY_CONTENT
-    )
+        request.app.state.config.PENDING_USER_OVERLAY_TITLE = (
+            form_data.PENDING_USER_OVERLAY_TITLE
+        )
+        request.app.state.config.PENDING_USER_OVERLAY_CONTENT = (
+            form_data.PENDING_USER_OVERLAY_CONTENT
+        )
 
-    request.app.state.config.RESPONSE_WATERMARK = form_data.RESPONSE_WATERMARK
+        request.app.state.config.RESPONSE_WATERMARK = form_data.RESPONSE_WATERMARK
 
     return {
         "SHOW_ADMIN_DETAILS": request.app.state.config.SHOW_ADMIN_DETAILS,
@@ -101,55 +101,56 @@ class ConfigForm(BaseModel):
 async def update_config(
     request: Request, form_data: ConfigForm, user=Depends(get_admin_user)
 ):
-    request.app.state.config.IMAGE_GENERATION_ENGINE = form_data.engine
-    request.app.state.config.ENABLE_IMAGE_GENERATION = form_data.enabled
+    with request.app.state.config.batch():
+        request.app.state.config.IMAGE_GENERATION_ENGINE = form_data.engine
+        request.app.state.config.ENABLE_IMAGE_GENERATION = form_data.enabled
 
-    request.app.state.config.ENABLE_IMAGE_PROMPT_GENERATION = (
-        form_data.prompt_generation
-    )
+        request.app.state.config.ENABLE_IMAGE_PROMPT_GENERATION = (
+            form_data.prompt_generation
+        )
 
-    request.app.state.config.IMAGES_OPENAI_API_BASE_URL = (
-        form_data.openai.OPENAI_API_BASE_URL
-    )
-    request.app.state.config.IMAGES_OPENAI_API_KEY = form_data.openai.OPENAI_API_KEY
+        request.app.state.config.IMAGES_OPENAI_API_BASE_URL = (
+            form_data.openai.OPENAI_API_BASE_URL
+        )
+        request.app.state.config.IMAGES_OPENAI_API_KEY = form_data.openai.OPENAI_API_KEY
 
-    request.app.state.config.IMAGES_GEMINI_API_BASE_URL = (
-        form_data.gemini.GEMINI_API_BASE_URL
-    )
-    request.app.state.config.IMAGES_GEMINI_API_KEY = form_data.gemini.GEMINI_API_KEY
+        request.app.state.config.IMAGES_GEMINI_API_BASE_URL = (
+            form_data.gemini.GEMINI_API_BASE_URL
+        )
+        request.app.state.config.IMAGES_GEMINI_API_KEY = form_data.gemini.GEMINI_API_KEY
 
-    request.app.state.config.AUTOMATIC1111_BASE_URL = (
-        form_data.automatic1111.AUTOMATIC1111_BASE_URL
-    )
-    request.app.state.config.AUTOMATIC1111_API_AUTH = (
-        form_data.automatic1111.AUTOMATIC1111_API_AUTH
-    )
+        request.app.state.config.AUTOMATIC1111_BASE_URL = (
+            form_data.automatic1111.AUTOMATIC1111_BASE_URL
+        )
+        request.app.state.config.AUTOMATIC1111_API_AUTH = (
+            form_data.automatic1111.AUTOMATIC1111_API_AUTH
+        )
 
-    request.app.state.config.AUTOMATIC1111_CFG_SCALE = (
-        float(form_data.automatic1111.AUTOMATIC1111_CFG_SCALE)
-        if form_data.automatic1111.AUTOMATIC1111_CFG_SCALE
-        else None
-    )
-    request.app.state.config.AUTOMATIC1111_SAMPLER = (
-        form_data.automatic1111.AUTOMATIC1111_SAMPLER
-        if form_data.automatic1111.AUTOMATIC1111_SAMPLER
-        else None
-    )
-    request.app.state.config.AUTOMATIC1111_SCHEDULER = (
-        form_data.automatic1111.AUTOMATIC1111_SCHEDULER
-        if form_data.automatic1111.AUTOMATIC1111_SCHEDULER
-        else None
-    )
+        request.app.state.config.AUTOMATIC1111_CFG_SCALE = (
+            float(form_data.automatic1111.AUTOMATIC1111_CFG_SCALE)
+            if form_data.automatic1111.AUTOMATIC1111_CFG_SCALE
+            else None
+        )
+        request.app.state.config.AUTOMATIC1111_SAMPLER = (
+            form_data.automatic1111.AUTOMATIC1111_SAMPLER
+            if form_data.automatic1111.AUTOMATIC1111_SAMPLER
+            else None
+        )
+        request.app.state.config.AUTOMATIC1111_SCHEDULER = (
+            form_data.automatic1111.AUTOMATIC1111_SCHEDULER
+            if form_data.automatic1111.AUTOMATIC1111_SCHEDULER
+            else None
+        )
 
-    request.app.state.config.COMFYUI_BASE_URL = (
-        form_data.comfyui.COMFYUI_BASE_URL.strip("/")
-    )
-    request.app.state.config.COMFYUI_API_KEY = form_data.comfyui.COMFYUI_API_KEY
+        request.app.state.config.COMFYUI_BASE_URL = (
+            form_data.comfyui.COMFYUI_BASE_URL.strip("/")
+        )
+        request.app.state.config.COMFYUI_API_KEY = form_data.comfyui.COMFYUI_API_KEY
 
-    request.app.state.config.COMFYUI_WORKFLOW = form_data.comfyui.COMFYUI_WORKFLOW
-    request.app.state.config.COMFYUI_WORKFLOW_NODES = (
-        form_data.comfyui.COMFYUI_WORKFLOW_NODES
-    )
+        request.app.state.config.COMFYUI_WORKFLOW = form_data.comfyui.COMFYUI_WORKFLOW
+        request.app.state.config.COMFYUI_WORKFLOW_NODES = (
+            form_data.comfyui.COMFYUI_WORKFLOW_NODES
+        )
 
     return {
         "enabled": request.app.state.config.ENABLE_IMAGE_GENERATION,
@@ -300,24 +301,25 @@ async def get_image_config(request: Request, user=Depends(get_admin_user)):
 async def update_image_config(
     request: Request, form_data: ImageConfigForm, user=Depends(get_admin_user)
 ):
-    set_image_model(request, form_data.MODEL)
+    with request.app.state.config.batch():
+        set_image_model(request, form_data.MODEL)
 
-    pattern = r"^\d+x\d+$"
-    if re.match(pattern, form_data.IMAGE_SIZE):
-        request.app.state.config.IMAGE_SIZE = form_data.IMAGE_SIZE
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail=ERROR_MESSAGES.INCORRECT_FORMAT("  (e.g., 512x512)."),
-        )
+        pattern = r"^\d+x\d+$"
+        if re.match(pattern, form_data.IMAGE_SIZE):
+            request.app.state.config.IMAGE_SIZE = form_data.IMAGE_SIZE
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=ERROR_MESSAGES.INCORRECT_FORMAT("  (e.g., 512x512)."),
+            )
 
-    if form_data.IMAGE_STEPS >= 0:
-        request.app.state.config.IMAGE_STEPS = form_data.IMAGE_STEPS
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail=ERROR_MESSAGES.INCORRECT_FORMAT("  (e.g., 50)."),
-        )
+        if form_data.IMAGE_STEPS >= 0:
+            request.app.state.config.IMAGE_STEPS = form_data.IMAGE_STEPS
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=ERROR_MESSAGES.INCORRECT_FORMAT("  (e.g., 50)."),
+            )
 
     return {
         "MODEL": request.app.state.config.IMAGE_GENERATION_MODEL,
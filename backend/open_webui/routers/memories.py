@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import logging
 from typing import Optional
 
 from open_webui.models.memories import Memories, MemoryModel
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.memory_index import MEMORY_INDEX
 from open_webui.utils.auth import get_verified_user
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -15,6 +17,10 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 router = APIRouter()
 
 
+def get_memory_index_model(request: Request) -> str:
+    return f"{request.app.state.config.RAG_EMBEDDING_ENGINE}:{request.app.state.config.RAG_EMBEDDING_MODEL}"
+
+
 @router.get("/ef")
 async def get_embeddings(request: Request):
     return {"result": request.app.state.EMBEDDING_FUNCTION("hello world")}
@@ -50,6 +56,7 @@ async def add_memory(
     user=Depends(get_verified_user),
 ):
     memory = Memories.insert_new_memory(user.id, form_data.content)
+    vector = request.app.state.EMBEDDING_FUNCTION(memory.content, user=user)
 
     VECTOR_DB_CLIENT.upsert(
         collection_name=f"user-memory-{user.id}",
@@ -57,13 +64,12 @@ async def add_memory(
             {
                 "id": memory.id,
                 "text": memory.content,
-                "vector": request.app.state.EMBEDDING_FUNCTION(
-                    memory.content, user=user
-                ),
+                "vector": vector,
                 "metadata": {"created_at": memory.created_at},
             }
         ],
     )
+    MEMORY_INDEX.upsert(user.id, get_memory_index_model(request), memory, vector)
 
     return memory
 
@@ -82,9 +88,27 @@ class QueryMemoryForm(BaseModel):
 async def query_memory(
     request: Request, form_data: QueryMemoryForm, user=Depends(get_verified_user)
 ):
+    vector = request.app.state.EMBEDDING_FUNCTION(form_data.content, user=user)
+
+    if MEMORY_INDEX.enabled:
+        # Small memory collections are searched in-process; building the
+        # index may embed memories, so it runs off the event loop
+        index = await run_in_threadpool(
+            MEMORY_INDEX.get,
+            user.id,
+            get_memory_index_model(request),
+            Memories.get_memories_by_user_id(user.id) or [],
+            lambda contents: request.app.state.EMBEDDING_FUNCTION(contents, user=user),
+            lambda: VECTOR_DB_CLIENT.get(
+                collection_name=f"user-memory-{user.id}", include_vectors=True
+            ),
+        )
+        if index is not None:
+            return index.search(vector, form_data.k)
+
     results = VECTOR_DB_CLIENT.search(
         collection_name=f"user-memory-{user.id}",
-        vectors=[request.app.state.EMBEDDING_FUNCTION(form_data.content, user=user)],
+        vectors=[vector],
         limit=form_data.k,
     )
 
@@ -99,23 +123,32 @@ async def reset_memory_from_vector_db(
     request: Request, user=Depends(get_verified_user)
 ):
     VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
+    MEMORY_INDEX.invalidate(user.id)
 
     memories = Memories.get_memories_by_user_id(user.id)
+
+    # Embed all memories with batched calls instead of one call per memory
+    vectors = (
+        request.app.state.EMBEDDING_FUNCTION(
+            [memory.content for memory in memories], user=user
+        )
+        if memories
+        else []
+    )
+
     VECTOR_DB_CLIENT.upsert(
         collection_name=f"user-memory-{user.id}",
         items=[
             {
                 "id": memory.id,
                 "text": memory.content,
-                "vector": request.app.state.EMBEDDING_FUNCTION(
-                    memory.content, user=user
-                ),
+                "vector": vector,
                 "metadata": {
                     "created_at": memory.created_at,
                     "updated_at": memory.updated_at,
                 },
             }
-            for memory in memories
+            for memory, vector in zip(memories, vectors)
         ],
     )
 
@@ -132,6 +165,7 @@ async def delete_memory_by_user_id(user=Depends(get_verified_user)):
     result = Memories.delete_memories_by_user_id(user.id)
 
     if result:
+        MEMORY_INDEX.invalidate(user.id)
         try:
             VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
         except Exception as e:
@@ -160,15 +194,14 @@ async def update_memory_by_id(
         raise HTTPException(status_code=404, detail="Memory not found")
 
     if form_data.content is not None:
+        vector = request.app.state.EMBEDDING_FUNCTION(memory.content, user=user)
         VECTOR_DB_CLIENT.upsert(
             collection_name=f"user-memory-{user.id}",
             items=[
                 {
                     "id": memory.id,
                     "text": memory.content,
-                    "vector": request.app.state.EMBEDDING_FUNCTION(
-                        memory.content, user=user
-                    ),
+                    "vector": vector,
                     "metadata": {
                         "created_at": memory.created_at,
                         "updated_at": memory.updated_at,
@@ -176,6 +209,7 @@ async def update_memory_by_id(
                 }
             ],
         )
+        MEMORY_INDEX.upsert(user.id, get_memory_index_model(request), memory, vector)
 
     return memory
 
@@ -193,6 +227,7 @@ async def delete_memory_by_id(memory_id: str, user=Depends(get_verified_user)):
         VECTOR_DB_CLIENT.delete(
             collection_name=f"user-memory-{user.id}", ids=[memory_id]
         )
+        MEMORY_INDEX.delete(user.id, [memory_id])
         return True
 
     return False
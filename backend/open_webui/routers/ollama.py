@@ -282,18 +282,19 @@ class OllamaConfigForm(BaseModel):
 async def update_config(
     request: Request, form_data: OllamaConfigForm, user=Depends(get_admin_user)
 ):
-    request.app.state.config.ENABLE_OLLAMA_API = form_data.ENABLE_OLLAMA_API
-
-    request.app.state.config.OLLAMA_BASE_URLS = form_data.OLLAMA_BASE_URLS
-    request.app.state.config.OLLAMA_API_CONFIGS = form_data.OLLAMA_API_CONFIGS
-
-    # Remove the API configs that are not in the API URLS
-    keys = list(map(str, range(len(request.app.state.config.OLLAMA_BASE_URLS))))
-    request.app.state.config.OLLAMA_API_CONFIGS = {
-        key: value
-        for key, value in request.app.state.config.OLLAMA_API_CONFIGS.items()
-        if key in keys
-    }
+    with request.app.state.config.batch():
+        request.app.state.config.ENABLE_OLLAMA_API = form_data.ENABLE_OLLAMA_API
+
+        request.app.state.config.OLLAMA_BASE_URLS = form_data.OLLAMA_BASE_URLS
+        request.app.state.config.OLLAMA_API_CONFIGS = form_data.OLLAMA_API_CONFIGS
+
+        # Remove the API configs that are not in the API URLS
+        keys = list(map(str, range(len(request.app.state.config.OLLAMA_BASE_URLS))))
+        request.app.state.config.OLLAMA_API_CONFIGS = {
+            key: value
+            for key, value in request.app.state.config.OLLAMA_API_CONFIGS.items()
+            if key in keys
+        }
 
     return {
         "ENABLE_OLLAMA_API": request.app.state.config.ENABLE_OLLAMA_API,
@@ -11,14 +11,21 @@ from fastapi import (
 )
 import aiohttp
 import os
+import hashlib
+import json
 import logging
 import shutil
 import requests
 from pydantic import BaseModel
 from starlette.responses import FileResponse
 from typing import Optional
+from collections import OrderedDict
 
-from open_webui.env import SRC_LOG_LEVELS, AIOHTTP_CLIENT_SESSION_SSL
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    AIOHTTP_CLIENT_SESSION_SSL,
+    ENABLE_PIPELINES_FILTER_BATCHING,
+)
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
 
@@ -57,17 +64,175 @@ def get_sorted_filters(model_id, models):
     return sorted_filters
 
 
-async def process_pipeline_inlet_filter(request, payload, user, models):
-    user = {"id": user.id, "email": user.email, "name": user.name, "role": user.role}
-    model_id = payload["model"]
-    sorted_filters = get_sorted_filters(model_id, models)
-    model = models[model_id]
-
-    if "pipeline" in model:
-        sorted_filters.append(model)
+class PipelinesClient:
+    """
+    Persistent HTTP client for pipelines filters.
+
+    Consecutive filters served by the same pipelines server are run with one
+    request to `POST {url}/filter/{inlet|outlet}/batch`:
+
+        {"user": {...}, "filter_ids": [...], "body": {...},
+         "messages": {"chat_id": ..., "digest": ..., "base": ..., "base_length": n}}
+
+    `messages.digest` identifies the full message list of this call. Once a
+    server has answered with `"message_deltas": true`, `base`/`base_length`
+    are sent as well and `body["messages"]` only holds the messages after
+    the first `base_length` messages of the list sent as `base`. A server
+    that no longer holds that list answers 409 and the full body is resent.
+    Servers without the batch endpoint (404/405) get one request per filter.
+    """
+
+    MAX_CHAT_STATES = 1024
+
+    def __init__(self):
+        self.session: Optional[aiohttp.ClientSession] = None
+        # url -> {"batch": bool, "message_deltas": bool}
+        self.capabilities: dict[str, dict] = {}
+        # (url, filter_type, chat_id) -> running digests of the last sent messages
+        self.message_digests: OrderedDict[tuple, list[str]] = OrderedDict()
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(trust_env=True)
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    @staticmethod
+    def get_message_digests(messages: list[dict]) -> list[str]:
+        digests = []
+        digest = ""
+        for message in messages:
+            digest = hashlib.sha256(
+                (digest + json.dumps(message, sort_keys=True, default=str)).encode()
+            ).hexdigest()
+            digests.append(digest)
+        return digests
+
+    async def post(self, url: str, key: str, request_data: dict):
+        async with self.get_session().post(
+            url,
+            headers={"Authorization": f"Bearer {key}"},
+            json=request_data,
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as response:
+            res = None
+            if "application/json" in (response.content_type or ""):
+                res = await response.json()
+            return response.status, res
+
+    def handle_error(self, status_code: int, res, filter_type: str):
+        # Inlet errors with a detail are surfaced to the user, outlet errors
+        # never fail the completed chat
+        if filter_type == "inlet" and isinstance(res, dict) and "detail" in res:
+            raise Exception(status_code, res["detail"])
+        log.warning(f"Pipeline {filter_type} filter failed ({status_code}): {res}")
+
+    async def run_filter(self, url, key, filter_id, filter_type, user, payload):
+        try:
+            status_code, res = await self.post(
+                f"{url}/{filter_id}/filter/{filter_type}",
+                key,
+                {"user": user, "body": payload},
+            )
+        except Exception as e:
+            log.exception(f"Connection error: {e}")
+            return payload
+
+        if status_code >= 400:
+            self.handle_error(status_code, res, filter_type)
+            return payload
+        return res if res is not None else payload
+
+    async def run_batch(self, url, key, filter_ids, filter_type, user, payload):
+        """
+        Returns the filtered payload, or None if the server has no batch
+        endpoint.
+        """
+        capabilities = self.capabilities.setdefault(url, {})
+
+        chat_id = payload.get("chat_id") or (payload.get("metadata") or {}).get(
+            "chat_id"
+        )
+        messages = payload.get("messages")
+
+        messages_info = None
+        base_digests = None
+        digests = []
+        state_key = (url, filter_type, chat_id)
+        if chat_id and isinstance(messages, list):
+            digests = self.get_message_digests(messages)
+            messages_info = {
+                "chat_id": chat_id,
+                "digest": digests[-1] if digests else "",
+            }
+            if capabilities.get("message_deltas"):
+                base_digests = self.message_digests.get(state_key)
+
+        def get_request_data(base_digests):
+            body = payload
+            info = messages_info
+            if base_digests:
+                base_length = 0
+                for base_digest, digest in zip(base_digests, digests):
+                    if base_digest != digest:
+                        break
+                    base_length += 1
+
+                if base_length:
+                    body = {**payload, "messages": messages[base_length:]}
+                    info = {
+                        **messages_info,
+                        "base": base_digests[-1],
+                        "base_length": base_length,
+                    }
+
+            return {
+                "user": user,
+                "filter_ids": filter_ids,
+                "body": body,
+                **({"messages": info} if info else {}),
+            }
 
-    async with aiohttp.ClientSession(trust_env=True) as session:
-        for filter in sorted_filters:
+        try:
+            batch_url = f"{url}/filter/{filter_type}/batch"
+            status_code, res = await self.post(
+                batch_url, key, get_request_data(base_digests)
+            )
+            if status_code == 409 and base_digests:
+                # The server lost the base history, resend it in full
+                status_code, res = await self.post(
+                    batch_url, key, get_request_data(None)
+                )
+        except Exception as e:
+            log.exception(f"Connection error: {e}")
+            return payload
+
+        if status_code in (404, 405):
+            capabilities["batch"] = False
+            return None
+
+        capabilities["batch"] = True
+        if status_code >= 400 or not isinstance(res, dict):
+            self.handle_error(status_code, res, filter_type)
+            return payload
+
+        capabilities["message_deltas"] = bool(res.get("message_deltas"))
+        if messages_info:
+            self.message_digests[state_key] = digests
+            self.message_digests.move_to_end(state_key)
+            while len(self.message_digests) > self.MAX_CHAT_STATES:
+                self.message_digests.popitem(last=False)
+
+        return res.get("body", payload)
+
+    async def run_filters(self, request, filters, filter_type, user, payload):
+        # Group consecutive filters by server, which keeps the priority order
+        groups = []
+        for filter in filters:
             urlIdx = filter.get("urlIdx")
 
             try:
@@ -81,89 +246,60 @@ async def process_pipeline_inlet_filter(request, payload, user, models):
             if not key:
                 continue
 
-            headers = {"Authorization": f"Bearer {key}"}
-            request_data = {
-                "user": user,
-                "body": payload,
-            }
+            if groups and groups[-1][0] == urlIdx:
+                groups[-1][3].append(filter["id"])
+            else:
+                groups.append((urlIdx, url, key, [filter["id"]]))
+
+        for _, url, key, filter_ids in groups:
+            if (
+                ENABLE_PIPELINES_FILTER_BATCHING
+                and self.capabilities.get(url, {}).get("batch") is not False
+            ):
+                result = await self.run_batch(
+                    url, key, filter_ids, filter_type, user, payload
+                )
+                if result is not None:
+                    payload = result
+                    continue
 
-            try:
-                async with session.post(
-                    f"{url}/{filter['id']}/filter/inlet",
-                    headers=headers,
-                    json=request_data,
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                ) as response:
-                    payload = await response.json()
-                    response.raise_for_status()
-            except aiohttp.ClientResponseError as e:
-                res = (
-                    await response.json()
-                    if response.content_type == "application/json"
-                    else {}
+            for filter_id in filter_ids:
+                payload = await self.run_filter(
+                    url, key, filter_id, filter_type, user, payload
                 )
-                if "detail" in res:
-                    raise Exception(response.status, res["detail"])
-            except Exception as e:
-                log.exception(f"Connection error: {e}")
 
-    return payload
+        return payload
 
 
-async def process_pipeline_outlet_filter(request, payload, user, models):
+PIPELINES_CLIENT = PipelinesClient()
+
+
+async def process_pipeline_inlet_filter(request, payload, user, models):
     user = {"id": user.id, "email": user.email, "name": user.name, "role": user.role}
     model_id = payload["model"]
     sorted_filters = get_sorted_filters(model_id, models)
     model = models[model_id]
 
     if "pipeline" in model:
-        sorted_filters = [model] + sorted_filters
-
-    async with aiohttp.ClientSession(trust_env=True) as session:
-        for filter in sorted_filters:
-            urlIdx = filter.get("urlIdx")
+        sorted_filters.append(model)
 
-            try:
-                urlIdx = int(urlIdx)
-            except:
-                continue
+    return await PIPELINES_CLIENT.run_filters(
+        request, sorted_filters, "inlet", user, payload
+    )
 
-            url = request.app.state.config.OPENAI_API_BASE_URLS[urlIdx]
-            key = request.app.state.config.OPENAI_API_KEYS[urlIdx]
 
-            if not key:
-                continue
+async def process_pipeline_outlet_filter(request, payload, user, models):
+    user = {"id": user.id, "email": user.email, "name": user.name, "role": user.role}
+    model_id = payload["model"]
+    sorted_filters = get_sorted_filters(model_id, models)
+    model = models[model_id]
 
-            headers = {"Authorization": f"Bearer {key}"}
-            request_data = {
-                "user": user,
-                "body": payload,
-            }
+    if "pipeline" in model:
+        sorted_filters = [model] + sorted_filters
 
-            try:
-                async with session.post(
-                    f"{url}/{filter['id']}/filter/outlet",
-                    headers=headers,
-                    json=request_data,
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                ) as response:
-                    payload = await response.json()
-                    response.raise_for_status()
-            except aiohttp.ClientResponseError as e:
-                try:
-                    res = (
-                        await response.json()
-                        if "application/json" in response.content_type
-                        else {}
-                    )
-                    if "detail" in res:
-                        raise Exception(response.status, res)
-                except Exception:
-                    pass
-            except Exception as e:
-                log.exception(f"Connection error: {e}")
-
-    return payload
+    return await PIPELINES_CLIENT.run_filters(
+        request, sorted_filters, "outlet", user, payload
+    )
 
 
 ##################################
@@ -3,6 +3,7 @@ import socketio
 import logging
 import sys
 import time
+import weakref
 from redis import asyncio as aioredis
 
 from open_webui.models.users import Users, UserNameResponse
@@ -20,9 +21,19 @@ from open_webui.env import (
     WEBSOCKET_REDIS_LOCK_TIMEOUT,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
+    WEBSOCKET_SESSION_TTL,
+    WEBSOCKET_EVENT_MAX_FRAMES_PER_SECOND,
+    WEBSOCKET_EVENT_KEYFRAME_INTERVAL,
+    WEBSOCKET_COMPRESSION_THRESHOLD,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock
+from open_webui.socket.utils import (
+    AsyncRedisLock,
+    ChatEventCoalescer,
+    LocalSocketPool,
+    RedisSocketPool,
+    changes_message_content,
+)
 
 from open_webui.env import (
     GLOBAL_LOG_LEVEL,
@@ -51,6 +62,7 @@ if WEBSOCKET_MANAGER == "redis":
         allow_upgrades=ENABLE_WEBSOCKET_SUPPORT,
         always_connect=True,
         client_manager=mgr,
+        compression_threshold=WEBSOCKET_COMPRESSION_THRESHOLD,
     )
 else:
     sio = socketio.AsyncServer(
@@ -59,36 +71,29 @@ else:
         transports=(["websocket"] if ENABLE_WEBSOCKET_SUPPORT else ["polling"]),
         allow_upgrades=ENABLE_WEBSOCKET_SUPPORT,
         always_connect=True,
+        compression_threshold=WEBSOCKET_COMPRESSION_THRESHOLD,
     )
 
 
 # Timeout duration in seconds
 TIMEOUT_DURATION = 3
 
-# Dictionary to maintain the user pool
+# Session, user and model usage bookkeeping
 
 if WEBSOCKET_MANAGER == "redis":
     log.debug("Using Redis to manage websockets.")
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
     )
-    SESSION_POOL = RedisDict(
-        "open-webui:session_pool",
-        redis_url=WEBSOCKET_REDIS_URL,
-        redis_sentinels=redis_sentinels,
-    )
-    USER_POOL = RedisDict(
-        "open-webui:user_pool",
-        redis_url=WEBSOCKET_REDIS_URL,
-        redis_sentinels=redis_sentinels,
-    )
-    USAGE_POOL = RedisDict(
-        "open-webui:usage_pool",
+    SOCKET_POOL = RedisSocketPool(
+        "open-webui:socket",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
+        usage_timeout=TIMEOUT_DURATION,
+        session_ttl=WEBSOCKET_SESSION_TTL,
     )
 
-    clean_up_lock = RedisLock(
+    clean_up_lock = AsyncRedisLock(
         redis_url=WEBSOCKET_REDIS_URL,
         lock_name="usage_cleanup_lock",
         timeout_secs=WEBSOCKET_REDIS_LOCK_TIMEOUT,
@@ -98,51 +103,35 @@ if WEBSOCKET_MANAGER == "redis":
     renew_func = clean_up_lock.renew_lock
     release_func = clean_up_lock.release_lock
 else:
-    SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
-    aquire_func = release_func = renew_func = lambda: True
+    SOCKET_POOL = LocalSocketPool(usage_timeout=TIMEOUT_DURATION)
+
+    async def aquire_func():
+        return True
+
+    release_func = renew_func = aquire_func
 
 
 async def periodic_usage_pool_cleanup():
-    if not aquire_func():
+    if not await aquire_func():
         log.debug("Usage pool cleanup lock already exists. Not running it.")
         return
     log.debug("Running periodic_usage_pool_cleanup")
     try:
         while True:
-            if not renew_func():
+            if not await renew_func():
                 log.error(f"Unable to renew cleanup lock. Exiting usage pool cleanup.")
                 raise Exception("Unable to renew usage pool cleanup lock.")
 
-            now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
-                # Creating a list of sids to remove if they have timed out
-                expired_sids = [
-                    sid
-                    for sid, details in connections.items()
-                    if now - details["updated_at"] > TIMEOUT_DURATION
-                ]
-
-                for sid in expired_sids:
-                    del connections[sid]
-
-                if not connections:
-                    log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
-
-                send_usage = True
+            # Expired entries are dropped by score, no need to walk every session
+            send_usage = await SOCKET_POOL.cleanup_usage()
 
             if send_usage:
                 # Emit updated usage information after cleaning
-                await sio.emit("usage", {"models": get_models_in_use()})
+                await sio.emit("usage", {"models": await get_models_in_use()})
 
             await asyncio.sleep(TIMEOUT_DURATION)
     finally:
-        release_func()
+        await release_func()
 
 
 app = socketio.ASGIApp(
@@ -151,27 +140,21 @@ app = socketio.ASGIApp(
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
-    return models_in_use
+    return await SOCKET_POOL.get_models_in_use()
 
 
 @sio.on("usage")
 async def usage(sid, data):
-    if sid in SESSION_POOL:
+    if await SOCKET_POOL.has_session(sid):
         model_id = data["model"]
-        # Record the timestamp for the last update
-        current_time = int(time.time())
 
-        # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
+        # Record the timestamp for the last update
+        await SOCKET_POOL.update_usage(model_id, sid)
 
         # Broadcast the usage data to all clients
-        await sio.emit("usage", {"models": get_models_in_use()})
+        await sio.emit("usage", {"models": await get_models_in_use()})
 
 
 @sio.event
@@ -184,15 +167,12 @@ async def connect(sid, environ, auth):
             user = Users.get_user_by_id(data["id"])
 
         if user:
-            SESSION_POOL[sid] = user.model_dump()
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await SOCKET_POOL.add_session(sid, user.model_dump())
+            await sio.enter_room(sid, f"user:{user.id}")
 
             # print(f"user {user.name}({user.id}) connected with session ID {sid}")
-            await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
-            await sio.emit("usage", {"models": get_models_in_use()})
+            await sio.emit("user-list", {"user_ids": await SOCKET_POOL.get_user_ids()})
+            await sio.emit("usage", {"models": await get_models_in_use()})
 
 
 @sio.on("user-join")
@@ -210,11 +190,8 @@ async def user_join(sid, data):
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump()
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    await SOCKET_POOL.add_session(sid, user.model_dump())
+    await sio.enter_room(sid, f"user:{user.id}")
 
     # Join all the channels
     channels = Channels.get_channels_by_user_id(user.id)
@@ -224,7 +201,7 @@ async def user_join(sid, data):
 
     # print(f"user {user.name}({user.id}) connected with session ID {sid}")
 
-    await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    await sio.emit("user-list", {"user_ids": await SOCKET_POOL.get_user_ids()})
     return {"id": user.id, "name": user.name}
 
 
@@ -271,66 +248,63 @@ async def channel_events(sid, data):
                 "channel_id": data["channel_id"],
                 "message_id": data.get("message_id", None),
                 "data": event_data,
-                "user": UserNameResponse(**SESSION_POOL[sid]).model_dump(),
+                "user": UserNameResponse(
+                    **(await SOCKET_POOL.get_session(sid))
+                ).model_dump(),
             },
             room=room,
         )
 
 
+@sio.on("heartbeat")
+async def heartbeat(sid, data=None):
+    # Keeps the session's Redis entries from expiring
+    await SOCKET_POOL.refresh_session(sid)
+
+
 @sio.on("user-list")
 async def user_list(sid):
-    if sid in SESSION_POOL:
-        await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    if await SOCKET_POOL.has_session(sid):
+        await sio.emit("user-list", {"user_ids": await SOCKET_POOL.get_user_ids()})
 
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
-
-        user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
-
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
-
-        await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    user = await SOCKET_POOL.remove_session(sid)
+    if user:
+        await sio.emit("user-list", {"user_ids": await SOCKET_POOL.get_user_ids()})
     else:
         pass
         # print(f"Unknown session ID {sid} disconnected")
 
 
-def get_event_emitter(request_info, update_db=True):
+# Coalescing emitter of each streamed (chat_id, message_id), while it is alive
+CHAT_EVENT_COALESCERS = weakref.WeakValueDictionary()
+
+
+def get_event_emitter(request_info, update_db=True, coalesce=False):
     async def __event_emitter__(event_data):
         user_id = request_info["user_id"]
 
-        session_ids = list(
-            set(
-                USER_POOL.get(user_id, [])
-                + (
+        # Every session of the user is in its "user:<id>" room, so a single
+        # emit (and a single Redis manager publish) reaches all of them.
+        await sio.emit(
+            "chat-events",
+            {
+                "chat_id": request_info.get("chat_id", None),
+                "message_id": request_info.get("message_id", None),
+                "data": event_data,
+            },
+            to=[
+                f"user:{user_id}",
+                *(
                     [request_info.get("session_id")]
                     if request_info.get("session_id")
                     else []
-                )
-            )
+                ),
+            ],
         )
 
-        emit_tasks = [
-            sio.emit(
-                "chat-events",
-                {
-                    "chat_id": request_info.get("chat_id", None),
-                    "message_id": request_info.get("message_id", None),
-                    "data": event_data,
-                },
-                to=session_id,
-            )
-            for session_id in session_ids
-        ]
-
-        await asyncio.gather(*emit_tasks)
-
         if update_db:
             if "type" in event_data and event_data["type"] == "status":
                 Chats.add_message_status_to_chat_by_id_and_message_id(
@@ -368,7 +342,37 @@ def get_event_emitter(request_info, update_db=True):
                     },
                 )
 
-    return __event_emitter__
+    key = (request_info.get("chat_id"), request_info.get("message_id"))
+
+    if coalesce:
+        coalescer = ChatEventCoalescer(
+            __event_emitter__,
+            max_frames_per_second=WEBSOCKET_EVENT_MAX_FRAMES_PER_SECOND,
+            # Without rate limiting every frame carries the full content
+            keyframe_interval=(
+                WEBSOCKET_EVENT_KEYFRAME_INTERVAL
+                if WEBSOCKET_EVENT_MAX_FRAMES_PER_SECOND > 0
+                else 1
+            ),
+            get_session_ids=lambda: SOCKET_POOL.get_user_session_ids(
+                request_info["user_id"]
+            ),
+        )
+        if key[1]:
+            CHAT_EVENT_COALESCERS[key] = coalescer
+        return coalescer
+
+    async def __uncoalesced_event_emitter__(event_data):
+        await __event_emitter__(event_data)
+
+        # Tools and functions emit through their own emitter, content they
+        # send resets what the coalescer's deltas are based on
+        if changes_message_content(event_data):
+            coalescer = CHAT_EVENT_COALESCERS.get(key)
+            if coalescer is not None:
+                coalescer.invalidate()
+
+    return __uncoalesced_event_emitter__
 
 
 def get_event_call(request_info):
@@ -390,28 +394,25 @@ def get_event_call(request_info):
 get_event_caller = get_event_call
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await SOCKET_POOL.get_session(sid)
     if user:
         return user["id"]
     return None
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = sio.manager.get_participants(
         namespace="/",
         room=room,
     )
 
-    active_user_ids = list(
-        set(
-            [SESSION_POOL.get(session_id[0])["id"] for session_id in active_session_ids]
-        )
+    sessions = await SOCKET_POOL.get_sessions(
+        [session_id[0] for session_id in active_session_ids]
     )
+    active_user_ids = list(set([session["id"] for session in sessions if session]))
     return active_user_ids
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
-        return True
-    return False
+async def get_active_status_by_user_id(user_id):
+    return await SOCKET_POOL.is_user_active(user_id)
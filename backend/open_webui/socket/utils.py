@@ -1,91 +1,449 @@
+import asyncio
 import json
+import time
 import uuid
-from open_webui.utils.redis import get_redis_connection
+from typing import Optional
 
+from open_webui.utils.redis import get_async_redis_connection
 
-class RedisLock:
+
+class AsyncRedisLock:
     def __init__(self, redis_url, lock_name, timeout_secs, redis_sentinels=[]):
         self.lock_name = lock_name
         self.lock_id = str(uuid.uuid4())
         self.timeout_secs = timeout_secs
         self.lock_obtained = False
-        self.redis = get_redis_connection(
+        self.redis = get_async_redis_connection(
             redis_url, redis_sentinels, decode_responses=True
         )
 
-    def aquire_lock(self):
+    async def aquire_lock(self):
         # nx=True will only set this key if it _hasn't_ already been set
-        self.lock_obtained = self.redis.set(
+        self.lock_obtained = await self.redis.set(
             self.lock_name, self.lock_id, nx=True, ex=self.timeout_secs
         )
         return self.lock_obtained
 
-    def renew_lock(self):
+    async def renew_lock(self):
         # xx=True will only set this key if it _has_ already been set
-        return self.redis.set(
+        return await self.redis.set(
             self.lock_name, self.lock_id, xx=True, ex=self.timeout_secs
         )
 
-    def release_lock(self):
-        lock_value = self.redis.get(self.lock_name)
+    async def release_lock(self):
+        lock_value = await self.redis.get(self.lock_name)
         if lock_value and lock_value == self.lock_id:
-            self.redis.delete(self.lock_name)
+            await self.redis.delete(self.lock_name)
+
+
+class LocalSocketPool:
+    """
+    In-process session/user/usage bookkeeping, used when websockets are not
+    managed through Redis. Exposes the same async interface as RedisSocketPool.
+    """
+
+    def __init__(self, usage_timeout: int):
+        self.usage_timeout = usage_timeout
+        self.sessions = {}
+        self.user_sessions = {}
+        self.usage = {}
+
+    async def add_session(self, sid, user: dict):
+        self.sessions[sid] = user
+        self.user_sessions.setdefault(user["id"], set()).add(sid)
+
+    async def refresh_session(self, sid) -> bool:
+        return sid in self.sessions
+
+    async def get_session(self, sid) -> Optional[dict]:
+        return self.sessions.get(sid)
+
+    async def get_sessions(self, sids: list) -> list[Optional[dict]]:
+        return [self.sessions.get(sid) for sid in sids]
+
+    async def has_session(self, sid) -> bool:
+        return sid in self.sessions
+
+    async def remove_session(self, sid) -> Optional[dict]:
+        user = self.sessions.pop(sid, None)
+        if user:
+            sids = self.user_sessions.get(user["id"], set())
+            sids.discard(sid)
+            if not sids:
+                self.user_sessions.pop(user["id"], None)
+        return user
+
+    async def get_user_session_ids(self, user_id) -> list[str]:
+        return list(self.user_sessions.get(user_id, ()))
+
+    async def get_user_ids(self) -> list[str]:
+        return list(self.user_sessions.keys())
+
+    async def is_user_active(self, user_id) -> bool:
+        return user_id in self.user_sessions
+
+    async def update_usage(self, model_id, sid):
+        self.usage[model_id] = int(time.time())
+
+    async def get_models_in_use(self) -> list[str]:
+        now = int(time.time())
+        return [
+            model_id
+            for model_id, updated_at in self.usage.items()
+            if now - updated_at <= self.usage_timeout
+        ]
+
+    async def cleanup_usage(self) -> bool:
+        now = int(time.time())
+        expired = [
+            model_id
+            for model_id, updated_at in self.usage.items()
+            if now - updated_at > self.usage_timeout
+        ]
+        for model_id in expired:
+            del self.usage[model_id]
+        return bool(expired) or bool(self.usage)
+
+
+class RedisSocketPool:
+    """
+    Redis-backed session/user/usage bookkeeping for the socket layer.
 
+    Instead of one hash per pool with JSON values, state is spread over small
+    per-session and per-user keys so it shards across a Redis cluster:
 
-class RedisDict:
-    def __init__(self, name, redis_url, redis_sentinels=[]):
-        self.name = name
-        self.redis = get_redis_connection(
+    - `<prefix>:session:{<sid>}`: JSON encoded user of a session
+    - `<prefix>:user:{<user_id>}:sessions`: sorted set of the session ids of
+      a user, scored by their last heartbeat
+    - `<prefix>:users`: sorted set of user ids scored by their last heartbeat
+    - `<prefix>:usage`: sorted set of model ids scored by last usage time
+
+    Session and user keys carry a hash tag, and multi-command transactions
+    only ever touch a single key, so no command spans two hash slots.
+    Every key expires `session_ttl` seconds after the last heartbeat of its
+    sessions, so entries of a crashed worker do not linger forever.
+    """
+
+    def __init__(
+        self,
+        prefix,
+        redis_url,
+        redis_sentinels=[],
+        usage_timeout: int = 3,
+        session_ttl: int = 120,
+    ):
+        self.prefix = prefix
+        self.usage_timeout = usage_timeout
+        self.session_ttl = session_ttl
+        self.redis = get_async_redis_connection(
             redis_url, redis_sentinels, decode_responses=True
         )
 
-    def __setitem__(self, key, value):
-        serialized_value = json.dumps(value)
-        self.redis.hset(self.name, key, serialized_value)
+    def _session_key(self, sid):
+        return f"{self.prefix}:session:{{{sid}}}"
+
+    def _user_sessions_key(self, user_id):
+        return f"{self.prefix}:user:{{{user_id}}}:sessions"
+
+    @property
+    def _users_key(self):
+        return f"{self.prefix}:users"
+
+    @property
+    def _usage_key(self):
+        return f"{self.prefix}:usage"
+
+    def _expired_before(self) -> int:
+        return int(time.time()) - self.session_ttl
+
+    async def _touch(self, sid, user_id, user: Optional[dict] = None):
+        now = int(time.time())
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if user is not None:
+                pipe.set(self._session_key(sid), json.dumps(user), ex=self.session_ttl)
+            else:
+                pipe.expire(self._session_key(sid), self.session_ttl)
+            pipe.zadd(self._user_sessions_key(user_id), {sid: now})
+            pipe.expire(self._user_sessions_key(user_id), self.session_ttl)
+            pipe.zadd(self._users_key, {user_id: now})
+            pipe.expire(self._users_key, self.session_ttl)
+            await pipe.execute()
+
+    async def add_session(self, sid, user: dict):
+        await self._touch(sid, user["id"], user)
+
+    async def refresh_session(self, sid) -> bool:
+        user = await self.get_session(sid)
+        if user is None:
+            return False
+        await self._touch(sid, user["id"])
+        return True
 
-    def __getitem__(self, key):
-        value = self.redis.hget(self.name, key)
+    async def get_session(self, sid) -> Optional[dict]:
+        value = await self.redis.get(self._session_key(sid))
+        return json.loads(value) if value is not None else None
+
+    async def get_sessions(self, sids: list) -> list[Optional[dict]]:
+        if not sids:
+            return []
+        # One GET per key instead of MGET, the keys live in different slots
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for sid in sids:
+                pipe.get(self._session_key(sid))
+            values = await pipe.execute()
+        return [json.loads(v) if v is not None else None for v in values]
+
+    async def has_session(self, sid) -> bool:
+        return bool(await self.redis.exists(self._session_key(sid)))
+
+    async def remove_session(self, sid) -> Optional[dict]:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.get(self._session_key(sid))
+            pipe.delete(self._session_key(sid))
+            value, _ = await pipe.execute()
         if value is None:
-            raise KeyError(key)
-        return json.loads(value)
+            return None
 
-    def __delitem__(self, key):
-        result = self.redis.hdel(self.name, key)
-        if result == 0:
-            raise KeyError(key)
+        user = json.loads(value)
+        user_sessions_key = self._user_sessions_key(user["id"])
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(user_sessions_key, sid)
+            pipe.zremrangebyscore(
+                user_sessions_key, "-inf", f"({self._expired_before()}"
+            )
+            pipe.zcard(user_sessions_key)
+            _, _, remaining = await pipe.execute()
 
-    def __contains__(self, key):
-        return self.redis.hexists(self.name, key)
+        if not remaining:
+            # A session of the user connecting concurrently on another worker
+            # re-adds the user with its next heartbeat
+            await self.redis.zrem(self._users_key, user["id"])
+        return user
 
-    def __len__(self):
-        return self.redis.hlen(self.name)
+    async def get_user_session_ids(self, user_id) -> list[str]:
+        return list(
+            await self.redis.zrangebyscore(
+                self._user_sessions_key(user_id), self._expired_before(), "+inf"
+            )
+        )
 
-    def keys(self):
-        return self.redis.hkeys(self.name)
+    async def get_user_ids(self) -> list[str]:
+        return list(
+            await self.redis.zrangebyscore(
+                self._users_key, self._expired_before(), "+inf"
+            )
+        )
 
-    def values(self):
-        return [json.loads(v) for v in self.redis.hvals(self.name)]
+    async def is_user_active(self, user_id) -> bool:
+        return bool(
+            await self.redis.zcount(
+                self._user_sessions_key(user_id), self._expired_before(), "+inf"
+            )
+        )
+
+    async def update_usage(self, model_id, sid):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self._usage_key, {model_id: int(time.time())})
+            pipe.expire(self._usage_key, self.usage_timeout + 1)
+            await pipe.execute()
+
+    async def get_models_in_use(self) -> list[str]:
+        return list(
+            await self.redis.zrangebyscore(
+                self._usage_key, int(time.time()) - self.usage_timeout, "+inf"
+            )
+        )
 
-    def items(self):
-        return [(k, json.loads(v)) for k, v in self.redis.hgetall(self.name).items()]
+    async def cleanup_usage(self) -> bool:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(
+                self._usage_key, "-inf", f"({int(time.time()) - self.usage_timeout}"
+            )
+            pipe.zcard(self._usage_key)
+            pipe.zremrangebyscore(self._users_key, "-inf", f"({self._expired_before()}")
+            removed, remaining, _ = await pipe.execute()
+        return bool(removed) or bool(remaining)
+
+
+def get_common_prefix_length(a: str, b: str) -> int:
+    if b.startswith(a):
+        return len(a)
+
+    # Binary search on slice equality, comparisons run in C
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def get_utf16_length(value: str) -> int:
+    # Offsets are sent in UTF-16 code units, which is what JS strings index by
+    return len(value.encode("utf-16-le")) // 2
+
+
+def changes_message_content(event_data) -> bool:
+    """Whether the client replaces or appends to the message content."""
+    event_type = event_data.get("type")
+    data = event_data.get("data")
+    if event_type in ("chat:message:delta", "message", "chat:message", "replace"):
+        return True
+    return (
+        event_type == "chat:completion"
+        and isinstance(data, dict)
+        and ("content" in data or "choices" in data)
+    )
+
+
+class ChatEventCoalescer:
+    """
+    Wraps a chat event emitter and rate limits streamed content frames.
+
+    `chat:completion` events that only carry the serialized message `content`
+    are buffered and flushed at most `max_frames_per_second` times per second
+    (every frame is flushed when it is 0). The content may be given as a
+    callable, which is only evaluated when a frame is actually sent, so
+    callers can skip serializing intermediate states altogether.
+
+    Flushed frames carry only the changed tail of the content as
+    `content_offset`/`content_delta`, along with `content_length`, the length
+    of the content the delta applies to, so clients can drop deltas that do
+    not match what they have. The full content is sent instead as a keyframe
+    every `keyframe_interval`-th frame, on the first frame after a new session
+    of the user shows up in `get_session_ids` and after the client content
+    was changed by any other event. Any other event flushes the buffered
+    content first, so ordering is preserved.
+    """
+
+    SESSION_CHECK_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        emit,
+        max_frames_per_second: float,
+        keyframe_interval: int,
+        get_session_ids=None,
+    ):
+        self.emit = emit
+        self.interval = 1 / max_frames_per_second if max_frames_per_second > 0 else 0
+        self.keyframe_interval = max(keyframe_interval, 1)
+        self.get_session_ids = get_session_ids
+
+        self.pending = None
+        self.sent_content = None
+        self.sent_length = 0
+        self.frames = 0
+        self.last_flush_at = 0.0
+
+        self.session_ids = None
+        self.sessions_checked_at = 0.0
+
+        self.lock = asyncio.Lock()
+        self.flush_task = None
+
+    @staticmethod
+    def is_content_frame(event_data) -> bool:
+        return (
+            event_data.get("type") == "chat:completion"
+            and isinstance(event_data.get("data"), dict)
+            and event_data["data"].keys() == {"content"}
+            and (
+                isinstance(event_data["data"]["content"], str)
+                or callable(event_data["data"]["content"])
+            )
+        )
+
+    def invalidate(self):
+        """The client content changed elsewhere, send a keyframe next."""
+        self.sent_content = None
+
+    async def __call__(self, event_data):
+        if self.is_content_frame(event_data):
+            self.pending = event_data["data"]["content"]
+
+            delay = self.last_flush_at + self.interval - time.monotonic()
+            if delay <= 0:
+                await self.flush()
+            elif self.flush_task is None:
+                self.flush_task = asyncio.create_task(self._flush_later(delay))
+            return
+
+        await self.flush()
+
+        data = event_data.get("data")
+        if (
+            event_data.get("type") == "chat:completion"
+            and isinstance(data, dict)
+            and isinstance(data.get("content"), str)
+        ):
+            self._set_sent_content(data["content"])
+        elif changes_message_content(event_data):
+            self.invalidate()
+
+        await self.emit(event_data)
+
+    async def _flush_later(self, delay: float):
+        await asyncio.sleep(delay)
+        self.flush_task = None
+        await self.flush()
+
+    async def _has_new_sessions(self) -> bool:
+        now = time.monotonic()
+        if (
+            self.get_session_ids is None
+            or now - self.sessions_checked_at < self.SESSION_CHECK_INTERVAL
+        ):
+            return False
+        self.sessions_checked_at = now
 
-    def get(self, key, default=None):
         try:
-            return self[key]
-        except KeyError:
-            return default
-
-    def clear(self):
-        self.redis.delete(self.name)
-
-    def update(self, other=None, **kwargs):
-        if other is not None:
-            for k, v in other.items() if hasattr(other, "items") else other:
-                self[k] = v
-        for k, v in kwargs.items():
-            self[k] = v
-
-    def setdefault(self, key, default=None):
-        if key not in self:
-            self[key] = default
-        return self[key]
+            session_ids = set(await self.get_session_ids())
+        except Exception:
+            return False
+
+        joined = self.session_ids is not None and not session_ids <= self.session_ids
+        self.session_ids = session_ids
+        return joined
+
+    def _set_sent_content(self, content: str):
+        self.sent_content = content
+        self.sent_length = get_utf16_length(content)
+
+    async def flush(self):
+        async with self.lock:
+            if self.flush_task is not None:
+                self.flush_task.cancel()
+                self.flush_task = None
+
+            if self.pending is None:
+                return
+
+            content, self.pending = self.pending, None
+            if callable(content):
+                content = content()
+
+            if content == self.sent_content:
+                return
+
+            if (
+                await self._has_new_sessions()
+                or self.sent_content is None
+                or self.frames % self.keyframe_interval == 0
+            ):
+                data = {"content": content}
+            else:
+                offset = get_common_prefix_length(self.sent_content, content)
+                data = {
+                    "content_offset": get_utf16_length(content[:offset]),
+                    "content_length": self.sent_length,
+                    "content_delta": content[offset:],
+                }
+
+            self.frames += 1
+            self._set_sent_content(content)
+            self.last_flush_at = time.monotonic()
+
+            await self.emit({"type": "chat:completion", "data": data})
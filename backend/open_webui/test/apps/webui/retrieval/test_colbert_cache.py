@@ -0,0 +1,107 @@
+import os
+
+import pytest
+import torch
+
+from open_webui.retrieval.models import colbert
+from open_webui.retrieval.models.colbert import ColBERT
+
+
+class FakeCheckpoint:
+    """
+    Encodes each document as one [1, position] row per character, zero
+    padded to the longest document like docFromText, recording the texts of
+    every call.
+    """
+
+    def __init__(self, name, colbert_config=None):
+        self.calls = []
+
+    def to(self, device):
+        return self
+
+    def docFromText(self, texts, bsize=None):
+        self.calls.append(list(texts))
+        embeddings = torch.zeros(len(texts), max(map(len, texts)), 2)
+        for idx, text in enumerate(texts):
+            for position in range(len(text)):
+                embeddings[idx, position] = torch.tensor([1.0, float(position)])
+        return (embeddings,)
+
+
+@pytest.fixture(autouse=True)
+def fake_checkpoint(monkeypatch):
+    monkeypatch.setattr(colbert, "Checkpoint", FakeCheckpoint)
+    monkeypatch.setattr(colbert, "ColBERTConfig", lambda **kwargs: None)
+
+
+def test_strips_padding():
+    model = ColBERT("model")
+
+    short, long = model.get_document_embeddings(["a", "abc"])
+
+    assert short.shape == (1, 2)
+    assert long.shape == (3, 2)
+    assert long.dtype == torch.float16
+    assert long[:, 1].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_without_cache_every_call_encodes():
+    model = ColBERT("model")
+
+    model.get_document_embeddings(["a"])
+    model.get_document_embeddings(["a"])
+
+    assert model.ckpt.calls == [["a"], ["a"]]
+    assert model.cache_documents(["a"]) is None
+
+
+def test_cache_hit_and_miss(tmp_path):
+    model = ColBERT("model", cache_dir=str(tmp_path))
+    model.get_document_embeddings(["a", "bb"])
+
+    # A new process with the same cache only encodes what it has not seen
+    model = ColBERT("model", cache_dir=str(tmp_path))
+    embeddings = model.get_document_embeddings(["bb", "ccc", "a", "ccc"])
+
+    assert model.ckpt.calls == [["ccc"]]
+    assert [tuple(e.shape) for e in embeddings] == [(2, 2), (3, 2), (1, 2), (3, 2)]
+
+    # The cache is per model
+    other = ColBERT("other", cache_dir=str(tmp_path))
+    other.get_document_embeddings(["a"])
+    assert other.ckpt.calls == [["a"]]
+
+
+def test_cache_documents_runs_in_background(tmp_path):
+    model = ColBERT("model", cache_dir=str(tmp_path))
+
+    model.cache_documents(["a", "bb", "ccc"], batch_size=2).result()
+
+    assert model.ckpt.calls == [["a", "bb"], ["ccc"]]
+    model.get_document_embeddings(["ccc", "a"])
+    assert len(model.ckpt.calls) == 2
+
+
+def test_prunes_least_recently_used_entries(tmp_path):
+    model = ColBERT("model", cache_dir=str(tmp_path))
+    model.get_document_embeddings(["a"])
+    model.get_document_embeddings(["b"])
+
+    path_a, path_b, path_c = (
+        model._cache_path(colbert.hashlib.sha256(doc.encode()).hexdigest())
+        for doc in "abc"
+    )
+    entry_size = os.path.getsize(path_a)
+    model.cache_max_size = int(entry_size * 2.5)
+    os.utime(path_a, (1000, 1000))
+    os.utime(path_b, (2000, 2000))
+
+    # Reading "a" makes "b" the least recently used entry
+    model.get_document_embeddings(["a"])
+    model.get_document_embeddings(["c"])
+
+    assert os.path.exists(path_a)
+    assert not os.path.exists(path_b)
+    assert os.path.exists(path_c)
+    assert model._cache_size == entry_size * 2
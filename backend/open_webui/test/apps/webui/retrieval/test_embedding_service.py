@@ -0,0 +1,76 @@
+import threading
+import time
+
+from open_webui.retrieval.embedding_service import LocalEmbeddingService
+
+
+class FakeModel:
+    """Embeds each text as [len(text)], recording the texts of every call."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        time.sleep(self.delay)
+        return [[float(len(text))] for text in texts]
+
+
+def test_encodes_single_text_and_lists():
+    service = LocalEmbeddingService(max_batch_size=8, max_wait_ms=0)
+    model = FakeModel()
+
+    assert service.encode(model, "abc") == [3.0]
+    assert service.encode(model, ["a", "ab"]) == [[1.0], [2.0]]
+    assert service.encode(model, []) == []
+
+
+def test_splits_large_requests_into_slices():
+    service = LocalEmbeddingService(max_batch_size=4, max_wait_ms=0)
+    model = FakeModel()
+
+    texts = ["x" * n for n in range(1, 11)]
+    embeddings = service.encode(model, texts)
+
+    assert embeddings == [[float(n)] for n in range(1, 11)]
+    assert [len(call) for call in model.calls] == [4, 4, 2]
+
+
+def test_queries_do_not_wait_for_whole_bulk_requests():
+    service = LocalEmbeddingService(max_batch_size=2, max_wait_ms=0)
+    model = FakeModel(delay=0.05)
+
+    ingestion = threading.Thread(
+        target=service.encode, args=(model, ["doc"] * 20), daemon=True
+    )
+    ingestion.start()
+    while not model.calls:
+        time.sleep(0.001)
+
+    assert service.encode(model, "query") == [5.0]
+    ingestion.join()
+
+    # The query was encoded right after the slice in progress
+    assert model.calls.index(["query"]) <= 2
+    assert len(model.calls) == 11
+
+
+def test_coalesces_concurrent_small_requests():
+    service = LocalEmbeddingService(max_batch_size=64, max_wait_ms=50)
+    model = FakeModel()
+
+    results = {}
+
+    def encode(text):
+        results[text] = service.encode(model, text)
+
+    threads = [threading.Thread(target=encode, args=("x" * n,)) for n in range(1, 6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"x" * n: [float(n)] for n in range(1, 6)}
+    assert sum(len(call) for call in model.calls) == 5
+    assert len(model.calls) < 5
@@ -0,0 +1,119 @@
+from open_webui.models.memories import MemoryModel
+from open_webui.retrieval.memory_index import MemoryIndex
+from open_webui.retrieval.vector.main import GetResult
+
+VECTORS = {
+    "cats": [1.0, 0.0, 0.0],
+    "dogs": [0.0, 1.0, 0.0],
+    "birds": [0.0, 0.0, 1.0],
+}
+
+
+def memory(id, content):
+    return MemoryModel(
+        id=id, user_id="user", content=content, created_at=1, updated_at=1
+    )
+
+
+class Embedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, contents):
+        self.calls.append(list(contents))
+        return [VECTORS[content] for content in contents]
+
+
+def test_embeds_only_new_or_changed_memories():
+    index = MemoryIndex(max_users=10, max_size=10)
+    embed = Embedder()
+
+    memories = [memory("1", "cats"), memory("2", "dogs")]
+    index.get("user", "model", memories, embed)
+    assert embed.calls == [["cats", "dogs"]]
+
+    memories = [memory("1", "cats"), memory("2", "birds"), memory("3", "dogs")]
+    user_index = index.get("user", "model", memories, embed)
+    assert embed.calls[1:] == [["birds", "dogs"]]
+
+    result = user_index.search(VECTORS["birds"], k=1)
+    assert result.ids == [["2"]]
+    assert result.distances[0][0] == 1.0
+
+
+def test_drops_deleted_memories():
+    index = MemoryIndex(max_users=10, max_size=10)
+    embed = Embedder()
+
+    index.get("user", "model", [memory("1", "cats"), memory("2", "dogs")], embed)
+    user_index = index.get("user", "model", [memory("2", "dogs")], embed)
+
+    assert user_index.ids == ["2"]
+    assert user_index.search(VECTORS["cats"], k=5).ids == [["2"]]
+
+
+def test_seeds_new_index_from_stored_vectors():
+    index = MemoryIndex(max_users=10, max_size=10)
+    embed = Embedder()
+    stored_calls = []
+
+    def get_stored():
+        stored_calls.append(1)
+        return GetResult(
+            ids=[["1", "2", "deleted"]],
+            # Memory 2 was edited after it was stored
+            documents=[["cats", "birds", "dogs"]],
+            metadatas=[[{}, {}, {}]],
+            vectors=[[VECTORS["cats"], VECTORS["birds"], VECTORS["dogs"]]],
+        )
+
+    memories = [memory("1", "cats"), memory("2", "dogs"), memory("3", "birds")]
+    user_index = index.get("user", "model", memories, embed, get_stored)
+
+    assert embed.calls == [["dogs", "birds"]]
+    assert sorted(user_index.ids) == ["1", "2", "3"]
+    assert user_index.search(VECTORS["dogs"], k=1).ids == [["2"]]
+
+    # A cached index is not seeded again
+    index.get("user", "model", memories, embed, get_stored)
+    assert stored_calls == [1]
+
+
+def test_falls_back_when_stored_vectors_are_unavailable():
+    index = MemoryIndex(max_users=10, max_size=10)
+    embed = Embedder()
+
+    def get_stored():
+        raise Exception("Collection not found")
+
+    index.get("user", "model", [memory("1", "cats")], embed, get_stored)
+    assert embed.calls == [["cats"]]
+
+
+def test_skips_users_with_too_many_memories():
+    index = MemoryIndex(max_users=10, max_size=1)
+    embed = Embedder()
+
+    memories = [memory("1", "cats"), memory("2", "dogs")]
+    assert index.get("user", "model", memories, embed) is None
+    assert embed.calls == []
+
+
+def test_evicts_least_recently_used_users():
+    index = MemoryIndex(max_users=2, max_size=10)
+    embed = Embedder()
+
+    for user_id in ["a", "b", "a", "c"]:
+        index.get(user_id, "model", [memory(user_id, "cats")], embed)
+
+    assert list(index.indexes) == ["a", "c"]
+
+
+def test_model_change_rebuilds_index():
+    index = MemoryIndex(max_users=10, max_size=10)
+    embed = Embedder()
+
+    index.get("user", "model", [memory("1", "cats")], embed)
+    index.get("user", "other", [memory("1", "cats")], embed)
+
+    assert embed.calls == [["cats"], ["cats"]]
@@ -0,0 +1,117 @@
+import json
+import struct
+
+import numpy as np
+
+from open_webui.retrieval.vector.dbs import pgvector
+from open_webui.retrieval.vector.dbs.pgvector import COPY_COLUMNS, PgvectorClient
+
+SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+
+
+def decode(buffer) -> list[list]:
+    """Rows of a PostgreSQL binary COPY stream, as lists of bytes or None."""
+    data = buffer.read()
+    assert data[: len(SIGNATURE)] == SIGNATURE
+    # Flags, header extension length
+    assert struct.unpack_from("!ii", data, len(SIGNATURE)) == (0, 0)
+    offset = len(SIGNATURE) + 8
+
+    rows = []
+    while True:
+        (field_count,) = struct.unpack_from("!h", data, offset)
+        offset += 2
+        if field_count == -1:
+            break
+
+        row = []
+        for _ in range(field_count):
+            (length,) = struct.unpack_from("!i", data, offset)
+            offset += 4
+            if length == -1:
+                row.append(None)
+            else:
+                row.append(data[offset : offset + length])
+                offset += length
+        rows.append(row)
+
+    # Nothing after the trailer
+    assert offset == len(data)
+    return rows
+
+
+def decode_vector(value: bytes) -> list[float]:
+    dim, unused = struct.unpack_from("!hh", value)
+    assert unused == 0
+    assert len(value) == 4 + 4 * dim
+    return list(struct.unpack_from(f"!{dim}f", value, 4))
+
+
+def encode(ids, texts, metadatas, vectors):
+    # No database connection is needed to encode rows
+    client = PgvectorClient.__new__(PgvectorClient)
+    return client._encode_copy_rows(
+        "collection", ids, texts, metadatas, np.asarray(vectors, dtype=np.float32)
+    )
+
+
+def test_encodes_rows_in_copy_columns_order(monkeypatch):
+    monkeypatch.setattr(pgvector, "VECTOR_LENGTH", 3)
+
+    rows = decode(
+        encode(
+            ["id-1", 2],
+            ["text", "ünïcode"],
+            [{"source": "a.pdf", "page": 1}, {}],
+            [[0.5, -1.0, 2.0], [1.0, 0.0, 0.25]],
+        )
+    )
+
+    assert len(rows) == 2
+    assert all(len(row) == len(COPY_COLUMNS) for row in rows)
+
+    row_id, vector, collection, text, metadata = rows[0]
+    assert row_id == b"id-1"
+    assert decode_vector(vector) == [0.5, -1.0, 2.0]
+    assert collection == b"collection"
+    assert text == b"text"
+    # jsonb binary format: version 1, then the JSON text
+    assert metadata[:1] == b"\x01"
+    assert json.loads(metadata[1:]) == {"source": "a.pdf", "page": 1}
+
+    row_id, vector, _, text, metadata = rows[1]
+    assert row_id == b"2"
+    assert decode_vector(vector) == [1.0, 0.0, 0.25]
+    assert text == "ünïcode".encode()
+    assert metadata == b"\x01{}"
+
+
+def test_vector_values_are_big_endian_float4(monkeypatch):
+    monkeypatch.setattr(pgvector, "VECTOR_LENGTH", 2)
+
+    [row] = decode(encode(["id"], ["text"], [{}], [[1.0, -2.5]]))
+
+    assert row[1] == struct.pack("!hh", 2, 0) + struct.pack(">ff", 1.0, -2.5)
+
+
+def test_none_text_and_metadata_are_null(monkeypatch):
+    monkeypatch.setattr(pgvector, "VECTOR_LENGTH", 2)
+
+    [row] = decode(encode(["id"], [None], [None], [[1.0, 2.0]]))
+
+    assert row[3] is None
+    assert row[4] is None
+
+
+def test_vectors_are_padded_or_truncated(monkeypatch):
+    monkeypatch.setattr(pgvector, "VECTOR_LENGTH", 4)
+
+    [short] = decode(encode(["id"], ["text"], [{}], [[1.0, 2.0]]))
+    [long] = decode(encode(["id"], ["text"], [{}], [[1.0, 2.0, 3.0, 4.0, 5.0, 6.0]]))
+
+    assert decode_vector(short[1]) == [1.0, 2.0, 0.0, 0.0]
+    assert decode_vector(long[1]) == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_no_rows():
+    assert decode(encode([], [], [], np.zeros((0, 2)))) == []
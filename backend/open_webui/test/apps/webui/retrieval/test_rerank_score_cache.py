@@ -0,0 +1,92 @@
+from open_webui.retrieval.models import external
+from open_webui.retrieval.models.external import ExternalReranker, RerankScoreCache
+
+
+def test_get_returns_set_scores():
+    cache = RerankScoreCache(ttl=60)
+    key = cache.key("model", "query", "doc")
+
+    assert cache.get(key) is None
+    cache.set(key, 0.5)
+    assert cache.get(key) == 0.5
+
+
+def test_key_depends_on_model_query_and_document():
+    key = RerankScoreCache.key("model", "query", "doc")
+
+    assert key == RerankScoreCache.key("model", "query", "doc")
+    assert key != RerankScoreCache.key("other", "query", "doc")
+    assert key != RerankScoreCache.key("model", "other", "doc")
+    assert key != RerankScoreCache.key("model", "query", "other")
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(external.time, "monotonic", lambda: now[0])
+
+    cache = RerankScoreCache(ttl=10)
+    key = cache.key("model", "query", "doc")
+    cache.set(key, 0.5)
+
+    now[0] += 9
+    assert cache.get(key) == 0.5
+    now[0] += 2
+    assert cache.get(key) is None
+    assert key not in cache.scores
+
+
+def test_evicts_least_recently_used():
+    cache = RerankScoreCache(ttl=60, max_size=2)
+    a, b, c = (cache.key("model", "query", doc) for doc in "abc")
+
+    cache.set(a, 1.0)
+    cache.set(b, 2.0)
+    cache.get(a)
+    cache.set(c, 3.0)
+
+    assert cache.get(a) == 1.0
+    assert cache.get(b) is None
+    assert cache.get(c) == 3.0
+
+
+def test_disabled_without_ttl():
+    cache = RerankScoreCache(ttl=0)
+    key = cache.key("model", "query", "doc")
+
+    cache.set(key, 0.5)
+    assert cache.get(key) is None
+    assert not cache.scores
+
+
+def test_reranker_only_requests_uncached_documents(monkeypatch):
+    reranker = ExternalReranker(api_key="key")
+    reranker.cache = RerankScoreCache(ttl=60)
+    requests = []
+
+    def rerank(query, docs):
+        requests.append((query, docs))
+        return [float(len(doc)) for doc in docs]
+
+    monkeypatch.setattr(reranker, "_rerank", rerank)
+
+    assert reranker.predict([("q", "a"), ("q", "bb")]) == [1.0, 2.0]
+    assert reranker.predict([("q", "bb"), ("q", "ccc"), ("q", "ccc")]) == [
+        2.0,
+        3.0,
+        3.0,
+    ]
+
+    assert requests == [("q", ["a", "bb"]), ("q", ["ccc"])]
+
+
+def test_reranker_does_not_cache_failures(monkeypatch):
+    reranker = ExternalReranker(api_key="key")
+    reranker.cache = RerankScoreCache(ttl=60)
+
+    def rerank(query, docs):
+        raise Exception("Reranker unavailable")
+
+    monkeypatch.setattr(reranker, "_rerank", rerank)
+
+    assert reranker.predict([("q", "a")]) is None
+    assert not reranker.cache.scores
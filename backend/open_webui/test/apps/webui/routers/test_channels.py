@@ -0,0 +1,150 @@
+from test.util.abstract_integration_test import AbstractPostgresTest
+from test.util.mock_user import mock_webui_user
+
+
+class TestChannelMessages(AbstractPostgresTest):
+    BASE_PATH = "/api/v1/channels"
+
+    def setup_class(cls):
+        super().setup_class()
+
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.internal.db import get_db
+        from open_webui.models.channels import ChannelForm, Channels
+        from open_webui.models.messages import Message, MessageForm, Messages
+        from open_webui.models.users import Users
+
+        Users.insert_new_user(
+            id="1",
+            name="user 1",
+            email="user1@openwebui.com",
+            profile_image_url="/user1.png",
+            role="admin",
+        )
+
+        self.messages = Messages
+        self.channel = Channels.insert_new_channel(
+            None, ChannelForm(name="general"), "1"
+        )
+
+        # Seven messages, the middle three sharing a timestamp so that pages
+        # have to break ties by id
+        inserted = [
+            Messages.insert_new_message(
+                MessageForm(content=f"message {idx}"), self.channel.id, "1"
+            )
+            for idx in range(7)
+        ]
+        timestamps = [1, 2, 3, 3, 3, 4, 5]
+        with get_db() as db:
+            for message, created_at in zip(inserted, timestamps):
+                db.query(Message).filter_by(id=message.id).update(
+                    {"created_at": created_at}
+                )
+            db.commit()
+
+        # Newest first, as returned by get_messages_by_channel_id
+        self.ordered = [
+            message_id
+            for _, message_id in sorted(
+                zip(timestamps, [message.id for message in inserted]), reverse=True
+            )
+        ]
+
+        # A reply is not a top level message
+        reply = Messages.insert_new_message(
+            MessageForm(content="reply", parent_id=inserted[0].id),
+            self.channel.id,
+            "1",
+        )
+        with get_db() as db:
+            db.query(Message).filter_by(id=reply.id).update({"created_at": 6})
+            db.commit()
+
+        Messages.add_reaction_to_message(self.ordered[2], "1", "thumbsup")
+        Messages.add_reaction_to_message(self.ordered[2], "1", "tada")
+        Messages.add_reaction_to_message(self.ordered[2], "2", "thumbsup")
+
+    def get_ids(self, **kwargs):
+        return [
+            message.id
+            for message in self.messages.get_messages_by_channel_id(
+                self.channel.id, **kwargs
+            )
+        ]
+
+    def test_offset_pages(self):
+        assert self.get_ids(limit=3) == self.ordered[:3]
+        assert self.get_ids(skip=3, limit=3) == self.ordered[3:6]
+
+    def test_before_pages_through_ties(self):
+        pages = []
+        cursor = None
+        while True:
+            page = self.get_ids(limit=2, before=cursor)
+            if not page:
+                break
+            pages.append(page)
+            cursor = page[-1]
+
+        assert pages == [self.ordered[i : i + 2] for i in range(0, 7, 2)]
+
+    def test_after_returns_the_next_newer_messages(self):
+        assert self.get_ids(limit=2, after=self.ordered[-1]) == self.ordered[-3:-1]
+        assert self.get_ids(limit=2, after=self.ordered[3]) == self.ordered[1:3]
+        assert self.get_ids(limit=2, after=self.ordered[0]) == []
+
+    def test_before_and_after(self):
+        assert (
+            self.get_ids(limit=10, before=self.ordered[1], after=self.ordered[5])
+            == self.ordered[2:5]
+        )
+
+    def test_unknown_cursor(self):
+        assert self.get_ids(before="unknown") == []
+        assert self.get_ids(after="unknown") == []
+
+    def test_cursor_from_another_channel(self):
+        from open_webui.models.channels import ChannelForm, Channels
+
+        other = Channels.insert_new_channel(None, ChannelForm(name="other"), "1")
+        assert (
+            self.messages.get_messages_by_channel_id(other.id, before=self.ordered[0])
+            == []
+        )
+
+    def test_get_channel_messages_with_cursor(self):
+        with mock_webui_user(id="1", role="admin"):
+            response = self.fast_api_client.get(
+                self.create_url(
+                    f"/{self.channel.id}/messages",
+                    {"limit": 2, "before": self.ordered[1]},
+                )
+            )
+        assert response.status_code == 200
+        assert [message["id"] for message in response.json()] == self.ordered[2:4]
+
+    def test_get_channel_messages_with_replies_and_reactions(self):
+        with mock_webui_user(id="1", role="admin"):
+            response = self.fast_api_client.get(
+                self.create_url(f"/{self.channel.id}/messages", {"limit": 10})
+            )
+        assert response.status_code == 200
+        messages = {message["id"]: message for message in response.json()}
+        assert list(messages) == self.ordered
+
+        # The oldest message has the reply
+        replied = messages[self.ordered[-1]]
+        assert replied["reply_count"] == 1
+        assert replied["latest_reply_at"] == 6
+        assert replied["user"]["name"] == "user 1"
+
+        reacted = messages[self.ordered[2]]
+        assert reacted["reply_count"] == 0
+        assert reacted["latest_reply_at"] is None
+        assert reacted["reactions"] == [
+            {"name": "thumbsup", "user_ids": ["1", "2"], "count": 2},
+            {"name": "tada", "user_ids": ["1"], "count": 1},
+        ]
+        assert messages[self.ordered[0]]["reactions"] == []
@@ -0,0 +1,192 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.routers import pipelines
+from open_webui.routers.pipelines import PipelinesClient
+
+URLS = ["http://a", "http://b", "http://c"]
+
+
+class FakeServers:
+    """
+    Stands in for PipelinesClient.post: records every request and answers
+    with `respond(url, request_data)`, which defaults to a batch endpoint
+    appending the filter ids to `body["trace"]`.
+    """
+
+    def __init__(self, respond=None):
+        self.requests = []
+        self.respond = respond or self.batch
+
+    @staticmethod
+    def batch(url, request_data, message_deltas=False):
+        body = request_data["body"]
+        filter_ids = request_data.get("filter_ids") or [url.split("/")[-3]]
+        return 200, {
+            "body": {**body, "trace": body.get("trace", []) + filter_ids},
+            "message_deltas": message_deltas,
+        }
+
+    async def post(self, url, key, request_data):
+        self.requests.append((url, request_data))
+        return self.respond(url, request_data)
+
+
+def make_request(keys=("key", "key", "")):
+    return SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(
+                config=SimpleNamespace(
+                    OPENAI_API_BASE_URLS=URLS, OPENAI_API_KEYS=list(keys)
+                )
+            )
+        )
+    )
+
+
+def make_client(servers):
+    client = PipelinesClient()
+    client.post = servers.post
+    return client
+
+
+def run_filters(client, filters, payload, filter_type="inlet"):
+    return asyncio.run(
+        client.run_filters(make_request(), filters, filter_type, {"id": "u"}, payload)
+    )
+
+
+def chat(messages, chat_id="chat"):
+    return {"chat_id": chat_id, "messages": messages}
+
+
+@pytest.fixture(autouse=True)
+def enable_batching(monkeypatch):
+    monkeypatch.setattr(pipelines, "ENABLE_PIPELINES_FILTER_BATCHING", True)
+
+
+def test_groups_consecutive_filters_by_server():
+    servers = FakeServers()
+    client = make_client(servers)
+    filters = [
+        {"id": "f1", "urlIdx": 0},
+        {"id": "f2", "urlIdx": "0"},
+        {"id": "f3", "urlIdx": 1},
+        # No key, and no server
+        {"id": "skipped", "urlIdx": 2},
+        {"id": "invalid", "urlIdx": None},
+        {"id": "f4", "urlIdx": 0},
+    ]
+
+    payload = run_filters(client, filters, {"messages": []})
+
+    assert payload["trace"] == ["f1", "f2", "f3", "f4"]
+    assert [(url, data["filter_ids"]) for url, data in servers.requests] == [
+        ("http://a/filter/inlet/batch", ["f1", "f2"]),
+        ("http://b/filter/inlet/batch", ["f3"]),
+        ("http://a/filter/inlet/batch", ["f4"]),
+    ]
+
+
+@pytest.mark.parametrize("status_code", [404, 405])
+def test_remembers_servers_without_batch_endpoint(status_code):
+    def respond(url, request_data):
+        if url.endswith("/batch"):
+            return status_code, None
+        return 200, FakeServers.batch(url, request_data)[1]["body"]
+
+    servers = FakeServers(respond)
+    client = make_client(servers)
+    filters = [{"id": "f1", "urlIdx": 0}, {"id": "f2", "urlIdx": 0}]
+
+    assert run_filters(client, filters, {})["trace"] == ["f1", "f2"]
+    assert run_filters(client, filters, {})["trace"] == ["f1", "f2"]
+
+    assert [url for url, _ in servers.requests] == [
+        "http://a/filter/inlet/batch",
+        "http://a/f1/filter/inlet",
+        "http://a/f2/filter/inlet",
+        "http://a/f1/filter/inlet",
+        "http://a/f2/filter/inlet",
+    ]
+    assert client.capabilities["http://a"]["batch"] is False
+
+
+def test_sends_only_new_messages_once_the_server_supports_deltas():
+    servers = FakeServers(
+        lambda url, data: FakeServers.batch(url, data, message_deltas=True)
+    )
+    client = make_client(servers)
+    filters = [{"id": "f1", "urlIdx": 0}]
+    messages = [{"role": "user", "content": str(idx)} for idx in range(5)]
+    digests = PipelinesClient.get_message_digests(messages)
+
+    run_filters(client, filters, chat(messages[:3]))
+    run_filters(client, filters, chat(messages))
+
+    first, second = (data for _, data in servers.requests)
+    assert first["body"]["messages"] == messages[:3]
+    assert first["messages"] == {"chat_id": "chat", "digest": digests[2]}
+
+    assert second["body"]["messages"] == messages[3:]
+    assert second["messages"] == {
+        "chat_id": "chat",
+        "digest": digests[4],
+        "base": digests[2],
+        "base_length": 3,
+    }
+
+    # An edited message only shares the messages before it
+    edited = [messages[0], {"role": "user", "content": "edited"}, *messages[2:]]
+    run_filters(client, filters, chat(edited))
+
+    _, third = servers.requests[-1]
+    assert third["body"]["messages"] == edited[1:]
+    assert third["messages"]["base"] == digests[4]
+    assert third["messages"]["base_length"] == 1
+
+
+def test_resends_full_messages_when_the_server_lost_the_base():
+    def respond(url, request_data):
+        if "base" in request_data["messages"]:
+            return 409, {"detail": "Unknown base"}
+        return FakeServers.batch(url, request_data, message_deltas=True)
+
+    servers = FakeServers(respond)
+    client = make_client(servers)
+    filters = [{"id": "f1", "urlIdx": 0}]
+    messages = [{"role": "user", "content": str(idx)} for idx in range(3)]
+
+    run_filters(client, filters, chat(messages[:2]))
+    payload = run_filters(client, filters, chat(messages))
+
+    assert payload["messages"] == messages
+    delta, full = (data for _, data in servers.requests[1:])
+    assert delta["body"]["messages"] == messages[2:]
+    assert full["body"]["messages"] == messages
+    assert "base" not in full["messages"]
+
+
+def test_message_digests_keep_the_most_recent_chats():
+    servers = FakeServers()
+    client = make_client(servers)
+    client.MAX_CHAT_STATES = 2
+    filters = [{"id": "f1", "urlIdx": 0}]
+    messages = [{"role": "user", "content": "hi"}]
+
+    # "b" is the least recently used chat once "a" is sent again
+    for chat_id in ["a", "b", "a", "c"]:
+        run_filters(client, filters, chat(messages, chat_id))
+    assert list(client.message_digests) == [
+        ("http://a", "inlet", "a"),
+        ("http://a", "inlet", "c"),
+    ]
+
+    # Inlet and outlet filters are tracked separately
+    run_filters(client, filters, chat(messages, "c"), filter_type="outlet")
+    assert list(client.message_digests) == [
+        ("http://a", "inlet", "c"),
+        ("http://a", "outlet", "c"),
+    ]
@@ -0,0 +1,171 @@
+import asyncio
+
+from open_webui.socket.utils import (
+    ChatEventCoalescer,
+    changes_message_content,
+    get_common_prefix_length,
+)
+
+
+class Client:
+    """Applies frames the way the chat UI does, on UTF-16 code units."""
+
+    def __init__(self):
+        self.content = ""
+        self.frames = []
+        self.dropped = 0
+
+    async def __call__(self, event_data):
+        self.frames.append(event_data)
+        data = event_data["data"]
+        if "content_delta" in data:
+            base = self.content.encode("utf-16-le")
+            if len(base) // 2 != data["content_length"]:
+                self.dropped += 1
+                return
+            self.content = (
+                base[: data["content_offset"] * 2].decode("utf-16-le")
+                + data["content_delta"]
+            )
+        elif "content" in data:
+            self.content = data["content"]
+
+
+def content_frame(content):
+    return {"type": "chat:completion", "data": {"content": content}}
+
+
+def stream(coalescer, contents):
+    async def scenario():
+        for content in contents:
+            await coalescer(content_frame(content))
+        await coalescer.flush()
+
+    asyncio.run(scenario())
+
+
+def test_common_prefix_length():
+    assert get_common_prefix_length("abc", "abcdef") == 3
+    assert get_common_prefix_length("abcx", "abcdef") == 3
+    assert get_common_prefix_length("", "abc") == 0
+    assert get_common_prefix_length("xyz", "abc") == 0
+
+
+def test_deltas_follow_a_keyframe():
+    client = Client()
+    coalescer = ChatEventCoalescer(client, 0, keyframe_interval=50)
+    stream(coalescer, ["Hel", "Hello", "Hello wor", "Hello world"])
+
+    assert client.content == "Hello world"
+    assert client.frames[0]["data"] == {"content": "Hel"}
+    assert client.frames[-1]["data"] == {
+        "content_offset": 9,
+        "content_length": 9,
+        "content_delta": "ld",
+    }
+
+
+def test_rewritten_tail_and_astral_characters():
+    client = Client()
+    coalescer = ChatEventCoalescer(client, 0, keyframe_interval=50)
+    stream(coalescer, ["😀 <details>", "😀 <details>\n", "😀 done 🎉", "😀 done 🎉!"])
+
+    assert client.content == "😀 done 🎉!"
+    assert client.dropped == 0
+    assert client.frames[2]["data"]["content_offset"] == 3
+
+
+def test_keyframe_interval():
+    client = Client()
+    coalescer = ChatEventCoalescer(client, 0, keyframe_interval=2)
+    stream(coalescer, ["a", "ab", "abc", "abcd"])
+
+    assert ["content" in frame["data"] for frame in client.frames] == [
+        True,
+        False,
+        True,
+        False,
+    ]
+
+
+def test_mismatched_deltas_are_dropped_until_keyframe():
+    client = Client()
+    coalescer = ChatEventCoalescer(client, 0, keyframe_interval=3)
+    stream(coalescer, ["a", "ab"])
+
+    # A client that joined mid-stream starts from other content
+    client.content = ""
+    stream(coalescer, ["abc", "abcd"])
+    assert client.dropped == 1
+    assert client.content == "abcd"
+
+
+def test_foreign_content_events_force_a_keyframe():
+    client = Client()
+    coalescer = ChatEventCoalescer(client, 0, keyframe_interval=50)
+    stream(coalescer, ["a", "ab"])
+
+    asyncio.run(coalescer({"type": "replace", "data": {"content": "other"}}))
+    client.content = "other"
+    stream(coalescer, ["abc"])
+    assert client.frames[-1]["data"] == {"content": "abc"}
+
+    # Same when another emitter replaced the content
+    coalescer.invalidate()
+    stream(coalescer, ["abcd"])
+    assert client.frames[-1]["data"] == {"content": "abcd"}
+
+
+def test_new_session_gets_a_keyframe():
+    session_ids = ["s1"]
+
+    async def get_session_ids():
+        return session_ids
+
+    client = Client()
+    coalescer = ChatEventCoalescer(
+        client, 0, keyframe_interval=50, get_session_ids=get_session_ids
+    )
+    coalescer.SESSION_CHECK_INTERVAL = 0
+    stream(coalescer, ["a", "ab"])
+    assert "content_delta" in client.frames[-1]["data"]
+
+    session_ids = ["s1", "s2"]
+    stream(coalescer, ["abc"])
+    assert client.frames[-1]["data"] == {"content": "abc"}
+
+    stream(coalescer, ["abcd"])
+    assert "content_delta" in client.frames[-1]["data"]
+
+
+def test_frames_are_rate_limited_and_serialized_lazily():
+    calls = []
+
+    def serialize(content):
+        def serializer():
+            calls.append(content)
+            return content
+
+        return serializer
+
+    client = Client()
+    coalescer = ChatEventCoalescer(client, 10, keyframe_interval=50)
+
+    async def scenario():
+        for content in ["a", "ab", "abc", "abcd"]:
+            await coalescer(content_frame(serialize(content)))
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert calls == ["a", "abcd"]
+    assert client.content == "abcd"
+
+
+def test_changes_message_content():
+    assert changes_message_content({"type": "replace", "data": {"content": ""}})
+    assert changes_message_content({"type": "chat:message:delta", "data": {}})
+    assert changes_message_content({"type": "chat:completion", "data": {"choices": []}})
+    assert not changes_message_content({"type": "status", "data": {}})
+    assert not changes_message_content(
+        {"type": "chat:completion", "data": {"done": True}}
+    )
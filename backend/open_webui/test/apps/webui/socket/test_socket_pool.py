@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import pytest
+from fakeredis import aioredis as fakeredis
+
+from open_webui.socket import utils
+from open_webui.socket.utils import LocalSocketPool, RedisSocketPool
+
+
+@pytest.fixture
+def redis_pool(monkeypatch):
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(
+        utils, "get_async_redis_connection", lambda *args, **kwargs: redis
+    )
+    return RedisSocketPool(
+        "test:socket", redis_url="redis://", usage_timeout=3, session_ttl=60
+    )
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.mark.parametrize("pool_type", ["local", "redis"])
+def test_session_lifecycle(pool_type, redis_pool):
+    pool = redis_pool if pool_type == "redis" else LocalSocketPool(usage_timeout=3)
+
+    async def scenario():
+        await pool.add_session("s1", {"id": "u1", "name": "One"})
+        await pool.add_session("s2", {"id": "u1", "name": "One"})
+        await pool.add_session("s3", {"id": "u2", "name": "Two"})
+
+        assert (await pool.get_session("s1"))["name"] == "One"
+        assert [
+            session["id"] if session else None
+            for session in await pool.get_sessions(["s1", "missing", "s3"])
+        ] == ["u1", None, "u2"]
+        assert sorted(await pool.get_user_session_ids("u1")) == ["s1", "s2"]
+        assert sorted(await pool.get_user_ids()) == ["u1", "u2"]
+        assert await pool.refresh_session("s1")
+
+        assert (await pool.remove_session("s1"))["id"] == "u1"
+        assert await pool.is_user_active("u1")
+        await pool.remove_session("s2")
+        assert not await pool.is_user_active("u1")
+        assert await pool.get_user_ids() == ["u2"]
+
+        assert await pool.remove_session("s2") is None
+        assert not await pool.refresh_session("s2")
+
+    run(scenario())
+
+
+def test_redis_keys_expire_and_use_hash_tags(redis_pool):
+    async def scenario():
+        await redis_pool.add_session("s1", {"id": "u1"})
+        await redis_pool.update_usage("model", "s1")
+
+        keys = {
+            "test:socket:session:{s1}": 60,
+            "test:socket:user:{u1}:sessions": 60,
+            "test:socket:users": 60,
+            "test:socket:usage": 4,
+        }
+        for key, ttl in keys.items():
+            assert 0 < await redis_pool.redis.ttl(key) <= ttl
+
+    run(scenario())
+
+
+def test_redis_sessions_without_heartbeat_are_ignored(redis_pool):
+    async def scenario():
+        await redis_pool.add_session("s1", {"id": "u1"})
+        stale = int(time.time()) - 120
+        await redis_pool.redis.zadd("test:socket:user:{u1}:sessions", {"s1": stale})
+        await redis_pool.redis.zadd("test:socket:users", {"u1": stale})
+
+        assert await redis_pool.get_user_session_ids("u1") == []
+        assert await redis_pool.get_user_ids() == []
+        assert not await redis_pool.is_user_active("u1")
+
+        await redis_pool.refresh_session("s1")
+        assert await redis_pool.get_user_ids() == ["u1"]
+
+    run(scenario())
+
+
+def test_usage_cleanup(redis_pool):
+    async def scenario():
+        await redis_pool.update_usage("fresh", "s1")
+        await redis_pool.redis.zadd("test:socket:usage", {"old": int(time.time()) - 10})
+
+        assert await redis_pool.get_models_in_use() == ["fresh"]
+        assert await redis_pool.cleanup_usage()
+        assert await redis_pool.redis.zrange("test:socket:usage", 0, -1) == ["fresh"]
+
+    run(scenario())
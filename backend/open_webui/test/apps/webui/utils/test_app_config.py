@@ -0,0 +1,205 @@
+import json
+import time
+
+import fakeredis
+import pytest
+
+from open_webui import config
+from open_webui.config import (
+    CONFIG_REDIS_CHANNEL,
+    CONFIG_REDIS_KEY_PREFIX,
+    CONFIG_REDIS_VERSION_KEY,
+    AppConfig,
+    PersistentConfig,
+)
+
+
+class Item(PersistentConfig):
+    """A PersistentConfig that is neither read from nor saved to the database."""
+
+    def __init__(self, value):
+        self.env_name = "ITEM"
+        self.config_path = "test.item"
+        self.env_value = value
+        self.config_value = None
+        self.value = value
+
+    def save(self, commit: bool = True):
+        pass
+
+
+@pytest.fixture
+def saves(monkeypatch):
+    saves = []
+    monkeypatch.setattr(config, "save_to_db", lambda data: saves.append(data))
+    return saves
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        config,
+        "get_redis_connection",
+        lambda *args, **kwargs: fakeredis.FakeRedis(
+            server=server, decode_responses=True
+        ),
+    )
+    return server
+
+
+def redis_client(server):
+    return fakeredis.FakeRedis(server=server, decode_responses=True)
+
+
+def worker(keys):
+    app_config = AppConfig(redis_url="redis://")
+    for key, value in keys.items():
+        setattr(app_config, key, Item(value))
+    return app_config
+
+
+def message(version, values):
+    return {"data": json.dumps({"version": version, "values": values})}
+
+
+def next_message(pubsub):
+    # The subscribe confirmation comes through as None first
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        published = pubsub.get_message(timeout=0.1)
+        if published is not None:
+            return json.loads(published["data"])
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_registered_keys_are_loaded_together(server):
+    client = redis_client(server)
+    client.set(f"{CONFIG_REDIS_KEY_PREFIX}:A", json.dumps("a"))
+    client.set(f"{CONFIG_REDIS_KEY_PREFIX}:B", json.dumps("b"))
+    client.set(CONFIG_REDIS_VERSION_KEY, 7)
+
+    app_config = worker({"A": "default", "B": "default", "C": "default"})
+    try:
+        assert app_config._unloaded == ["A", "B", "C"]
+
+        assert app_config.A == "a"
+        assert app_config._unloaded == []
+        assert app_config._state["B"].value == "b"
+        assert app_config.C == "default"
+        assert app_config._version == 7
+    finally:
+        app_config._listener.stop()
+
+
+def test_write_is_stored_and_published(server):
+    pubsub = redis_client(server).pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(CONFIG_REDIS_CHANNEL)
+
+    app_config = worker({"A": "default"})
+    try:
+        app_config.A = "new"
+
+        client = redis_client(server)
+        assert json.loads(client.get(f"{CONFIG_REDIS_KEY_PREFIX}:A")) == "new"
+        assert client.get(CONFIG_REDIS_VERSION_KEY) == "1"
+        assert next_message(pubsub) == {"version": 1, "values": {"A": "new"}}
+    finally:
+        app_config._listener.stop()
+
+
+def test_batch_saves_and_publishes_once(server, saves):
+    pubsub = redis_client(server).pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(CONFIG_REDIS_CHANNEL)
+
+    app_config = worker({"A": "default", "B": "default"})
+    try:
+        with app_config.batch():
+            app_config.A = "a"
+            with app_config.batch():
+                app_config.B = "b"
+            assert saves == []
+
+        assert len(saves) == 1
+        assert next_message(pubsub) == {"version": 1, "values": {"A": "a", "B": "b"}}
+        assert pubsub.get_message(timeout=0.1) is None
+    finally:
+        app_config._listener.stop()
+
+
+def test_writes_reach_other_workers(server, saves):
+    worker_a = worker({"A": "default"})
+    worker_b = worker({"A": "default"})
+    try:
+        worker_a.A = "from a"
+        assert wait_for(lambda: worker_b.A == "from a")
+        assert wait_for(lambda: worker_a._version == worker_b._version == 1)
+    finally:
+        worker_a._listener.stop()
+        worker_b._listener.stop()
+
+
+def test_messages_apply_in_version_order_including_own_writes():
+    app_config = AppConfig()
+    app_config.A = Item("default")
+
+    # This worker wrote "mine" as version 2 while version 1, from another
+    # worker, was still on its way
+    app_config._state["A"].value = "mine"
+    app_config._on_message(message(1, {"A": "theirs"}))
+    assert app_config.A == "theirs"
+    app_config._on_message(message(2, {"A": "mine"}))
+    assert app_config.A == "mine"
+
+    # Older or repeated versions are ignored
+    app_config._on_message(message(2, {"A": "stale"}))
+    app_config._on_message(message(1, {"A": "stale"}))
+    assert app_config.A == "mine"
+    assert app_config._version == 2
+
+
+def test_version_gap_reloads_from_redis(server):
+    app_config = worker({"A": "default", "B": "default"})
+    try:
+        app_config.A
+
+        client = redis_client(server)
+        client.set(f"{CONFIG_REDIS_KEY_PREFIX}:A", json.dumps("a"))
+        client.set(f"{CONFIG_REDIS_KEY_PREFIX}:B", json.dumps("b"))
+        client.set(CONFIG_REDIS_VERSION_KEY, 3)
+
+        # Versions 1 and 2 were missed, one of them changed B
+        app_config._on_message(message(3, {"A": "a"}))
+        assert app_config.A == "a"
+        assert app_config.B == "b"
+        assert app_config._version == 3
+    finally:
+        app_config._listener.stop()
+
+
+def test_listener_error_forces_resync(server):
+    app_config = worker({"A": "default"})
+    try:
+        app_config.A
+        app_config._on_message(message(1, {"A": "a"}))
+
+        app_config._on_listener_error(ConnectionError("lost"), None, None)
+        assert app_config._version == -1
+
+        client = redis_client(server)
+        client.set(f"{CONFIG_REDIS_KEY_PREFIX}:A", json.dumps("missed"))
+        client.set(CONFIG_REDIS_VERSION_KEY, 5)
+
+        # The next message after a reconnect reloads everything, even if it
+        # directly follows the last version seen
+        app_config._on_message(message(2, {"A": "ignored"}))
+        assert app_config.A == "missed"
+        assert app_config._version == 5
+    finally:
+        app_config._listener.stop()
@@ -0,0 +1,86 @@
+import time
+
+import fakeredis
+
+from open_webui.utils import redis as redis_utils
+from open_webui.utils.redis import CacheVersion
+
+
+def test_bump_increments_version():
+    cache_version = CacheVersion("test")
+    version = cache_version.version
+    cache_version.bump()
+    assert cache_version.version == version + 1
+
+
+def test_polls_fingerprint_without_redis():
+    fingerprint = [(1, 100)]
+    calls = []
+
+    def get_fingerprint():
+        calls.append(1)
+        return fingerprint[0]
+
+    cache_version = CacheVersion(
+        "test", get_fingerprint=get_fingerprint, poll_interval=0
+    )
+    version = cache_version.version
+    assert cache_version.version == version
+
+    # A write on another worker
+    fingerprint[0] = (1, 101)
+    assert cache_version.version == version + 1
+    assert cache_version.version == version + 1
+    assert len(calls) == 4
+
+
+def test_poll_interval_limits_fingerprint_queries():
+    calls = []
+    cache_version = CacheVersion(
+        "test", get_fingerprint=lambda: calls.append(1), poll_interval=60
+    )
+    for _ in range(10):
+        cache_version.version
+    assert len(calls) == 1
+
+
+def test_failing_fingerprint_keeps_version():
+    def get_fingerprint():
+        raise RuntimeError("database unavailable")
+
+    cache_version = CacheVersion(
+        "test", get_fingerprint=get_fingerprint, poll_interval=0
+    )
+    assert cache_version.version == cache_version.version
+
+
+def test_bump_reaches_other_workers_through_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis_utils,
+        "get_redis_connection",
+        lambda *args, **kwargs: fakeredis.FakeRedis(
+            server=server, decode_responses=True
+        ),
+    )
+
+    calls = []
+    worker_a = CacheVersion("test", redis_url="redis://")
+    worker_b = CacheVersion(
+        "test", redis_url="redis://", get_fingerprint=lambda: calls.append(1)
+    )
+    try:
+        version = worker_b.version
+        worker_a.bump()
+
+        deadline = time.monotonic() + 5
+        while worker_b.version == version and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        assert worker_b.version == version + 1
+        assert worker_a.version == 1
+        # With Redis the database is never polled
+        assert calls == []
+    finally:
+        worker_a.listener.stop()
+        worker_b.listener.stop()
@@ -0,0 +1,96 @@
+import pytest
+
+from open_webui.utils.stream import ContentTagMatcher, extract_tag_attributes
+
+
+def stream(matcher, tokens):
+    content_blocks = [{"type": "text", "content": ""}]
+    stopped = False
+    for token in tokens:
+        content_blocks[-1]["content"] += token
+        stopped = matcher.process(content_blocks)
+        if stopped:
+            break
+    return content_blocks, stopped
+
+
+def summary(content_blocks):
+    # Text is stripped when serialized, chunking may leave leading whitespace
+    return [
+        (
+            block["type"],
+            block["content"].strip() if block["type"] == "text" else block["content"],
+        )
+        for block in content_blocks
+    ]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 100])
+def test_reasoning_split_across_chunks(size):
+    text = "Hi <think>step one\nstep two</think> Done."
+    tokens = [text[i : i + size] for i in range(0, len(text), size)]
+
+    content_blocks, stopped = stream(ContentTagMatcher(["reasoning"]), tokens)
+
+    assert not stopped
+    assert summary(content_blocks) == [
+        ("text", "Hi"),
+        ("reasoning", "step one\nstep two"),
+        ("text", "Done."),
+    ]
+    assert content_blocks[1]["start_tag"] == "think"
+    assert content_blocks[1]["end_tag"] == "/think"
+
+
+def test_longest_tag_wins():
+    content_blocks, _ = stream(
+        ContentTagMatcher(["reasoning"]), ["<thinking>", "a", "</thinking>b"]
+    )
+    assert summary(content_blocks) == [("reasoning", "a"), ("text", "b")]
+
+
+def test_disabled_and_unknown_tags_stay_text():
+    text = "<think>a</think> <div>b</div> <code_interpreter>c</code_interpreter>"
+    content_blocks, _ = stream(ContentTagMatcher(["solution"]), list(text))
+    assert summary(content_blocks) == [("text", text)]
+
+
+def test_partial_tag_at_the_end_is_rescanned():
+    matcher = ContentTagMatcher(["reasoning"])
+    content_blocks, _ = stream(matcher, ["a <thi"])
+    assert content_blocks[-1]["content"] == "a <thi"
+    assert matcher.scan_pos == 2
+
+    content_blocks[-1]["content"] += "s is not a tag"
+    matcher.process(content_blocks)
+    assert matcher.scan_pos == len(content_blocks[-1]["content"])
+
+
+def test_empty_block_is_dropped():
+    content_blocks, _ = stream(
+        ContentTagMatcher(["reasoning"]), ["<think>", "</think>", "x"]
+    )
+    assert summary(content_blocks) == [("text", "x")]
+
+
+def test_code_interpreter_stops_on_close():
+    content_blocks, stopped = stream(
+        ContentTagMatcher(["code_interpreter"]),
+        [
+            '<code_interpreter type="code" lang="python">',
+            "print(1)",
+            "</code_interpreter> rest",
+        ],
+    )
+
+    assert stopped
+    assert summary(content_blocks) == [("code_interpreter", "print(1)")]
+    assert content_blocks[0]["attributes"] == {"type": "code", "lang": "python"}
+
+
+def test_extract_tag_attributes():
+    assert extract_tag_attributes(' type="code" lang="python"') == {
+        "type": "code",
+        "lang": "python",
+    }
+    assert extract_tag_attributes(None) == {}
@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+
+from open_webui.utils import middleware
+
+
+def patch_retrieval(monkeypatch, calls):
+    async def retrieve_sources_from_files(request, files, queries, user):
+        calls.append(([file["id"] for file in files], list(queries)))
+        return [
+            {
+                "source": {"id": file["id"]},
+                "document": [f"{file['id']}: {query}" for query in queries],
+                "metadata": [{} for _ in queries],
+            }
+            for file in files
+        ]
+
+    monkeypatch.setattr(
+        middleware, "retrieve_sources_from_files", retrieve_sources_from_files
+    )
+    monkeypatch.setattr(middleware, "ENABLE_SPECULATIVE_RETRIEVAL", True)
+
+
+def test_uses_speculative_retrieval_started_by_the_caller(monkeypatch):
+    calls = []
+    patch_retrieval(monkeypatch, calls)
+
+    async def run():
+        knowledge = {"id": "knowledge", "type": "collection"}
+        queries = asyncio.get_running_loop().create_future()
+        speculative_retrieval = middleware.start_speculative_retrieval(
+            None, [knowledge, {**knowledge}], "hello", None
+        )
+        await asyncio.sleep(0)
+        assert calls == [(["knowledge"], ["hello"])]
+
+        # Web search added a file after the speculative retrieval started
+        body = {
+            "messages": [{"role": "user", "content": "hello"}],
+            "metadata": {"files": [knowledge, {"id": "web", "type": "web_search"}]},
+        }
+        queries.set_result(["hello", "greeting"])
+        return await middleware.chat_completion_files_handler(
+            None,
+            body,
+            None,
+            queries=queries,
+            speculative_query="hello",
+            speculative_retrieval=speculative_retrieval,
+        )
+
+    _, flags = asyncio.run(run())
+
+    assert calls == [
+        (["knowledge"], ["hello"]),
+        (["knowledge"], ["greeting"]),
+        (["web"], ["hello", "greeting"]),
+    ]
+    documents = {
+        source["source"]["id"]: source["document"] for source in flags["sources"]
+    }
+    assert documents == {
+        "knowledge": ["knowledge: greeting", "knowledge: hello"],
+        "web": ["web: hello", "web: greeting"],
+    }
+
+
+def test_cancels_speculative_retrieval_without_files(monkeypatch):
+    patch_retrieval(monkeypatch, [])
+
+    async def run():
+        speculative_retrieval = middleware.start_speculative_retrieval(
+            None, [{"id": "knowledge"}], "hello", None
+        )
+        # A tool opted out of file handling
+        body = {"messages": [{"role": "user", "content": "hello"}], "metadata": {}}
+        await middleware.chat_completion_files_handler(
+            SimpleNamespace(),
+            body,
+            None,
+            queries=["hello"],
+            speculative_retrieval=speculative_retrieval,
+        )
+        await asyncio.sleep(0)
+        return speculative_retrieval[1]
+
+    assert asyncio.run(run()).cancelled()
@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+from test.util.chat_response import (
+    patch_chat_response,
+    run_chat_response,
+    sse_response,
+)
+
+
+def sse_chunks(*deltas, size=5):
+    body = "".join(
+        f"data: {json.dumps({'choices': [{'index': 0, 'delta': delta}]})}\n\n"
+        for delta in deltas
+    )
+    body = (body + "data: [DONE]\n\n").encode("utf-8")
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+def test_streamed_content_and_reasoning(monkeypatch):
+    events = []
+    chats = patch_chat_response(monkeypatch.setattr, events)
+
+    chunks = sse_chunks(
+        {"content": "<thi"},
+        {"content": "nk>Pondering"},
+        {"content": "</think>The answer"},
+        {"content": " is 42."},
+    )
+    asyncio.run(run_chat_response(sse_response(chunks)))
+
+    content = chats.messages["message"]["content"]
+    assert '<details type="reasoning" done="true"' in content
+    assert "> Pondering" in content
+    assert content.endswith("The answer is 42.")
+
+    assert events[-1]["data"]["done"] is True
+    assert events[-1]["data"]["content"] == content
+
+
+def test_native_tool_calls(monkeypatch):
+    from open_webui.utils import middleware
+
+    events = []
+    chats = patch_chat_response(monkeypatch.setattr, events)
+
+    follow_up_requests = []
+
+    async def generate_chat_completion(request, form_data, user, **kwargs):
+        follow_up_requests.append(form_data)
+        return sse_response(sse_chunks({"content": "The sum is 3."}))
+
+    monkeypatch.setattr(
+        middleware, "generate_chat_completion", generate_chat_completion
+    )
+
+    async def add(a: int, b: int):
+        return {"sum": a + b}
+
+    tool_spec = {
+        "name": "add",
+        "parameters": {
+            "type": "object",
+            "properties": {"a": {"type": "integer"}, "b": {"type": "integer"}},
+        },
+    }
+    tools = {"add": {"tool_id": "math", "callable": add, "spec": tool_spec}}
+
+    chunks = sse_chunks(
+        {
+            "tool_calls": [
+                {
+                    "index": 0,
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "add", "arguments": '{"a": 1,'},
+                }
+            ]
+        },
+        {"tool_calls": [{"index": 0, "function": {"arguments": ' "b": 2}'}}]},
+        {
+            "tool_calls": [
+                {
+                    "index": 1,
+                    "id": "call_2",
+                    "type": "function",
+                    "function": {"name": "unknown", "arguments": "{}"},
+                }
+            ]
+        },
+    )
+    form_data = {
+        "model": "model",
+        "messages": [{"role": "user", "content": "What is 1 + 2?"}],
+        "tools": [{"type": "function", "function": tool_spec}],
+    }
+    asyncio.run(
+        run_chat_response(
+            sse_response(chunks), form_data=form_data, metadata={"tools": tools}
+        )
+    )
+
+    [follow_up] = follow_up_requests
+    tool_messages = [
+        message for message in follow_up["messages"] if message["role"] == "tool"
+    ]
+    assert tool_messages == [
+        {"role": "tool", "tool_call_id": "call_1", "content": '{\n  "sum": 3\n}'},
+        {"role": "tool", "tool_call_id": "call_2", "content": None},
+    ]
+
+    content = chats.messages["message"]["content"]
+    assert 'done="true" id="call_1" name="add"' in content
+    assert content.endswith("The sum is 3.")
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from open_webui.utils.stages import StageGraph
+
+
+def test_runs_stages_after_their_dependencies():
+    order = []
+
+    def stage(name, delay=0):
+        async def run():
+            order.append(f"{name}:start")
+            await asyncio.sleep(delay)
+            order.append(f"{name}:end")
+            return name
+
+        return run
+
+    stages = StageGraph()
+    stages.add("a", stage("a", 0.02))
+    stages.add("b", stage("b"), depends_on=["a"])
+    stages.add("c", stage("c"), depends_on=["a", "b"])
+    timings = asyncio.run(stages.run())
+
+    assert order == ["a:start", "a:end", "b:start", "b:end", "c:start", "c:end"]
+    assert stages.results == {"a": "a", "b": "b", "c": "c"}
+    assert set(timings) == {"a", "b", "c"}
+    assert timings["a"] >= 20
+
+
+def test_overlaps_independent_stages():
+    running = []
+    overlapped = []
+
+    def stage(name):
+        async def run():
+            running.append(name)
+            await asyncio.sleep(0.01)
+            overlapped.append(len(running))
+            running.remove(name)
+
+        return run
+
+    stages = StageGraph()
+    stages.add("a", stage("a"))
+    stages.add("b", stage("b"))
+    asyncio.run(stages.run())
+
+    assert max(overlapped) == 2
+
+
+def test_ignores_unregistered_dependencies():
+    async def run():
+        return True
+
+    stages = StageGraph()
+    stages.add("tools", run, depends_on=["memory", "image_generation"])
+    asyncio.run(stages.run())
+
+    assert stages.stages["tools"][1] == []
+    assert stages.results == {"tools": True}
+
+
+def test_failure_cancels_remaining_stages():
+    cancelled = []
+
+    async def fail():
+        raise ValueError("stage failed")
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def dependent():
+        cancelled.append("dependent ran")
+
+    stages = StageGraph()
+    stages.add("fail", fail)
+    stages.add("slow", slow)
+    stages.add("dependent", dependent, depends_on=["fail"])
+
+    with pytest.raises(ValueError):
+        asyncio.run(stages.run())
+
+    assert cancelled == ["slow"]
+    assert "fail" in stages.timings
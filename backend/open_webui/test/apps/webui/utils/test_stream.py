@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import pytest
+
+from open_webui.utils.stream import (
+    SSELineParser,
+    iter_sse_payloads,
+    json_loads,
+    serialize_content_blocks,
+)
+
+
+def sse_body(*payloads):
+    return b"".join(f"data: {payload}\n\n".encode("utf-8") for payload in payloads)
+
+
+def parse(chunks):
+    parser = SSELineParser()
+    payloads = [payload for chunk in chunks for payload in parser.feed(chunk)]
+    return payloads + list(parser.flush())
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+def test_payloads_survive_any_chunk_boundary(size):
+    events = [json.dumps({"content": f"héllo 😀 {i}"}) for i in range(20)]
+    body = sse_body(*events, "[DONE]")
+
+    payloads = parse([body[i : i + size] for i in range(0, len(body), size)])
+    assert payloads[-1] == b"[DONE]"
+    assert [json_loads(payload) for payload in payloads[:-1]] == [
+        json.loads(event) for event in events
+    ]
+
+
+def test_non_data_lines_are_skipped():
+    body = b": keep-alive\nevent: message\nid: 1\r\ndata: {}\r\n\r\ndata:\n\n"
+    assert parse([body]) == [b"{}"]
+
+
+def test_unterminated_last_line_is_flushed():
+    assert parse([b"data: 1\n", b"data: 2"]) == [b"1", b"2"]
+
+
+def test_str_chunks_are_accepted():
+    assert parse(['data: {"a": 1}\n']) == [b'{"a": 1}']
+
+
+def test_iter_sse_payloads():
+    async def body_iterator():
+        yield b"data: 1\n\nda"
+        yield b"ta: 2\n\ndata: [DONE]"
+
+    async def collect():
+        return [payload async for payload in iter_sse_payloads(body_iterator())]
+
+    assert asyncio.run(collect()) == [b"1", b"2", b"[DONE]"]
+
+
+def test_serialize_content_blocks():
+    content_blocks = [
+        {"type": "text", "content": "Let me think. "},
+        {
+            "type": "reasoning",
+            "start_tag": "think",
+            "end_tag": "/think",
+            "content": "step one\nstep two",
+            "duration": 2,
+        },
+        {"type": "text", "content": "Answer"},
+    ]
+
+    assert serialize_content_blocks(content_blocks) == (
+        "Let me think.\n\n"
+        '<details type="reasoning" done="true" duration="2">\n'
+        "<summary>Thought for 2 seconds</summary>\n"
+        "> step one\n> step two\n"
+        "</details>\n"
+        "Answer"
+    )
+    assert serialize_content_blocks(content_blocks, raw=True) == (
+        "Let me think.\n\n<think>step one\nstep two</think>\nAnswer"
+    )
+
+
+def test_serialize_tool_calls_with_results():
+    content_blocks = [
+        {
+            "type": "tool_calls",
+            "content": [
+                {"id": "call_1", "function": {"name": "add", "arguments": "{}"}}
+            ],
+            "results": [{"tool_call_id": "call_1", "content": "3"}],
+        }
+    ]
+
+    content = serialize_content_blocks(content_blocks)
+    assert 'done="true" id="call_1" name="add"' in content
+    assert 'result="&quot;3&quot;"' in content
@@ -0,0 +1,180 @@
+"""
+Recall and latency benchmark for `PgvectorClient` searches.
+
+Loads `chunks` random, clustered vectors spread over `collections`
+collections (sizes follow a power law, so a few collections hold most of the
+chunks, like large knowledge bases next to many small uploads) into
+`document_chunk` through `PgvectorClient.insert_columns`, rebuilds the
+indexes with `PgvectorClient.reindex` for each layout and reports, over
+`queries` calls of `PgvectorClient.search` per collection size bucket:
+
+- recall@k against exact results computed in numpy
+- the share of searches returning fewer than k results
+- p50 / p95 latency
+
+Layouts:
+
+- ivfflat: global ivfflat index (lists = sqrt(chunks))
+- hnsw: global hnsw index, with the client's iterative scan setting
+  (PGVECTOR_HNSW_ITERATIVE_SCAN) and, when iterative scans are available,
+  once more without them
+- hnsw+partial: global hnsw index plus a partial hnsw index for every
+  collection with at least PGVECTOR_PARTIAL_INDEX_MIN_ROWS chunks
+
+Run it against a scratch database: the benchmark collections are deleted at
+the end and the configured indexes are rebuilt, but every reindex rebuilds
+the vector indexes of the whole table.
+
+Usage:
+
+    PGVECTOR_DB_URL=postgresql://... PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH=384 \\
+    python -m open_webui.test.benchmarks.pgvector_index [chunks] [collections]
+
+e.g. `1000000 1000` and `10000000 5000`. Loading 10M chunks takes a while
+and several GB of disk.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from open_webui.config import PGVECTOR_PARTIAL_INDEX_MIN_ROWS
+from open_webui.retrieval.vector.dbs import pgvector
+from open_webui.retrieval.vector.dbs.pgvector import PgvectorClient, VECTOR_LENGTH
+
+K = 10
+QUERIES = 50
+BATCH_SIZE = 10000
+SEED = 0
+
+
+def collection_name(c: int) -> str:
+    return f"benchmark-c{c}"
+
+
+def collection_sizes(chunks: int, collections: int) -> np.ndarray:
+    weights = 1 / np.arange(1, collections + 1) ** 1.1
+    sizes = np.maximum((weights / weights.sum() * chunks).astype(int), 1)
+    sizes[0] += chunks - sizes.sum()
+    return sizes
+
+
+def collection_vectors(centers: np.ndarray, c: int, size: int) -> np.ndarray:
+    # Regenerated from the seed for the exact results, rather than kept
+    rng = np.random.default_rng([SEED, c])
+    return centers[c] + rng.standard_normal((size, centers.shape[1])).astype(np.float32)
+
+
+def load(client: PgvectorClient, sizes: np.ndarray, centers: np.ndarray):
+    start = time.perf_counter()
+    for c, size in enumerate(sizes):
+        vectors = collection_vectors(centers, c, size)
+        for offset in range(0, size, BATCH_SIZE):
+            batch = vectors[offset : offset + BATCH_SIZE]
+            ids = [f"c{c}-{offset + i}" for i in range(len(batch))]
+            client.insert_columns(
+                collection_name(c), ids, ids, [{} for _ in ids], batch
+            )
+    print(f"loaded {sizes.sum()} chunks in {time.perf_counter() - start:.1f}s")
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray) -> list[int]:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    top = np.argpartition(-scores, min(K, len(scores)) - 1)[:K]
+    return top[np.argsort(-scores[top])].tolist()
+
+
+def run_layout(client: PgvectorClient, name: str, sizes, centers, rng):
+    buckets = {
+        "small (<1k)": [c for c, s in enumerate(sizes) if s < 1000],
+        "medium (1k-100k)": [c for c, s in enumerate(sizes) if 1000 <= s < 100000],
+        "large (>=100k)": [c for c, s in enumerate(sizes) if s >= 100000],
+    }
+
+    for bucket, collections in buckets.items():
+        if not collections:
+            continue
+        recalls, short, latencies = [], 0, []
+        for _ in range(QUERIES):
+            c = int(rng.choice(collections))
+            query = centers[c] + rng.standard_normal(centers.shape[1]).astype(
+                np.float32
+            )
+            vectors = collection_vectors(centers, c, sizes[c])
+            truth = {f"c{c}-{i}" for i in exact_top_k(vectors, query)}
+
+            start = time.perf_counter()
+            result = client.search(collection_name(c), [query.tolist()], K)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            found = result.ids[0] if result else []
+            short += len(found) < min(K, sizes[c])
+            recalls.append(len(truth & set(found)) / len(truth))
+
+        print(
+            f"{name:26} {bucket:18} recall@{K} {np.mean(recalls):.3f}  "
+            f"short {short / QUERIES:6.1%}  "
+            f"p50 {np.percentile(latencies, 50):7.2f}ms  "
+            f"p95 {np.percentile(latencies, 95):7.2f}ms"
+        )
+
+
+def main():
+    chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    collections = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    client = PgvectorClient()
+    rng = np.random.default_rng(SEED)
+    sizes = collection_sizes(chunks, collections)
+    centers = rng.standard_normal((collections, VECTOR_LENGTH)).astype(np.float32)
+
+    iterative_scan = client.hnsw_iterative_scan
+    layouts = [("ivfflat", "ivfflat", 0, None)]
+    layouts.append(
+        (f"hnsw ({iterative_scan or 'no iterative scan'})", "hnsw", 0, iterative_scan)
+    )
+    if iterative_scan:
+        layouts.append(("hnsw (no iterative scan)", "hnsw", 0, None))
+    layouts.append(
+        (
+            f"hnsw+partial ({iterative_scan or 'no iterative scan'})",
+            "hnsw",
+            PGVECTOR_PARTIAL_INDEX_MIN_ROWS,
+            iterative_scan,
+        )
+    )
+
+    index_method, ivfflat_lists = (
+        pgvector.PGVECTOR_INDEX_METHOD,
+        pgvector.PGVECTOR_IVFFLAT_LISTS,
+    )
+    try:
+        load(client, sizes, centers)
+
+        built = None
+        for name, method, partial_index_min_rows, layout_iterative_scan in layouts:
+            client.hnsw_iterative_scan = layout_iterative_scan
+            if built != (method, partial_index_min_rows):
+                pgvector.PGVECTOR_INDEX_METHOD = method
+                pgvector.PGVECTOR_IVFFLAT_LISTS = int(np.sqrt(chunks))
+
+                start = time.perf_counter()
+                client.reindex(partial_index_min_rows=partial_index_min_rows)
+                print(f"{name}: built in {time.perf_counter() - start:.1f}s")
+                built = (method, partial_index_min_rows)
+
+            run_layout(client, name, sizes, centers, rng)
+    finally:
+        for c in range(collections):
+            client.delete_collection(collection_name(c))
+
+        # Back to the configured indexes
+        pgvector.PGVECTOR_INDEX_METHOD = index_method
+        pgvector.PGVECTOR_IVFFLAT_LISTS = ivfflat_lists
+        client.reindex()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Throughput benchmark for the streamed chat completion path.
+
+Replays an SSE body captured from an OpenAI compatible endpoint, e.g.
+
+    curl -N $OPENAI_API_BASE_URL/chat/completions \\
+        -H "Authorization: Bearer $OPENAI_API_KEY" \\
+        -H "Content-Type: application/json" \\
+        -d '{"model": "...", "stream": true, "messages": [...]}' > stream.sse
+
+split into chunks at random byte boundaries like network reads, and reports
+content tokens per second per core (CPU time of a single thread) for:
+
+- parse: `SSELineParser` + `json_loads` over the body alone
+- process_chat_response: the whole streamed response handler (content block
+  building, tag detection, serialization and coalesced frame emission), with
+  chat storage kept in memory and frames collected instead of sent
+
+Run it on both sides of a change to compare them.
+
+Usage:
+
+    python -m open_webui.test.benchmarks.stream_throughput stream.sse [repeat] [fps]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from open_webui.test.util.chat_response import (
+    patch_chat_response,
+    run_chat_response,
+    sse_response,
+)
+from open_webui.utils.stream import SSELineParser, json_loads, orjson
+
+
+def split_chunks(body: bytes, rng: random.Random) -> list[bytes]:
+    chunks = []
+    offset = 0
+    while offset < len(body):
+        size = rng.randint(1, 512)
+        chunks.append(body[offset : offset + size])
+        offset += size
+    return chunks
+
+
+def count_tokens(chunks: list[bytes]) -> int:
+    parser = SSELineParser()
+    tokens = 0
+    for chunk in chunks:
+        for payload in parser.feed(chunk):
+            if payload == b"[DONE]":
+                continue
+            for choice in json_loads(payload).get("choices", []):
+                if choice.get("delta", {}).get("content"):
+                    tokens += 1
+    return tokens
+
+
+def run_process_chat_response(chunks: list[bytes], fps: float) -> int:
+    events = []
+    patch_chat_response(setattr, events, max_frames_per_second=fps)
+    asyncio.run(run_chat_response(sse_response(chunks)))
+    return len(events)
+
+
+def measure(fn, *args) -> tuple[float, object]:
+    start = time.process_time()
+    result = fn(*args)
+    return time.process_time() - start, result
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    with open(sys.argv[1], "rb") as f:
+        body = f.read()
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    fps = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    chunks = split_chunks(body, random.Random(0))
+    tokens = count_tokens(chunks)
+    print(
+        f"{len(body):,} bytes, {len(chunks):,} chunks, {tokens:,} content tokens, "
+        f"json decoder: {'orjson' if orjson else 'json'}"
+    )
+
+    parse = min(measure(count_tokens, chunks)[0] for _ in range(repeat))
+    print(f"parse:                 {tokens / parse:>12,.0f} tokens/s/core")
+
+    timings = [measure(run_process_chat_response, chunks, fps) for _ in range(repeat)]
+    elapsed, frames = min(timings)
+    print(
+        f"process_chat_response: {tokens / elapsed:>12,.0f} tokens/s/core "
+        f"({frames} frames at {fps:g} fps)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Drives `process_chat_response` for streamed completions without a database,
+sockets or a model: chat storage is kept in memory, emitted events are
+collected in a list and the upstream response replays the given SSE chunks.
+"""
+
+from types import SimpleNamespace
+
+from open_webui.socket.utils import ChatEventCoalescer
+from open_webui.tasks import get_task
+from open_webui.utils import middleware
+
+
+class InMemoryChats:
+    def __init__(self):
+        self.messages = {}
+
+    def upsert_message_to_chat_by_id_and_message_id(self, chat_id, message_id, message):
+        self.messages[message_id] = {**self.messages.get(message_id, {}), **message}
+        return self.messages[message_id]
+
+    def get_message_by_id_and_message_id(self, chat_id, message_id):
+        return self.messages.get(message_id)
+
+    def get_messages_by_chat_id(self, chat_id):
+        return None
+
+    def get_chat_title_by_id(self, chat_id):
+        return "Chat"
+
+
+def sse_response(chunks):
+    async def body_iterator():
+        for chunk in chunks:
+            yield chunk
+
+    return middleware.StreamingResponse(body_iterator(), media_type="text/event-stream")
+
+
+def patch_chat_response(
+    setattr, events: list, max_frames_per_second: float = 0, keyframe_interval=50
+) -> InMemoryChats:
+    """
+    Patch the storage and socket dependencies of `process_chat_response`
+    with `setattr` (e.g. `monkeypatch.setattr`). Events are appended to
+    `events`, streamed content goes through a real ChatEventCoalescer.
+    """
+    chats = InMemoryChats()
+
+    async def emit(event_data):
+        events.append(event_data)
+
+    async def event_call(event_data):
+        return None
+
+    async def get_active_status_by_user_id(user_id):
+        return True
+
+    def get_event_emitter(metadata, update_db=True, coalesce=False):
+        if coalesce:
+            return ChatEventCoalescer(emit, max_frames_per_second, keyframe_interval)
+        return emit
+
+    setattr(middleware, "Chats", chats)
+    setattr(middleware, "get_event_emitter", get_event_emitter)
+    setattr(middleware, "get_event_call", lambda metadata: event_call)
+    setattr(middleware, "get_sorted_filter_ids", lambda *args, **kwargs: [])
+    setattr(middleware, "get_active_status_by_user_id", get_active_status_by_user_id)
+    return chats
+
+
+async def run_chat_response(response, form_data=None, metadata=None):
+    """Run `process_chat_response` and wait for its streaming task."""
+    request = SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(
+                WEBUI_NAME="Open WebUI",
+                config=SimpleNamespace(
+                    WEBUI_URL="http://localhost", CODE_INTERPRETER_ENGINE=""
+                ),
+            )
+        )
+    )
+    user = SimpleNamespace(id="user", email="user@localhost", name="User", role="user")
+    form_data = form_data or {
+        "model": "model",
+        "messages": [{"role": "user", "content": "Hello"}],
+    }
+    metadata = {
+        "chat_id": "chat",
+        "message_id": "message",
+        "session_id": "session",
+        **(metadata or {}),
+    }
+
+    result = await middleware.process_chat_response(
+        request, response, form_data, user, metadata, {"id": "model"}, [], {}
+    )
+    await get_task(result["task_id"])
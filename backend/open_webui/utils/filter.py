@@ -22,39 +22,71 @@ def get_function_module(request, function_id, load_from_db=True):
     return function_module
 
 
-def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None):
-    def get_priority(function_id):
-        function = Functions.get_function_by_id(function_id)
-        if function is not None:
-            valves = Functions.get_function_valves_by_id(function_id)
-            return valves.get("priority", 0) if valves else 0
-        return 0
+# (version, {(model_id, model filter ids): [(filter_id, toggle), ...]})
+FILTER_CHAIN_CACHE = (None, {})
+
+
+def get_filter_chain(request, model: dict) -> list[tuple[str, bool]]:
+    """
+    Get the sorted, active filter chain of a model as (filter_id, toggle)
+    pairs. The chain only depends on the function table, so it is computed
+    once per function cache version instead of once per request.
+    """
+    global FILTER_CHAIN_CACHE
 
-    filter_ids = [function.id for function in Functions.get_global_filter_functions()]
+    version = Functions.cache_version.version
+    model_filter_ids = []
     if "info" in model and "meta" in model["info"]:
-        filter_ids.extend(model["info"]["meta"].get("filterIds", []))
-        filter_ids = list(set(filter_ids))
-    active_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
-    ]
+        model_filter_ids = model["info"]["meta"].get("filterIds", [])
 
-    def get_active_status(filter_id):
-        function_module = get_function_module(request, filter_id)
+    key = (model.get("id"), tuple(model_filter_ids))
+    cached_version, chains = FILTER_CHAIN_CACHE
+    if cached_version != version:
+        chains = {}
+        FILTER_CHAIN_CACHE = (version, chains)
+    elif key in chains:
+        return chains[key]
 
-        if getattr(function_module, "toggle", None):
-            return filter_id in (enabled_filter_ids or [])
+    functions = Functions.get_cached_functions()
 
-        return True
+    def get_priority(function_id):
+        valves = Functions.get_cached_function_valves_by_id(function_id)
+        return valves.get("priority", 0) if valves else 0
 
-    active_filter_ids = [
-        filter_id for filter_id in active_filter_ids if get_active_status(filter_id)
+    filter_ids = [
+        function.id
+        for function in functions
+        if function.type == "filter" and function.is_active and function.is_global
     ]
+    if model_filter_ids:
+        filter_ids.extend(model_filter_ids)
+        filter_ids = list(set(filter_ids))
+    active_filter_ids = {
+        function.id
+        for function in functions
+        if function.type == "filter" and function.is_active
+    }
 
     filter_ids = [fid for fid in filter_ids if fid in active_filter_ids]
     filter_ids.sort(key=get_priority)
 
-    return filter_ids
+    chain = [
+        (
+            filter_id,
+            bool(getattr(get_function_module(request, filter_id), "toggle", None)),
+        )
+        for filter_id in filter_ids
+    ]
+    chains[key] = chain
+    return chain
+
+
+def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None):
+    return [
+        filter_id
+        for filter_id, toggle in get_filter_chain(request, model)
+        if not toggle or filter_id in (enabled_filter_ids or [])
+    ]
 
 
 async def process_filter_functions(
@@ -82,7 +114,7 @@ async def process_filter_functions(
 
         # Apply valves to the function
         if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
+            valves = Functions.get_cached_function_valves_by_id(filter_id)
             function_module.valves = function_module.Valves(
                 **(valves if valves else {})
             )
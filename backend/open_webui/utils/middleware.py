@@ -6,16 +6,14 @@ import base64
 
 import asyncio
 from aiocache import cached
-from typing import Any, Optional
+from typing import Any, Optional, Union
 import random
 import json
-import html
 import inspect
 import re
 import ast
 
 from uuid import uuid4
-from concurrent.futures import ThreadPoolExecutor
 
 
 from fastapi import Request, HTTPException
@@ -50,7 +48,8 @@ from open_webui.models.users import UserModel
 from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 
-from open_webui.retrieval.utils import get_sources_from_files
+from open_webui.retrieval.utils import get_sources_from_files, merge_sources
+from open_webui.retrieval.executor import RETRIEVAL_EXECUTOR, RetrievalQueueFullError
 
 
 from open_webui.utils.chat import generate_chat_completion
@@ -69,13 +68,20 @@ from open_webui.utils.misc import (
     prepend_to_first_user_message_content,
     convert_logit_bias_input_to_json,
 )
-from open_webui.utils.tools import get_tools
+from open_webui.utils.tools import get_tools, execute_tool_calls
+from open_webui.utils.stages import StageGraph
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.filter import (
     get_sorted_filter_ids,
     process_filter_functions,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
+from open_webui.utils.stream import (
+    ContentTagMatcher,
+    iter_sse_payloads,
+    json_loads,
+    serialize_content_blocks,
+)
 
 from open_webui.tasks import create_task
 
@@ -89,6 +95,8 @@ from open_webui.env import (
     GLOBAL_LOG_LEVEL,
     BYPASS_MODEL_ACCESS_CONTROL,
     ENABLE_REALTIME_CHAT_SAVE,
+    ENABLE_SPECULATIVE_RETRIEVAL,
+    SPECULATIVE_RETRIEVAL_QUERY_DEADLINE,
 )
 from open_webui.constants import TASKS
 
@@ -178,49 +186,27 @@ async def chat_completion_tools_handler(
 
             result = json.loads(content)
 
-            async def tool_call_handler(tool_call):
-                nonlocal skip_files
-
+            def get_tool_call(tool_call):
                 log.debug(f"{tool_call=}")
 
                 tool_function_name = tool_call.get("name", None)
                 if tool_function_name not in tools:
-                    return body, {}
-
-                tool_function_params = tool_call.get("parameters", {})
-
-                try:
-                    tool = tools[tool_function_name]
-
-                    spec = tool.get("spec", {})
-                    allowed_params = (
-                        spec.get("parameters", {}).get("properties", {}).keys()
-                    )
-                    tool_function_params = {
-                        k: v
-                        for k, v in tool_function_params.items()
-                        if k in allowed_params
-                    }
-
-                    if tool.get("direct", False):
-                        tool_result = await event_caller(
-                            {
-                                "type": "execute:tool",
-                                "data": {
-                                    "id": str(uuid4()),
-                                    "name": tool_function_name,
-                                    "params": tool_function_params,
-                                    "server": tool.get("server", {}),
-                                    "session_id": metadata.get("session_id", None),
-                                },
-                            }
-                        )
-                    else:
-                        tool_function = tool["callable"]
-                        tool_result = await tool_function(**tool_function_params)
+                    return None
+
+                tool = tools[tool_function_name]
+                spec = tool.get("spec", {})
+                allowed_params = spec.get("parameters", {}).get("properties", {}).keys()
+                tool_function_params = {
+                    k: v
+                    for k, v in tool_call.get("parameters", {}).items()
+                    if k in allowed_params
+                }
+                return tool, tool_function_name, tool_function_params
 
-                except Exception as e:
-                    tool_result = str(e)
+            def tool_result_handler(
+                tool_function_name, tool_function_params, tool_result
+            ):
+                nonlocal skip_files
 
                 tool_result_files = []
                 if isinstance(tool_result, list):
@@ -275,11 +261,28 @@ async def chat_completion_tools_handler(
                         skip_files = True
 
             # check if "tool_calls" in result
-            if result.get("tool_calls"):
-                for tool_call in result.get("tool_calls"):
-                    await tool_call_handler(tool_call)
-            else:
-                await tool_call_handler(result)
+            tool_calls = [
+                tool_call
+                for tool_call in map(
+                    get_tool_call, result.get("tool_calls") or [result]
+                )
+                if tool_call is not None
+            ]
+
+            # Independent calls run concurrently, results are applied in order
+            tool_results = await execute_tool_calls(
+                tool_calls,
+                user_id=user.id,
+                event_caller=event_caller,
+                metadata=metadata,
+            )
+
+            for (_, tool_function_name, tool_function_params), tool_result in zip(
+                tool_calls, tool_results
+            ):
+                tool_result_handler(
+                    tool_function_name, tool_function_params, tool_result
+                )
 
         except Exception as e:
             log.debug(f"Error: {e}")
@@ -595,70 +598,193 @@ async def chat_image_generation_handler(
     return form_data
 
 
-async def chat_completion_files_handler(
+async def generate_retrieval_queries(
     request: Request, body: dict, user: UserModel
+) -> list[str]:
+    queries = []
+    try:
+        queries_response = await generate_queries(
+            request,
+            {
+                "model": body["model"],
+                "messages": body["messages"],
+                "type": "retrieval",
+            },
+            user,
+        )
+        queries_response = queries_response["choices"][0]["message"]["content"]
+
+        try:
+            bracket_start = queries_response.find("{")
+            bracket_end = queries_response.rfind("}") + 1
+
+            if bracket_start == -1 or bracket_end == -1:
+                raise Exception("No JSON object found in the response")
+
+            queries_response = queries_response[bracket_start:bracket_end]
+            queries_response = json.loads(queries_response)
+        except Exception as e:
+            queries_response = {"queries": [queries_response]}
+
+        queries = queries_response.get("queries", [])
+    except:
+        pass
+
+    if len(queries) == 0:
+        queries = [get_last_user_message(body["messages"])]
+
+    return queries
+
+
+async def retrieve_sources_from_files(
+    request: Request, files: list, queries: list, user: UserModel
+) -> list:
+    try:
+        # Offload get_sources_from_files to the shared retrieval pool
+        return await RETRIEVAL_EXECUTOR.run(
+            lambda: get_sources_from_files(
+                request=request,
+                files=files,
+                queries=queries,
+                embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
+                    query, prefix=prefix, user=user
+                ),
+                k=request.app.state.config.TOP_K,
+                reranking_function=request.app.state.rf,
+                k_reranker=request.app.state.config.TOP_K_RERANKER,
+                r=request.app.state.config.RELEVANCE_THRESHOLD,
+                hybrid_bm25_weight=request.app.state.config.HYBRID_BM25_WEIGHT,
+                hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
+                full_context=request.app.state.config.RAG_FULL_CONTEXT,
+            ),
+        )
+    except RetrievalQueueFullError as e:
+        log.warning(f"Skipping retrieval: {e}")
+        return []
+    except Exception as e:
+        log.exception(e)
+        return []
+
+
+def get_unique_files(files: list) -> list:
+    return list({json.dumps(f, sort_keys=True): f for f in files}.values())
+
+
+def start_speculative_retrieval(
+    request: Request, files: list, query: str, user: UserModel
+) -> tuple[list, asyncio.Task]:
+    """
+    Start retrieval for `query` over `files` in the background, to be
+    handed to `chat_completion_files_handler` as `speculative_retrieval`.
+    """
+    files = get_unique_files(files)
+
+    # get_sources_from_files strips "data" from the files it is given, the
+    # originals are kept to tell which files the results cover
+    task = asyncio.create_task(
+        retrieve_sources_from_files(
+            request, [{**file} for file in files], [query], user
+        )
+    )
+    return files, task
+
+
+async def chat_completion_files_handler(
+    request: Request,
+    body: dict,
+    user: UserModel,
+    queries: Optional[Union[list, asyncio.Future]] = None,
+    speculative_query: Optional[str] = None,
+    speculative_retrieval: Optional[tuple[list, asyncio.Future]] = None,
 ) -> tuple[dict, dict[str, list]]:
+    """
+    `queries` is either the list of retrieval queries or a pending future
+    generating them; they are generated here when not given. While a
+    future is pending, retrieval for `speculative_query` (the raw user
+    message by default) runs alongside it and both results are merged.
+    `speculative_retrieval` is that retrieval already started by the
+    caller (see `start_speculative_retrieval`); files it does not cover
+    are searched with every query.
+    """
     sources = []
 
+    def retrieve(files, queries):
+        return retrieve_sources_from_files(request, files, queries, user)
+
     if files := body.get("metadata", {}).get("files", None):
-        queries = []
-        try:
-            queries_response = await generate_queries(
-                request,
-                {
-                    "model": body["model"],
-                    "messages": body["messages"],
-                    "type": "retrieval",
-                },
-                user,
+        if queries is None:
+            queries = asyncio.ensure_future(
+                generate_retrieval_queries(request, body, user)
             )
-            queries_response = queries_response["choices"][0]["message"]["content"]
 
-            try:
-                bracket_start = queries_response.find("{")
-                bracket_end = queries_response.rfind("}") + 1
+        if isinstance(queries, list) or not ENABLE_SPECULATIVE_RETRIEVAL:
+            if speculative_retrieval is not None:
+                speculative_retrieval[1].cancel()
+            if not isinstance(queries, list):
+                queries = await queries
+            sources = await retrieve(files, queries)
+        else:
+            speculative_query = speculative_query or get_last_user_message(
+                body["messages"]
+            )
 
-                if bracket_start == -1 or bracket_end == -1:
-                    raise Exception("No JSON object found in the response")
+            if speculative_retrieval is not None:
+                speculative_files, speculative_task = speculative_retrieval
+                covered = {json.dumps(f, sort_keys=True) for f in speculative_files}
+            else:
+                speculative_task = None
+
+            # Copies are taken before any retrieval strips "data" from them;
+            # files added after the speculative retrieval started (e.g. by
+            # web search) are searched with every query afterwards
+            refine_files, new_files = [], []
+            for file in files:
+                if (
+                    speculative_task is None
+                    or json.dumps(file, sort_keys=True) in covered
+                ):
+                    refine_files.append({**file})
+                else:
+                    new_files.append({**file})
 
-                queries_response = queries_response[bracket_start:bracket_end]
-                queries_response = json.loads(queries_response)
-            except Exception as e:
-                queries_response = {"queries": [queries_response]}
+            if speculative_task is None:
+                speculative_task = asyncio.create_task(
+                    retrieve(files, [speculative_query])
+                )
 
-            queries = queries_response.get("queries", [])
-        except:
-            pass
+            try:
+                queries = await asyncio.wait_for(
+                    queries, timeout=SPECULATIVE_RETRIEVAL_QUERY_DEADLINE
+                )
+            except asyncio.TimeoutError:
+                log.info(
+                    "Retrieval query generation exceeded "
+                    f"{SPECULATIVE_RETRIEVAL_QUERY_DEADLINE}s, "
+                    "using speculative results only"
+                )
+                queries = [speculative_query]
+            except BaseException:
+                speculative_task.cancel()
+                raise
 
-        if len(queries) == 0:
-            queries = [get_last_user_message(body["messages"])]
+            sources = await speculative_task
 
-        try:
-            # Offload get_sources_from_files to a separate thread
-            loop = asyncio.get_running_loop()
-            with ThreadPoolExecutor() as executor:
-                sources = await loop.run_in_executor(
-                    executor,
-                    lambda: get_sources_from_files(
-                        request=request,
-                        files=files,
-                        queries=queries,
-                        embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
-                            query, prefix=prefix, user=user
-                        ),
-                        k=request.app.state.config.TOP_K,
-                        reranking_function=request.app.state.rf,
-                        k_reranker=request.app.state.config.TOP_K_RERANKER,
-                        r=request.app.state.config.RELEVANCE_THRESHOLD,
-                        hybrid_bm25_weight=request.app.state.config.HYBRID_BM25_WEIGHT,
-                        hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
-                        full_context=request.app.state.config.RAG_FULL_CONTEXT,
-                    ),
+            remaining_queries = [
+                query for query in queries if query != speculative_query
+            ]
+            if remaining_queries and refine_files:
+                sources = merge_sources(
+                    await retrieve(refine_files, remaining_queries), sources
+                )
+            if new_files:
+                sources = merge_sources(
+                    sources,
+                    await retrieve(new_files, [speculative_query, *remaining_queries]),
                 )
-        except Exception as e:
-            log.exception(e)
 
         log.debug(f"rag_contexts:sources: {sources}")
+    elif speculative_retrieval is not None:
+        speculative_retrieval[1].cancel()
 
     return body, {"sources": sources}
 
@@ -810,7 +936,7 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     try:
 
         filter_functions = [
-            Functions.get_function_by_id(filter_id)
+            Functions.get_cached_function_by_id(filter_id)
             for filter_id in get_sorted_filter_ids(
                 request, model, metadata.get("filter_ids", [])
             )
@@ -826,90 +952,126 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     except Exception as e:
         raise Exception(f"Error: {e}")
 
-    features = form_data.pop("features", None)
-    if features:
-        if "memory" in features and features["memory"]:
-            form_data = await chat_memory_handler(
-                request, form_data, extra_params, user
-            )
+    features = form_data.pop("features", None) or {}
+    tool_ids = form_data.pop("tool_ids", None)
 
-        if "web_search" in features and features["web_search"]:
-            form_data = await chat_web_search_handler(
-                request, form_data, extra_params, user
+    # Query generation in concurrent stages reads from a snapshot, so that it
+    # does not depend on which sibling stage rewrote the messages first
+    messages_snapshot = [{**message} for message in form_data["messages"]]
+
+    # Retrieval queries are generated from the start, and retrieval for the
+    # raw user message over the files known so far starts alongside them;
+    # file retrieval picks both up once tools are done, or uses the
+    # speculative results alone past the deadline
+    retrieval_queries = None
+    speculative_retrieval = None
+    if form_data.get("files") or features.get("web_search"):
+        retrieval_queries = asyncio.create_task(
+            generate_retrieval_queries(
+                request,
+                {"model": form_data["model"], "messages": messages_snapshot},
+                user,
             )
+        )
 
-        if "image_generation" in features and features["image_generation"]:
-            form_data = await chat_image_generation_handler(
-                request, form_data, extra_params, user
+        if form_data.get("files") and ENABLE_SPECULATIVE_RETRIEVAL and user_message:
+            speculative_retrieval = start_speculative_retrieval(
+                request, form_data["files"], user_message, user
             )
 
-        if "code_interpreter" in features and features["code_interpreter"]:
-            form_data["messages"] = add_or_update_user_message(
-                (
-                    request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE
-                    if request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE != ""
-                    else DEFAULT_CODE_INTERPRETER_PROMPT
-                ),
-                form_data["messages"],
-            )
+    tools_dict = {}
 
-    tool_ids = form_data.pop("tool_ids", None)
-    files = form_data.pop("files", None)
+    async def memory_stage():
+        nonlocal form_data
+        form_data = await chat_memory_handler(request, form_data, extra_params, user)
 
-    # Remove files duplicates
-    if files:
-        files = list({json.dumps(f, sort_keys=True): f for f in files}.values())
+    async def web_search_stage():
+        web_search_form_data = await chat_web_search_handler(
+            request,
+            {**form_data, "messages": messages_snapshot, "files": []},
+            extra_params,
+            user,
+        )
+        form_data["files"] = [
+            *(form_data.get("files") or []),
+            *web_search_form_data.get("files", []),
+        ]
 
-    metadata = {
-        **metadata,
-        "tool_ids": tool_ids,
-        "files": files,
-    }
-    form_data["metadata"] = metadata
+    async def image_generation_stage():
+        nonlocal form_data
+        form_data = await chat_image_generation_handler(
+            request, form_data, extra_params, user
+        )
 
-    # Server side tools
-    tool_ids = metadata.get("tool_ids", None)
-    # Client side tools
-    tool_servers = metadata.get("tool_servers", None)
+    async def code_interpreter_stage():
+        form_data["messages"] = add_or_update_user_message(
+            (
+                request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE
+                if request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE != ""
+                else DEFAULT_CODE_INTERPRETER_PROMPT
+            ),
+            form_data["messages"],
+        )
 
-    log.debug(f"{tool_ids=}")
-    log.debug(f"{tool_servers=}")
+    async def metadata_stage():
+        nonlocal metadata, tools_dict
 
-    tools_dict = {}
+        files = form_data.pop("files", None)
 
-    if tool_ids:
-        tools_dict = get_tools(
-            request,
-            tool_ids,
-            user,
-            {
-                **extra_params,
-                "__model__": models[task_model_id],
-                "__messages__": form_data["messages"],
-                "__files__": metadata.get("files", []),
-            },
-        )
+        # Remove files duplicates
+        if files:
+            files = get_unique_files(files)
 
-    if tool_servers:
-        for tool_server in tool_servers:
-            tool_specs = tool_server.pop("specs", [])
+        metadata = {
+            **metadata,
+            "tool_ids": tool_ids,
+            "files": files,
+        }
+        form_data["metadata"] = metadata
 
-            for tool in tool_specs:
-                tools_dict[tool["name"]] = {
-                    "spec": tool,
-                    "direct": True,
-                    "server": tool_server,
-                }
+        # Server side tools
+        # Client side tools
+        tool_servers = metadata.get("tool_servers", None)
+
+        log.debug(f"{tool_ids=}")
+        log.debug(f"{tool_servers=}")
+
+        if tool_ids:
+            tools_dict = get_tools(
+                request,
+                tool_ids,
+                user,
+                {
+                    **extra_params,
+                    "__model__": models[task_model_id],
+                    "__messages__": form_data["messages"],
+                    "__files__": metadata.get("files", []),
+                },
+            )
 
-    if tools_dict:
-        if metadata.get("function_calling") == "native":
+        if tool_servers:
+            for tool_server in tool_servers:
+                tool_specs = tool_server.pop("specs", [])
+
+                for tool in tool_specs:
+                    tools_dict[tool["name"]] = {
+                        "spec": tool,
+                        "direct": True,
+                        "server": tool_server,
+                    }
+
+        if tools_dict and metadata.get("function_calling") == "native":
             # If the function calling is native, then call the tools function calling handler
             metadata["tools"] = tools_dict
             form_data["tools"] = [
                 {"type": "function", "function": tool.get("spec", {})}
                 for tool in tools_dict.values()
             ]
-        else:
+
+    async def tools_stage():
+        nonlocal form_data
+
+        if tools_dict and metadata.get("function_calling") != "native":
             # If the function calling is not native, then call the tools function calling handler
             try:
                 form_data, flags = await chat_completion_tools_handler(
@@ -920,11 +1082,60 @@ async def process_chat_payload(request, form_data, user, metadata, model):
             except Exception as e:
                 log.exception(e)
 
+    async def files_stage():
+        nonlocal form_data
+
+        try:
+            form_data, flags = await chat_completion_files_handler(
+                request,
+                form_data,
+                user,
+                queries=retrieval_queries,
+                speculative_query=user_message,
+                speculative_retrieval=speculative_retrieval,
+            )
+            sources.extend(flags.get("sources", []))
+        except Exception as e:
+            log.exception(e)
+
+    # Web search only reads the snapshot and runs alongside the stages that
+    # rewrite the messages; those run one after the other, in the order of
+    # the sequential pipeline (memory, image generation, code interpreter).
+    # Tools need the final file list and messages, and file retrieval has to
+    # wait for tools as they may opt out of it (file_handler)
+    stages = StageGraph()
+
+    if features.get("memory"):
+        stages.add("memory", memory_stage)
+
+    if features.get("web_search"):
+        stages.add("web_search", web_search_stage)
+
+    if features.get("image_generation"):
+        stages.add("image_generation", image_generation_stage, depends_on=["memory"])
+
+    if features.get("code_interpreter"):
+        stages.add(
+            "code_interpreter",
+            code_interpreter_stage,
+            depends_on=["memory", "image_generation"],
+        )
+
+    stages.add("metadata", metadata_stage, depends_on=["web_search"])
+    stages.add(
+        "tools",
+        tools_stage,
+        depends_on=["metadata", "memory", "image_generation", "code_interpreter"],
+    )
+    stages.add("files", files_stage, depends_on=["tools"])
+
     try:
-        form_data, flags = await chat_completion_files_handler(request, form_data, user)
-        sources.extend(flags.get("sources", []))
-    except Exception as e:
-        log.exception(e)
+        metadata["stage_timings"] = await stages.run()
+    finally:
+        if retrieval_queries is not None:
+            retrieval_queries.cancel()
+        if speculative_retrieval is not None:
+            speculative_retrieval[1].cancel()
 
     # If context is not empty, insert it into the messages
     if len(sources) > 0:
@@ -1154,11 +1365,23 @@ async def process_chat_response(
         and "message_id" in metadata
         and metadata["message_id"]
     ):
-        event_emitter = get_event_emitter(metadata)
+        event_emitter = get_event_emitter(
+            metadata, coalesce=isinstance(response, StreamingResponse)
+        )
         event_caller = get_event_call(metadata)
 
     # Non-streaming response
     if not isinstance(response, StreamingResponse):
+        if (
+            isinstance(response, dict)
+            and isinstance(response.get("usage"), dict)
+            and metadata.get("stage_timings")
+        ):
+            response["usage"] = {
+                **response["usage"],
+                "stage_timings": metadata["stage_timings"],
+            }
+
         if event_emitter:
             if "error" in response:
                 error = response["error"].get("detail", response["error"])
@@ -1216,7 +1439,7 @@ async def process_chat_response(
                     )
 
                     # Send a webhook notification if the user is not active
-                    if not get_active_status_by_user_id(user.id):
+                    if not await get_active_status_by_user_id(user.id):
                         webhook_url = Users.get_user_webhook_url_by_id(user.id)
                         if webhook_url:
                             post_webhook(
@@ -1284,7 +1507,7 @@ async def process_chat_response(
         "__model__": model,
     }
     filter_functions = [
-        Functions.get_function_by_id(filter_id)
+        Functions.get_cached_function_by_id(filter_id)
         for filter_id in get_sorted_filter_ids(
             request, model, metadata.get("filter_ids", [])
         )
@@ -1303,135 +1526,8 @@ async def process_chat_response(
             },
         )
 
-        def split_content_and_whitespace(content):
-            content_stripped = content.rstrip()
-            original_whitespace = (
-                content[len(content_stripped) :]
-                if len(content) > len(content_stripped)
-                else ""
-            )
-            return content_stripped, original_whitespace
-
-        def is_opening_code_block(content):
-            backtick_segments = content.split("```")
-            # Even number of segments means the last backticks are opening a new block
-            return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
-
         # Handle as a background task
         async def post_response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        content = f"{content}{block['content'].strip()}\n"
-                    elif block["type"] == "tool_calls":
-                        attributes = block.get("attributes", {})
-
-                        tool_calls = block.get("content", [])
-                        results = block.get("results", [])
-
-                        if results:
-
-                            tool_calls_display_content = ""
-                            for tool_call in tool_calls:
-
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_result = None
-                                tool_result_files = None
-                                for result in results:
-                                    if tool_call_id == result.get("tool_call_id", ""):
-                                        tool_result = result.get("content", None)
-                                        tool_result_files = result.get("files", None)
-                                        break
-
-                                if tool_result:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
-                                else:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-                        else:
-                            tool_calls_display_content = ""
-
-                            for tool_call in tool_calls:
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-
-                    elif block["type"] == "reasoning":
-                        reasoning_display_content = "\n".join(
-                            (f"> {line}" if not line.startswith(">") else line)
-                            for line in block["content"].splitlines()
-                        )
-
-                        reasoning_duration = block.get("duration", None)
-
-                        if reasoning_duration is not None:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
-
-                    elif block["type"] == "code_interpreter":
-                        attributes = block.get("attributes", {})
-                        output = block.get("output", None)
-                        lang = attributes.get("lang", "")
-
-                        content_stripped, original_whitespace = (
-                            split_content_and_whitespace(content)
-                        )
-                        if is_opening_code_block(content_stripped):
-                            # Remove trailing backticks that would open a new block
-                            content = (
-                                content_stripped.rstrip("`").rstrip()
-                                + original_whitespace
-                            )
-                        else:
-                            # Keep content as is - either closing backticks or no backticks
-                            content = content_stripped + original_whitespace
-
-                        if output:
-                            output = html.escape(json.dumps(output))
-
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-
-                    else:
-                        block_content = str(block["content"]).strip()
-                        content = f"{content}{block['type']}: {block_content}\n"
-
-                return content.strip()
-
             def convert_content_blocks_to_messages(content_blocks):
                 messages = []
 
@@ -1472,156 +1568,6 @@ async def process_chat_response(
 
                 return messages
 
-            def tag_content_handler(content_type, tags, content, content_blocks):
-                end_flag = False
-
-                def extract_attributes(tag_content):
-                    """Extract attributes from a tag if they exist."""
-                    attributes = {}
-                    if not tag_content:  # Ensure tag_content is not None
-                        return attributes
-                    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
-                    matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
-                    for key, value in matches:
-                        attributes[key] = value
-                    return attributes
-
-                if content_blocks[-1]["type"] == "text":
-                    for start_tag, end_tag in tags:
-                        # Match start tag e.g., <tag> or <tag attr="value">
-                        start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
-                        match = re.search(start_tag_pattern, content)
-                        if match:
-                            attr_content = (
-                                match.group(1) if match.group(1) else ""
-                            )  # Ensure it's not None
-                            attributes = extract_attributes(
-                                attr_content
-                            )  # Extract attributes safely
-
-                            # Capture everything before and after the matched tag
-                            before_tag = content[
-                                : match.start()
-                            ]  # Content before opening tag
-                            after_tag = content[
-                                match.end() :
-                            ]  # Content after opening tag
-
-                            # Remove the start tag and after from the currently handling text block
-                            content_blocks[-1]["content"] = content_blocks[-1][
-                                "content"
-                            ].replace(match.group(0) + after_tag, "")
-
-                            if before_tag:
-                                content_blocks[-1]["content"] = before_tag
-
-                            if not content_blocks[-1]["content"]:
-                                content_blocks.pop()
-
-                            # Append the new block
-                            content_blocks.append(
-                                {
-                                    "type": content_type,
-                                    "start_tag": start_tag,
-                                    "end_tag": end_tag,
-                                    "attributes": attributes,
-                                    "content": "",
-                                    "started_at": time.time(),
-                                }
-                            )
-
-                            if after_tag:
-                                content_blocks[-1]["content"] = after_tag
-                                tag_content_handler(
-                                    content_type, tags, after_tag, content_blocks
-                                )
-
-                            break
-                elif content_blocks[-1]["type"] == content_type:
-                    start_tag = content_blocks[-1]["start_tag"]
-                    end_tag = content_blocks[-1]["end_tag"]
-                    # Match end tag e.g., </tag>
-                    end_tag_pattern = rf"<{re.escape(end_tag)}>"
-
-                    # Check if the content has the end tag
-                    if re.search(end_tag_pattern, content):
-                        end_flag = True
-
-                        block_content = content_blocks[-1]["content"]
-                        # Strip start and end tags from the content
-                        start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
-                        block_content = re.sub(
-                            start_tag_pattern, "", block_content
-                        ).strip()
-
-                        end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
-                        split_content = end_tag_regex.split(block_content, maxsplit=1)
-
-                        # Content inside the tag
-                        block_content = (
-                            split_content[0].strip() if split_content else ""
-                        )
-
-                        # Leftover content (everything after `</tag>`)
-                        leftover_content = (
-                            split_content[1].strip() if len(split_content) > 1 else ""
-                        )
-
-                        if block_content:
-                            content_blocks[-1]["content"] = block_content
-                            content_blocks[-1]["ended_at"] = time.time()
-                            content_blocks[-1]["duration"] = int(
-                                content_blocks[-1]["ended_at"]
-                                - content_blocks[-1]["started_at"]
-                            )
-
-                            # Reset the content_blocks by appending a new text block
-                            if content_type != "code_interpreter":
-                                if leftover_content:
-
-                                    content_blocks.append(
-                                        {
-                                            "type": "text",
-                                            "content": leftover_content,
-                                        }
-                                    )
-                                else:
-                                    content_blocks.append(
-                                        {
-                                            "type": "text",
-                                            "content": "",
-                                        }
-                                    )
-
-                        else:
-                            # Remove the block if content is empty
-                            content_blocks.pop()
-
-                            if leftover_content:
-                                content_blocks.append(
-                                    {
-                                        "type": "text",
-                                        "content": leftover_content,
-                                    }
-                                )
-                            else:
-                                content_blocks.append(
-                                    {
-                                        "type": "text",
-                                        "content": "",
-                                    }
-                                )
-
-                        # Clean processed content
-                        content = re.sub(
-                            rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
-                            "",
-                            content,
-                            flags=re.DOTALL,
-                        )
-
-                return content, content_blocks, end_flag
-
             message = Chats.get_message_by_id_and_message_id(
                 metadata["chat_id"], metadata["message_id"]
             )
@@ -1657,19 +1603,17 @@ async def process_chat_response(
                 "code_interpreter", False
             )
 
-            reasoning_tags = [
-                ("think", "/think"),
-                ("thinking", "/thinking"),
-                ("reason", "/reason"),
-                ("reasoning", "/reasoning"),
-                ("thought", "/thought"),
-                ("Thought", "/Thought"),
-                ("|begin_of_thought|", "|end_of_thought|"),
-            ]
-
-            code_interpreter_tags = [("code_interpreter", "/code_interpreter")]
-
-            solution_tags = [("|begin_of_solution|", "|end_of_solution|")]
+            tag_matcher = ContentTagMatcher(
+                [
+                    content_type
+                    for content_type, enabled in [
+                        ("reasoning", DETECT_REASONING),
+                        ("code_interpreter", DETECT_CODE_INTERPRETER),
+                        ("solution", DETECT_SOLUTION),
+                    ]
+                    if enabled
+                ]
+            )
 
             try:
                 for event in events:
@@ -1689,29 +1633,18 @@ async def process_chat_response(
                         },
                     )
 
-                async def stream_body_handler(response):
-                    nonlocal content
-                    nonlocal content_blocks
+                def serialize_streamed_content():
+                    return serialize_content_blocks(content_blocks)
 
+                async def stream_body_handler(response):
                     response_tool_calls = []
 
-                    async for line in response.body_iterator:
-                        line = line.decode("utf-8") if isinstance(line, bytes) else line
-                        data = line
-
-                        # Skip empty lines
-                        if not data.strip():
-                            continue
-
-                        # "data:" is the prefix for each event
-                        if not data.startswith("data:"):
+                    async for data in iter_sse_payloads(response.body_iterator):
+                        if data == b"[DONE]":
                             continue
 
-                        # Remove the prefix
-                        data = data[len("data:") :].strip()
-
                         try:
-                            data = json.loads(data)
+                            data = json_loads(data)
 
                             data, _ = await process_filter_functions(
                                 request=request,
@@ -1749,6 +1682,13 @@ async def process_chat_response(
                                             )
                                         usage = data.get("usage", {})
                                         if usage:
+                                            if metadata.get("stage_timings"):
+                                                usage = {
+                                                    **usage,
+                                                    "stage_timings": metadata[
+                                                        "stage_timings"
+                                                    ],
+                                                }
                                             await event_emitter(
                                                 {
                                                     "type": "chat:completion",
@@ -1846,11 +1786,8 @@ async def process_chat_response(
 
                                         reasoning_block["content"] += reasoning_content
 
-                                        data = {
-                                            "content": serialize_content_blocks(
-                                                content_blocks
-                                            )
-                                        }
+                                        # Serialized lazily when the coalesced frame is sent
+                                        data = {"content": serialize_streamed_content}
 
                                     if value:
                                         if (
@@ -1876,7 +1813,6 @@ async def process_chat_response(
                                                 }
                                             )
 
-                                        content = f"{content}{value}"
                                         if not content_blocks:
                                             content_blocks.append(
                                                 {
@@ -1885,42 +1821,11 @@ async def process_chat_response(
                                                 }
                                             )
 
-                                        content_blocks[-1]["content"] = (
-                                            content_blocks[-1]["content"] + value
-                                        )
-
-                                        if DETECT_REASONING:
-                                            content, content_blocks, _ = (
-                                                tag_content_handler(
-                                                    "reasoning",
-                                                    reasoning_tags,
-                                                    content,
-                                                    content_blocks,
-                                                )
-                                            )
+                                        content_blocks[-1]["content"] += value
 
-                                        if DETECT_CODE_INTERPRETER:
-                                            content, content_blocks, end = (
-                                                tag_content_handler(
-                                                    "code_interpreter",
-                                                    code_interpreter_tags,
-                                                    content,
-                                                    content_blocks,
-                                                )
-                                            )
-
-                                            if end:
-                                                break
-
-                                        if DETECT_SOLUTION:
-                                            content, content_blocks, _ = (
-                                                tag_content_handler(
-                                                    "solution",
-                                                    solution_tags,
-                                                    content,
-                                                    content_blocks,
-                                                )
-                                            )
+                                        # Only the newly appended text is scanned for tags
+                                        if tag_matcher.process(content_blocks):
+                                            break
 
                                         if ENABLE_REALTIME_CHAT_SAVE:
                                             # Save message in the database
@@ -1935,9 +1840,7 @@ async def process_chat_response(
                                             )
                                         else:
                                             data = {
-                                                "content": serialize_content_blocks(
-                                                    content_blocks
-                                                ),
+                                                "content": serialize_streamed_content,
                                             }
 
                                 await event_emitter(
@@ -1947,12 +1850,8 @@ async def process_chat_response(
                                     }
                                 )
                         except Exception as e:
-                            done = "data: [DONE]" in line
-                            if done:
-                                pass
-                            else:
-                                log.debug("Error: ", e)
-                                continue
+                            log.debug("Error: ", e)
+                            continue
 
                     if content_blocks:
                         # Clean up the last text block
@@ -2006,11 +1905,7 @@ async def process_chat_response(
 
                     tools = metadata.get("tools", {})
 
-                    results = []
-                    for tool_call in response_tool_calls:
-                        tool_call_id = tool_call.get("id", "")
-                        tool_name = tool_call.get("function", {}).get("name", "")
-
+                    def get_tool_function_params(tool_call):
                         tool_function_params = {}
                         try:
                             # json.loads cannot be used because some models do not produce valid JSON
@@ -2029,49 +1924,49 @@ async def process_chat_response(
                                     f"Error parsing tool call arguments: {tool_call.get('function', {}).get('arguments', '{}')}"
                                 )
 
-                        tool_result = None
-
-                        if tool_name in tools:
-                            tool = tools[tool_name]
-                            spec = tool.get("spec", {})
-
-                            try:
-                                allowed_params = (
-                                    spec.get("parameters", {})
-                                    .get("properties", {})
-                                    .keys()
-                                )
+                        if not isinstance(tool_function_params, dict):
+                            return {}
 
-                                tool_function_params = {
-                                    k: v
-                                    for k, v in tool_function_params.items()
-                                    if k in allowed_params
-                                }
+                        tool = tools[tool_call.get("function", {}).get("name", "")]
+                        allowed_params = (
+                            tool.get("spec", {})
+                            .get("parameters", {})
+                            .get("properties", {})
+                            .keys()
+                        )
+                        return {
+                            k: v
+                            for k, v in tool_function_params.items()
+                            if k in allowed_params
+                        }
 
-                                if tool.get("direct", False):
-                                    tool_result = await event_caller(
-                                        {
-                                            "type": "execute:tool",
-                                            "data": {
-                                                "id": str(uuid4()),
-                                                "name": tool_name,
-                                                "params": tool_function_params,
-                                                "server": tool.get("server", {}),
-                                                "session_id": metadata.get(
-                                                    "session_id", None
-                                                ),
-                                            },
-                                        }
-                                    )
+                    # Calls to unknown tools are answered with an empty result
+                    known_tool_call_indexes = [
+                        idx
+                        for idx, tool_call in enumerate(response_tool_calls)
+                        if tool_call.get("function", {}).get("name", "") in tools
+                    ]
 
-                                else:
-                                    tool_function = tool["callable"]
-                                    tool_result = await tool_function(
-                                        **tool_function_params
-                                    )
+                    # Independent calls run concurrently, results keep call order
+                    tool_results = await execute_tool_calls(
+                        [
+                            (
+                                tools[response_tool_calls[idx]["function"]["name"]],
+                                response_tool_calls[idx]["function"]["name"],
+                                get_tool_function_params(response_tool_calls[idx]),
+                            )
+                            for idx in known_tool_call_indexes
+                        ],
+                        user_id=user.id,
+                        event_caller=event_caller,
+                        metadata=metadata,
+                    )
+                    tool_results = dict(zip(known_tool_call_indexes, tool_results))
 
-                            except Exception as e:
-                                tool_result = str(e)
+                    results = []
+                    for idx, tool_call in enumerate(response_tool_calls):
+                        tool_call_id = tool_call.get("id", "")
+                        tool_result = tool_results.get(idx)
 
                         tool_result_files = []
                         if isinstance(tool_result, list):
@@ -2338,9 +2233,17 @@ async def process_chat_response(
                     )
 
                 # Send a webhook notification if the user is not active
-                if not get_active_status_by_user_id(user.id):
+                if not await get_active_status_by_user_id(user.id):
                     webhook_url = Users.get_user_webhook_url_by_id(user.id)
                     if webhook_url:
+                        # Text only, without reasoning/tool/code blocks
+                        content = serialize_content_blocks(
+                            [
+                                block
+                                for block in content_blocks
+                                if block["type"] == "text"
+                            ]
+                        )
                         post_webhook(
                             request.app.state.WEBUI_NAME,
                             webhook_url,
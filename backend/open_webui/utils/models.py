@@ -271,7 +271,7 @@ async def get_all_models(request, user: UserModel = None):
 
         model["actions"] = []
         for action_id in action_ids:
-            action_function = Functions.get_function_by_id(action_id)
+            action_function = Functions.get_cached_function_by_id(action_id)
             if action_function is None:
                 raise Exception(f"Action not found: {action_id}")
 
@@ -282,7 +282,7 @@ async def get_all_models(request, user: UserModel = None):
 
         model["filters"] = []
         for filter_id in filter_ids:
-            filter_function = Functions.get_function_by_id(filter_id)
+            filter_function = Functions.get_cached_function_by_id(filter_id)
             if filter_function is None:
                 raise Exception(f"Filter not found: {filter_id}")
 
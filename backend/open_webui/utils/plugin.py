@@ -168,11 +168,22 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
 
 def get_function_module_from_cache(request, function_id, load_from_db=True):
     if load_from_db:
-        # Always load from the database by default
-        # This is useful for hooks like "inlet" or "outlet" where the content might change
-        # and we want to ensure the latest content is used.
+        # Make sure the latest content is used for hooks like "inlet" or
+        # "outlet". Function rows come from a snapshot that is invalidated on
+        # every function change (on all workers), so while a function is
+        # unchanged this neither reads the database nor compares contents.
+        version = Functions.cache_version.version
 
-        function = Functions.get_function_by_id(function_id)
+        if (
+            hasattr(request.app.state, "FUNCTION_VERSIONS")
+            and request.app.state.FUNCTION_VERSIONS.get(function_id) == version
+        ) and (
+            hasattr(request.app.state, "FUNCTIONS")
+            and function_id in request.app.state.FUNCTIONS
+        ):
+            return request.app.state.FUNCTIONS[function_id], None, None
+
+        function = Functions.get_cached_function_by_id(function_id)
         if not function:
             raise Exception(f"Function not found: {function_id}")
         content = function.content
@@ -191,6 +202,7 @@ def get_function_module_from_cache(request, function_id, load_from_db=True):
             and function_id in request.app.state.FUNCTIONS
         ):
             if request.app.state.FUNCTION_CONTENTS[function_id] == content:
+                request.app.state.FUNCTION_VERSIONS[function_id] = version
                 return request.app.state.FUNCTIONS[function_id], None, None
 
         function_module, function_type, frontmatter = load_function_module_by_id(
@@ -199,6 +211,7 @@ def get_function_module_from_cache(request, function_id, load_from_db=True):
     else:
         # Load from cache (e.g. "stream" hook)
         # This is useful for performance reasons
+        version = None
 
         if (
             hasattr(request.app.state, "FUNCTIONS")
@@ -209,6 +222,7 @@ def get_function_module_from_cache(request, function_id, load_from_db=True):
         function_module, function_type, frontmatter = load_function_module_by_id(
             function_id
         )
+        content = Functions.get_cached_function_by_id(function_id).content
 
     if not hasattr(request.app.state, "FUNCTIONS"):
         request.app.state.FUNCTIONS = {}
@@ -216,8 +230,12 @@ def get_function_module_from_cache(request, function_id, load_from_db=True):
     if not hasattr(request.app.state, "FUNCTION_CONTENTS"):
         request.app.state.FUNCTION_CONTENTS = {}
 
+    if not hasattr(request.app.state, "FUNCTION_VERSIONS"):
+        request.app.state.FUNCTION_VERSIONS = {}
+
     request.app.state.FUNCTIONS[function_id] = function_module
     request.app.state.FUNCTION_CONTENTS[function_id] = content
+    request.app.state.FUNCTION_VERSIONS[function_id] = version
 
     return function_module, function_type, frontmatter
 
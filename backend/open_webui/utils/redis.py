@@ -1,8 +1,18 @@
+import logging
+import threading
+import time
+import uuid
+
 import socketio
 import redis
 from redis import asyncio as aioredis
 from urllib.parse import urlparse
 
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
 
 def parse_redis_service_url(redis_url):
     parsed_url = urlparse(redis_url)
@@ -37,6 +47,25 @@ def get_redis_connection(redis_url, redis_sentinels, decode_responses=True):
         return redis.Redis.from_url(redis_url, decode_responses=decode_responses)
 
 
+def get_async_redis_connection(redis_url, redis_sentinels, decode_responses=True):
+    if redis_sentinels:
+        redis_config = parse_redis_service_url(redis_url)
+        sentinel = aioredis.sentinel.Sentinel(
+            redis_sentinels,
+            port=redis_config["port"],
+            db=redis_config["db"],
+            username=redis_config["username"],
+            password=redis_config["password"],
+            decode_responses=decode_responses,
+        )
+
+        # Get a master connection from Sentinel
+        return sentinel.master_for(redis_config["service"])
+    else:
+        # Standard Redis connection
+        return aioredis.Redis.from_url(redis_url, decode_responses=decode_responses)
+
+
 def get_sentinels_from_env(sentinel_hosts_env, sentinel_port_env):
     if sentinel_hosts_env:
         sentinel_hosts = sentinel_hosts_env.split(",")
@@ -56,3 +85,97 @@ def get_sentinel_url_from_env(redis_url, sentinel_hosts_env, sentinel_port_env):
         f"{host}:{sentinel_port_env}" for host in sentinel_hosts_env.split(",")
     )
     return f"redis+sentinel://{auth_part}{hosts_part}/{redis_config['db']}/{redis_config['service']}"
+
+
+class CacheVersion:
+    """
+    Generation counter for an in-process cache.
+
+    `bump()` increments the counter locally and, when Redis is configured,
+    on every other worker through a pub/sub channel. Caches stamp their
+    entries with `version` and treat entries with an older stamp as stale.
+
+    Without Redis, changes made by other workers are picked up by polling
+    `get_fingerprint` (a cheap query over the cached table) at most every
+    `poll_interval` seconds; the version is bumped when the fingerprint
+    changes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        redis_url=None,
+        redis_sentinels=[],
+        get_fingerprint=None,
+        poll_interval: float = 1.0,
+    ):
+        self.name = name
+        self._version = 0
+        self.channel = f"open-webui:cache:{name}"
+        self.instance_id = str(uuid.uuid4())
+        self.lock = threading.Lock()
+
+        self.get_fingerprint = get_fingerprint
+        self.poll_interval = poll_interval
+        self.fingerprint = None
+        self.polled_at = None
+
+        self.redis = None
+        if redis_url:
+            try:
+                self.redis = get_redis_connection(
+                    redis_url, redis_sentinels, decode_responses=True
+                )
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.channel: self._on_message})
+                self.listener = pubsub.run_in_thread(
+                    sleep_time=1.0,
+                    daemon=True,
+                    exception_handler=self._on_listener_error,
+                )
+            except Exception as e:
+                log.error(f"Error subscribing to {self.channel}: {e}")
+                self.redis = None
+
+    @property
+    def version(self) -> int:
+        if self.redis is None and self.get_fingerprint is not None:
+            self._poll()
+        return self._version
+
+    def _poll(self):
+        now = time.monotonic()
+        if self.polled_at is not None and now - self.polled_at < self.poll_interval:
+            return
+        self.polled_at = now
+
+        try:
+            fingerprint = self.get_fingerprint()
+        except Exception as e:
+            log.error(f"Error polling {self.name} for changes: {e}")
+            return
+
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self._increment()
+
+    def _increment(self):
+        with self.lock:
+            self._version += 1
+
+    def bump(self):
+        self._increment()
+        if self.redis:
+            try:
+                self.redis.publish(self.channel, self.instance_id)
+            except Exception as e:
+                log.error(f"Error publishing to {self.channel}: {e}")
+
+    def _on_message(self, message):
+        if message.get("data") != self.instance_id:
+            self._increment()
+
+    def _on_listener_error(self, e, pubsub, thread):
+        log.error(f"Cache invalidation listener error on {self.channel}: {e}")
+        # Invalidations may have been missed while disconnected
+        self._increment()
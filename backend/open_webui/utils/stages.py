@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class StageGraph:
+    """
+    Runs a set of named async stages, each one as soon as the stages it
+    depends on have finished, so independent stages overlap.
+
+    Stages are registered in the order they would run sequentially; a stage
+    may only depend on stages registered before it, which keeps the graph
+    acyclic. Dependencies on stages that were never registered (e.g. a
+    disabled feature) are ignored. If a stage raises, the remaining stages
+    are cancelled and the exception is propagated from `run()`. Return
+    values are kept in `results`, so a stage can read the output of the
+    stages it depends on.
+    """
+
+    def __init__(self):
+        self.stages: dict[str, tuple[Callable[[], Awaitable], list[str]]] = {}
+        self.results: dict[str, Any] = {}
+        self.timings: dict[str, float] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Awaitable],
+        depends_on: Optional[list[str]] = None,
+    ):
+        depends_on = [dep for dep in (depends_on or []) if dep in self.stages]
+        self.stages[name] = (func, depends_on)
+
+    async def run(self) -> dict[str, float]:
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_stage(name, func, depends_on):
+            if depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in depends_on))
+
+            start = time.perf_counter()
+            try:
+                self.results[name] = await func()
+            finally:
+                self.timings[name] = round((time.perf_counter() - start) * 1000, 2)
+                log.debug(f"stage {name} took {self.timings[name]}ms")
+
+        for name, (func, depends_on) in self.stages.items():
+            tasks[name] = asyncio.create_task(run_stage(name, func, depends_on))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return self.timings
@@ -0,0 +1,378 @@
+import html
+import json
+import logging
+import re
+import time
+from typing import Iterator, Optional, Union
+
+from open_webui.env import SRC_LOG_LEVELS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def json_loads(data: Union[str, bytes]):
+    """Decode JSON with orjson when it is installed, falling back to json."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class SSELineParser:
+    """
+    Incremental parser for `text/event-stream` bodies.
+
+    Upstream bodies may be chunked at arbitrary byte boundaries, so partial
+    lines (and partial UTF-8 sequences) are buffered across `feed` calls. Only
+    the payloads of `data:` fields are yielded, as raw bytes, so they can be
+    handed to the JSON decoder without an intermediate `str`.
+    """
+
+    def __init__(self):
+        self.buffer = b""
+
+    def feed(self, chunk: Union[str, bytes]) -> Iterator[bytes]:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+
+        self.buffer += chunk
+        if b"\n" not in chunk:
+            return
+
+        *lines, self.buffer = self.buffer.split(b"\n")
+        for line in lines:
+            payload = self.parse_line(line)
+            if payload is not None:
+                yield payload
+
+    def flush(self) -> Iterator[bytes]:
+        line, self.buffer = self.buffer, b""
+        payload = self.parse_line(line)
+        if payload is not None:
+            yield payload
+
+    @staticmethod
+    def parse_line(line: bytes) -> Optional[bytes]:
+        # "data:" is the prefix for each event, skip comments and other fields
+        if not line.startswith(b"data:"):
+            return None
+
+        payload = line[len(b"data:") :].strip()
+        return payload or None
+
+
+async def iter_sse_payloads(body_iterator):
+    parser = SSELineParser()
+    async for chunk in body_iterator:
+        for payload in parser.feed(chunk):
+            yield payload
+
+    for payload in parser.flush():
+        yield payload
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def serialize_content_blocks(content_blocks, raw=False):
+    content = ""
+
+    for block in content_blocks:
+        if block["type"] == "text":
+            content = f"{content}{block['content'].strip()}\n"
+        elif block["type"] == "tool_calls":
+            attributes = block.get("attributes", {})
+
+            tool_calls = block.get("content", [])
+            results = block.get("results", [])
+
+            if results:
+
+                tool_calls_display_content = ""
+                for tool_call in tool_calls:
+
+                    tool_call_id = tool_call.get("id", "")
+                    tool_name = tool_call.get("function", {}).get("name", "")
+                    tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                    tool_result = None
+                    tool_result_files = None
+                    for result in results:
+                        if tool_call_id == result.get("tool_call_id", ""):
+                            tool_result = result.get("content", None)
+                            tool_result_files = result.get("files", None)
+                            break
+
+                    if tool_result:
+                        tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                    else:
+                        tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+                if not raw:
+                    content = f"{content}\n{tool_calls_display_content}\n\n"
+            else:
+                tool_calls_display_content = ""
+
+                for tool_call in tool_calls:
+                    tool_call_id = tool_call.get("id", "")
+                    tool_name = tool_call.get("function", {}).get("name", "")
+                    tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+                if not raw:
+                    content = f"{content}\n{tool_calls_display_content}\n\n"
+
+        elif block["type"] == "reasoning":
+            reasoning_display_content = "\n".join(
+                (f"> {line}" if not line.startswith(">") else line)
+                for line in block["content"].splitlines()
+            )
+
+            reasoning_duration = block.get("duration", None)
+
+            if reasoning_duration is not None:
+                if raw:
+                    content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+                else:
+                    content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+            else:
+                if raw:
+                    content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+                else:
+                    content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+        elif block["type"] == "code_interpreter":
+            attributes = block.get("attributes", {})
+            output = block.get("output", None)
+            lang = attributes.get("lang", "")
+
+            content_stripped, original_whitespace = split_content_and_whitespace(
+                content
+            )
+            if is_opening_code_block(content_stripped):
+                # Remove trailing backticks that would open a new block
+                content = content_stripped.rstrip("`").rstrip() + original_whitespace
+            else:
+                # Keep content as is - either closing backticks or no backticks
+                content = content_stripped + original_whitespace
+
+            if output:
+                output = html.escape(json.dumps(output))
+
+                if raw:
+                    content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+                else:
+                    content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+            else:
+                if raw:
+                    content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+                else:
+                    content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+        else:
+            block_content = str(block["content"]).strip()
+            content = f"{content}{block['type']}: {block_content}\n"
+
+    return content.strip()
+
+
+####################################
+# Content tag detection
+####################################
+
+# content_type -> {"tags": [(start_tag, end_tag), ...], "stop_on_close": bool}
+CONTENT_TAG_REGISTRY = {}
+
+
+def register_content_tags(
+    content_type: str, tags: list[tuple[str, str]], stop_on_close: bool = False
+):
+    """
+    Register the tags that delimit a content block type in streamed output,
+    e.g. `register_content_tags("reasoning", [("think", "/think")])`.
+
+    When `stop_on_close` is set, the matcher stops after closing a block of
+    this type and drops any trailing text, so the caller can act on it (the
+    code interpreter executes the block before the response continues).
+    """
+    CONTENT_TAG_REGISTRY[content_type] = {
+        "tags": list(tags),
+        "stop_on_close": stop_on_close,
+    }
+
+
+register_content_tags(
+    "reasoning",
+    [
+        ("think", "/think"),
+        ("thinking", "/thinking"),
+        ("reason", "/reason"),
+        ("reasoning", "/reasoning"),
+        ("thought", "/thought"),
+        ("Thought", "/Thought"),
+        ("|begin_of_thought|", "|end_of_thought|"),
+    ],
+)
+register_content_tags(
+    "code_interpreter", [("code_interpreter", "/code_interpreter")], stop_on_close=True
+)
+register_content_tags("solution", [("|begin_of_solution|", "|end_of_solution|")])
+
+
+def extract_tag_attributes(tag_content: Optional[str]) -> dict:
+    """Extract attributes in the format key="value" from a tag."""
+    if not tag_content:
+        return {}
+    return dict(re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content))
+
+
+class ContentTagMatcher:
+    """
+    Detects tagged blocks (reasoning, code interpreter, solution, ...) in the
+    streamed content and splits them into content blocks.
+
+    All start tags of the enabled content types are compiled into a single
+    alternation once. The matcher only scans text that arrived since the
+    previous call: it keeps a scan offset into the last content block and,
+    when the block ends in what may be the beginning of a tag (e.g. `<thi`),
+    resumes from that `<` once more text has arrived.
+    """
+
+    def __init__(self, content_types: list[str]):
+        self.start_tags = {}
+        for content_type in content_types:
+            entry = CONTENT_TAG_REGISTRY[content_type]
+            for start_tag, end_tag in entry["tags"]:
+                self.start_tags.setdefault(
+                    start_tag, (content_type, end_tag, entry["stop_on_close"])
+                )
+
+        names = sorted(self.start_tags, key=len, reverse=True)
+        self.start_pattern = (
+            re.compile(
+                r"<(" + "|".join(re.escape(name) for name in names) + r")(\s[^>\n]*)?>"
+            )
+            if names
+            else None
+        )
+        self.content_types = set(content_types)
+
+        self.block = None
+        self.scan_pos = 0
+
+    def _start_tag_prefix(self, tail: str) -> bool:
+        # `tail` starts with "<"; True if more text could still complete a tag
+        name = tail[1:]
+        for start_tag in self.start_tags:
+            if start_tag.startswith(name):
+                return True
+            if (
+                name.startswith(start_tag)
+                and name[len(start_tag) : len(start_tag) + 1].isspace()
+                and "\n" not in name
+            ):
+                return True
+        return False
+
+    def _open(self, content_blocks: list, match: re.Match) -> None:
+        text_block = content_blocks[-1]
+        text = text_block["content"]
+        content_type, end_tag, _ = self.start_tags[match.group(1)]
+
+        text_block["content"] = text[: match.start()]
+        if not text_block["content"]:
+            content_blocks.pop()
+
+        content_blocks.append(
+            {
+                "type": content_type,
+                "start_tag": match.group(1),
+                "end_tag": end_tag,
+                "attributes": extract_tag_attributes(match.group(2)),
+                "content": text[match.end() :],
+                "started_at": time.time(),
+            }
+        )
+
+    def _close(self, content_blocks: list, start: int, end: int) -> bool:
+        block = content_blocks[-1]
+        text = block["content"]
+        block_content = text[:start].strip()
+        leftover_content = text[end:].strip()
+        stop = CONTENT_TAG_REGISTRY[block["type"]]["stop_on_close"]
+
+        if block_content:
+            block["content"] = block_content
+            block["ended_at"] = time.time()
+            block["duration"] = int(block["ended_at"] - block["started_at"])
+
+            if stop:
+                return True
+        else:
+            # Remove the block if content is empty
+            content_blocks.pop()
+
+        content_blocks.append({"type": "text", "content": leftover_content})
+        return stop
+
+    def process(self, content_blocks: list) -> bool:
+        """
+        Process the text appended to the last content block since the last
+        call. Returns True when a block registered with `stop_on_close` was
+        closed.
+        """
+        while content_blocks:
+            block = content_blocks[-1]
+            if block is not self.block:
+                self.block = block
+                self.scan_pos = 0
+
+            text = block["content"]
+
+            if block["type"] == "text":
+                if self.start_pattern is None:
+                    return False
+
+                match = self.start_pattern.search(text, self.scan_pos)
+                if match:
+                    self._open(content_blocks, match)
+                    continue
+
+                lt = text.rfind("<", self.scan_pos)
+                if lt != -1 and self._start_tag_prefix(text[lt:]):
+                    self.scan_pos = lt
+                else:
+                    self.scan_pos = len(text)
+                return False
+
+            elif block["type"] in self.content_types and "end_tag" in block:
+                end_tag = f"<{block['end_tag']}>"
+                index = text.find(end_tag, self.scan_pos)
+                if index != -1:
+                    if self._close(content_blocks, index, index + len(end_tag)):
+                        return True
+                    continue
+
+                self.scan_pos = max(len(text) - len(end_tag) + 1, 0)
+                return False
+
+            return False
+
+        return False
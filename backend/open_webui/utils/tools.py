@@ -2,9 +2,14 @@ import inspect
 import logging
 import re
 import inspect
+import hashlib
+import json
 import aiohttp
 import asyncio
 import yaml
+import weakref
+
+from uuid import uuid4
 
 from pydantic import BaseModel
 from pydantic.fields import FieldInfo
@@ -40,6 +45,10 @@ from open_webui.env import (
     SRC_LOG_LEVELS,
     AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA,
     AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+    TOOL_SERVER_SPEC_REFRESH_INTERVAL,
+    TOOL_CALL_MAX_CONCURRENCY_PER_USER,
+    TOOL_CALL_MAX_CONCURRENCY_PER_TOOL,
+    TOOL_CALL_TIMEOUT,
 )
 
 import copy
@@ -67,6 +76,81 @@ def get_async_tool_function_and_apply_extra_params(
         return new_function
 
 
+# Semaphores are dropped as soon as no call holds a reference to them
+TOOL_CALL_USER_SEMAPHORES = weakref.WeakValueDictionary()
+TOOL_CALL_TOOL_SEMAPHORES = weakref.WeakValueDictionary()
+
+
+def get_tool_call_semaphore(semaphores, key, limit) -> asyncio.Semaphore:
+    semaphore = semaphores.get(key)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(limit)
+        semaphores[key] = semaphore
+    return semaphore
+
+
+async def execute_tool(
+    tool: dict, name: str, params: dict, event_caller=None, metadata=None
+) -> Any:
+    if tool.get("direct", False):
+        return await event_caller(
+            {
+                "type": "execute:tool",
+                "data": {
+                    "id": str(uuid4()),
+                    "name": name,
+                    "params": params,
+                    "server": tool.get("server", {}),
+                    "session_id": (metadata or {}).get("session_id", None),
+                },
+            }
+        )
+
+    return await tool["callable"](**params)
+
+
+async def execute_tool_calls(
+    tool_calls: list[tuple[dict, str, dict]],
+    user_id: Optional[str] = None,
+    event_caller=None,
+    metadata=None,
+) -> list[Any]:
+    """
+    Run independent tool calls concurrently.
+
+    `tool_calls` is a list of `(tool, name, params)` tuples. Results are
+    returned in the same order; a failing or timed out call yields its
+    error message as a string instead of raising.
+    """
+    user_semaphore = get_tool_call_semaphore(
+        TOOL_CALL_USER_SEMAPHORES, user_id, TOOL_CALL_MAX_CONCURRENCY_PER_USER
+    )
+
+    async def run(tool, name, params):
+        tool_semaphore = get_tool_call_semaphore(
+            TOOL_CALL_TOOL_SEMAPHORES,
+            (tool.get("tool_id", ""), name),
+            TOOL_CALL_MAX_CONCURRENCY_PER_TOOL,
+        )
+
+        try:
+            async with user_semaphore, tool_semaphore:
+                return await asyncio.wait_for(
+                    execute_tool(tool, name, params, event_caller, metadata),
+                    timeout=TOOL_CALL_TIMEOUT,
+                )
+        except asyncio.TimeoutError:
+            log.warning(f"Tool {name} timed out after {TOOL_CALL_TIMEOUT}s")
+            return f"Tool {name} timed out after {TOOL_CALL_TIMEOUT}s"
+        except Exception as e:
+            log.warning(f"Error executing tool {name}: {e}")
+            return str(e)
+
+    return await asyncio.gather(
+        *(run(tool, name, params) for tool, name, params in tool_calls)
+    )
+
+
 def get_tools(
     request: Request, tool_ids: list[str], user: UserModel, extra_params: dict
 ) -> dict[str, dict]:
@@ -440,6 +524,49 @@ def convert_openapi_to_tool_payload(openapi_spec):
     return tool_payload
 
 
+# OpenAPI specs by (url, token hash), converted once per ETag - or content
+# hash when the server sends no ETag - and revalidated with conditional
+# requests. Keyed by token too, as servers may return a different spec per
+# user (session auth) or key
+TOOL_SERVER_SPEC_CACHE: dict[tuple[str, str], dict] = {}
+
+# Shared across spec fetches and tool calls so connections are reused
+TOOL_SERVER_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+def get_tool_server_session() -> aiohttp.ClientSession:
+    global TOOL_SERVER_SESSION
+    if TOOL_SERVER_SESSION is None or TOOL_SERVER_SESSION.closed:
+        TOOL_SERVER_SESSION = aiohttp.ClientSession(trust_env=True)
+    return TOOL_SERVER_SESSION
+
+
+async def close_tool_server_session():
+    global TOOL_SERVER_SESSION
+    if TOOL_SERVER_SESSION is not None and not TOOL_SERVER_SESSION.closed:
+        await TOOL_SERVER_SESSION.close()
+    TOOL_SERVER_SESSION = None
+
+
+def get_openapi_operations(openapi_spec: dict) -> dict[str, dict]:
+    """
+    Index the operations of an OpenAPI spec by operationId.
+    """
+    operations = {}
+    for route_path, methods in openapi_spec.get("paths", {}).items():
+        for http_method, operation in methods.items():
+            if isinstance(operation, dict) and operation.get("operationId"):
+                operations.setdefault(
+                    operation["operationId"],
+                    {"path": route_path, "method": http_method},
+                )
+    return operations
+
+
+def get_tool_server_spec_cache_key(url: str, token: Optional[str]) -> tuple[str, str]:
+    return url, hashlib.sha256(token.encode()).hexdigest() if token else ""
+
+
 async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
     headers = {
         "Accept": "application/json",
@@ -448,23 +575,30 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
+    cache_key = get_tool_server_spec_cache_key(url, token)
+    cached = TOOL_SERVER_SPEC_CACHE.get(cache_key)
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
     error = None
     try:
         timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA)
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url, headers=headers, ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL
-            ) as response:
-                if response.status != 200:
-                    error_body = await response.json()
-                    raise Exception(error_body)
-
-                # Check if URL ends with .yaml or .yml to determine format
-                if url.lower().endswith((".yaml", ".yml")):
-                    text_content = await response.text()
-                    res = yaml.safe_load(text_content)
-                else:
-                    res = await response.json()
+        async with get_tool_server_session().get(
+            url,
+            headers=headers,
+            timeout=timeout,
+            ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+        ) as response:
+            if response.status == 304 and cached:
+                log.debug(f"Tool server spec at {url} not modified")
+                return cached["data"]
+
+            if response.status != 200:
+                error_body = await response.json()
+                raise Exception(error_body)
+
+            etag = response.headers.get("ETag")
+            body = await response.read()
     except Exception as err:
         log.exception(f"Could not fetch tool server spec from {url}")
         if isinstance(err, dict) and "detail" in err:
@@ -473,18 +607,35 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
             error = str(err)
         raise Exception(error)
 
+    version = etag or hashlib.sha256(body).hexdigest()
+    if cached and cached["version"] == version:
+        return cached["data"]
+
+    # Check if URL ends with .yaml or .yml to determine format
+    if url.lower().endswith((".yaml", ".yml")):
+        res = yaml.safe_load(body.decode("utf-8"))
+    else:
+        res = json.loads(body)
+
     data = {
         "openapi": res,
         "info": res.get("info", {}),
         "specs": convert_openapi_to_tool_payload(res),
     }
+    TOOL_SERVER_SPEC_CACHE[cache_key] = {
+        "version": version,
+        "etag": etag,
+        "data": data,
+    }
 
-    log.info("Fetched data:", data)
+    log.info(f"Fetched tool server spec from {url}")
     return data
 
 
 async def get_tool_servers_data(
-    servers: List[Dict[str, Any]], session_token: Optional[str] = None
+    servers: List[Dict[str, Any]],
+    session_token: Optional[str] = None,
+    skip_session_auth: bool = False,
 ) -> List[Dict[str, Any]]:
     # Prepare list of enabled servers along with their original index
     server_entries = []
@@ -510,6 +661,8 @@ async def get_tool_servers_data(
             if auth_type == "bearer":
                 token = server.get("key", "")
             elif auth_type == "session":
+                if skip_session_auth:
+                    continue
                 token = session_token
             server_entries.append((idx, server, full_url, info, token))
 
@@ -523,14 +676,25 @@ async def get_tool_servers_data(
 
     # Build final results with index and server metadata
     results = []
-    for (idx, server, url, info, _), response in zip(server_entries, responses):
+    for (idx, server, url, info, token), response in zip(server_entries, responses):
         if isinstance(response, Exception):
-            log.error(f"Failed to connect to {url} OpenAPI tool server")
-            continue
+            cached = TOOL_SERVER_SPEC_CACHE.get(
+                get_tool_server_spec_cache_key(url, token)
+            )
+            if not cached:
+                log.error(f"Failed to connect to {url} OpenAPI tool server")
+                continue
+
+            # Keep serving the last known spec while the server is unreachable
+            log.warning(f"Failed to refresh {url} OpenAPI tool server spec")
+            response = cached["data"]
 
         openapi_data = response.get("openapi", {})
 
         if info and isinstance(openapi_data, dict):
+            # The fetched spec is shared through the cache, override on a copy
+            openapi_data = {**openapi_data, "info": {**openapi_data.get("info", {})}}
+
             if "name" in info:
                 openapi_data["info"]["title"] = info.get("name", "Tool Server")
 
@@ -544,44 +708,66 @@ async def get_tool_servers_data(
                 "openapi": openapi_data,
                 "info": response.get("info"),
                 "specs": response.get("specs"),
+                "operations": get_openapi_operations(openapi_data),
             }
         )
 
     return results
 
 
+async def periodic_tool_server_refresh(app):
+    """
+    Revalidate the configured tool server specs every
+    TOOL_SERVER_SPEC_REFRESH_INTERVAL seconds. Unchanged specs cost a
+    conditional request and are not converted again.
+
+    There is no user session to authenticate with here, so servers using
+    session auth are skipped and keep the spec they were last loaded with.
+    """
+    while True:
+        try:
+            connections = app.state.config.TOOL_SERVER_CONNECTIONS
+            tool_servers = await get_tool_servers_data(
+                connections, skip_session_auth=True
+            )
+
+            session_auth_idxs = {
+                idx
+                for idx, connection in enumerate(connections)
+                if connection.get("config", {}).get("enable")
+                and connection.get("auth_type") == "session"
+            }
+            tool_servers.extend(
+                server
+                for server in app.state.TOOL_SERVERS
+                if server["idx"] in session_auth_idxs
+            )
+            app.state.TOOL_SERVERS = sorted(
+                tool_servers, key=lambda server: server["idx"]
+            )
+        except Exception as e:
+            log.exception(f"Error refreshing tool servers: {e}")
+
+        await asyncio.sleep(TOOL_SERVER_SPEC_REFRESH_INTERVAL)
+
+
 async def execute_tool_server(
     token: str, url: str, name: str, params: Dict[str, Any], server_data: Dict[str, Any]
 ) -> Any:
     error = None
     try:
         openapi = server_data.get("openapi", {})
-        paths = openapi.get("paths", {})
-
-        matching_route = None
-        for route_path, methods in paths.items():
-            for http_method, operation in methods.items():
-                if isinstance(operation, dict) and operation.get("operationId") == name:
-                    matching_route = (route_path, methods)
-                    break
-            if matching_route:
-                break
-
-        if not matching_route:
-            raise Exception(f"No matching route found for operationId: {name}")
 
-        route_path, methods = matching_route
+        operations = server_data.get("operations")
+        if operations is None:
+            operations = get_openapi_operations(openapi)
 
-        method_entry = None
-        for http_method, operation in methods.items():
-            if operation.get("operationId") == name:
-                method_entry = (http_method.lower(), operation)
-                break
-
-        if not method_entry:
-            raise Exception(f"No matching method found for operationId: {name}")
+        if name not in operations:
+            raise Exception(f"No matching route found for operationId: {name}")
 
-        http_method, operation = method_entry
+        route_path = operations[name]["path"]
+        operation = openapi["paths"][route_path][operations[name]["method"]]
+        http_method = operations[name]["method"].lower()
 
         path_params = {}
         query_params = {}
@@ -617,30 +803,30 @@ async def execute_tool_server(
         if token:
             headers["Authorization"] = f"Bearer {token}"
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
-            request_method = getattr(session, http_method.lower())
-
-            if http_method in ["post", "put", "patch"]:
-                async with request_method(
-                    final_url,
-                    json=body_params,
-                    headers=headers,
-                    ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-                    return await response.json()
-            else:
-                async with request_method(
-                    final_url,
-                    headers=headers,
-                    ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-                    return await response.json()
+        session = get_tool_server_session()
+        request_method = getattr(session, http_method.lower())
+
+        if http_method in ["post", "put", "patch"]:
+            async with request_method(
+                final_url,
+                json=body_params,
+                headers=headers,
+                ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    raise Exception(f"HTTP error {response.status}: {text}")
+                return await response.json()
+        else:
+            async with request_method(
+                final_url,
+                headers=headers,
+                ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    raise Exception(f"HTTP error {response.status}: {text}")
+                return await response.json()
 
     except Exception as err:
         error = str(err)
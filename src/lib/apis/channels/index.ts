@@ -171,13 +171,18 @@ export const deleteChannelById = async (token: string = '', channel_id: string)
 export const getChannelMessages = async (
 	token: string = '',
 	channel_id: string,
-	skip: number = 0,
+	before: string | null = null,
 	limit: number = 50
 ) => {
 	let error = null;
 
+	const searchParams = new URLSearchParams({ limit: `${limit}` });
+	if (before) {
+		searchParams.append('before', before);
+	}
+
 	const res = await fetch(
-		`${WEBUI_API_BASE_URL}/channels/${channel_id}/messages?skip=${skip}&limit=${limit}`,
+		`${WEBUI_API_BASE_URL}/channels/${channel_id}/messages?${searchParams.toString()}`,
 		{
 			method: 'GET',
 			headers: {